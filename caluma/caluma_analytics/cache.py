@@ -0,0 +1,160 @@
+import json
+from hashlib import sha256
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+
+from . import sql
+
+
+def get_version(version_key):
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid4().hex, timeout=None)
+        version = cache.get(version_key)
+    return version
+
+
+class AnalyticsResultCache:
+    """Cache of the result rows of analytics tables.
+
+    Dashboards tend to load the same tables over and over again, each time
+    running an expensive aggregate over the live data. With this cache, the
+    rows of a query are kept for `ANALYTICS_RESULT_CACHE_TIMEOUT` seconds.
+
+    The rows are keyed by the rendered SQL and its parameters. As the
+    visibilities of the starting object are part of the query, users only
+    share cached rows if they have the same visibility scope. A version token
+    per table, which is replaced whenever the table or one of its fields is
+    saved, is part of the key as well.
+    """
+
+    VERSION_KEY_PREFIX = "caluma_analytics_result_version_"
+    KEY_PREFIX = "caluma_analytics_result_"
+    MAX_ROWS = 10000
+
+    def __init__(self):
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def is_enabled(self):
+        return settings.ANALYTICS_RESULT_CACHE_TIMEOUT > 0
+
+    def get_version(self, table_slug):
+        return get_version(f"{self.VERSION_KEY_PREFIX}{table_slug}")
+
+    def get_key(self, table_slug, sql_query, params):
+        data = json.dumps(
+            [self.get_version(table_slug), sql_query, params],
+            sort_keys=True,
+            default=str,
+        )
+        return f"{self.KEY_PREFIX}{sha256(data.encode('utf-8')).hexdigest()}"
+
+    def get_rows(self, table, sql_query, params, cached=True):
+        """Return the rows of the given query of the table.
+
+        If caching is disabled, or `cached` is False, the rows are streamed
+        from the database.
+        """
+        if not (cached and self.is_enabled()):
+            return sql.iter_rows(sql_query, params)
+
+        key = self.get_key(table.pk, sql_query, params)
+        rows = cache.get(key)
+        if rows is not None:
+            self.hit_count += 1
+            return rows
+
+        self.miss_count += 1
+        return self._iter_and_store(key, sql.iter_rows(sql_query, params))
+
+    def _iter_and_store(self, key, rows):
+        collected = []
+        for row in rows:
+            if collected is not None:
+                collected.append(row)
+                if len(collected) > self.MAX_ROWS:
+                    collected = None
+            yield row
+
+        if collected is not None:
+            cache.set(key, collected, timeout=settings.ANALYTICS_RESULT_CACHE_TIMEOUT)
+
+    def invalidate(self, table_slug):
+        """Drop the cached results of the given table."""
+        cache.set(f"{self.VERSION_KEY_PREFIX}{table_slug}", uuid4().hex, timeout=None)
+
+    def stats(self) -> dict:
+        """Return the hit / miss counts, see `check_analytics_result_cache`."""
+        return {"hit_count": self.hit_count, "miss_count": self.miss_count}
+
+
+result_cache = AnalyticsResultCache()
+
+
+class FieldCatalogCache:
+    """Cache of the fields available in analytics tables.
+
+    Listing the available fields walks the forms and questions of the
+    instance, which is slow for large instances, especially for the `*` form
+    path. With this cache, the field list of a starting object, prefix and
+    depth is kept for `ANALYTICS_FIELD_CATALOG_CACHE_TIMEOUT` seconds.
+
+    As the questions offered depend on the visibilities, the visible questions
+    are part of the key, as is the language of the labels. Any change of a
+    form, question or task replaces the version token and thus drops all
+    cached field lists.
+    """
+
+    VERSION_KEY = "caluma_analytics_field_catalog_version"
+    KEY_PREFIX = "caluma_analytics_field_catalog_"
+
+    def is_enabled(self):
+        return settings.ANALYTICS_FIELD_CATALOG_CACHE_TIMEOUT > 0
+
+    def get_visibility_scope(self, start):
+        """Return a hash of the questions visible to the current user."""
+        questions = start.visibility_source.questions(as_queryset=True)
+        question_slugs = questions.order_by("pk").values_list("pk", flat=True)
+        return sha256("\n".join(question_slugs).encode("utf-8")).hexdigest()
+
+    def get_key(self, start, prefix, depth, visibility_scope):
+        data = json.dumps(
+            [
+                get_version(self.VERSION_KEY),
+                start.identifier,
+                prefix,
+                depth,
+                translation.get_language(),
+                visibility_scope,
+            ]
+        )
+        return f"{self.KEY_PREFIX}{sha256(data.encode('utf-8')).hexdigest()}"
+
+    def get_fields(self, start, prefix, depth, build):
+        """Return the fields of the starting object below prefix.
+
+        `build` is called to list the fields if they are not cached.
+        """
+        if not self.is_enabled():
+            return build()
+
+        visibility_scope = self.get_visibility_scope(start)
+        key = self.get_key(start, prefix, depth, visibility_scope)
+        fields = cache.get(key)
+        if fields is None:
+            fields = build()
+            cache.set(
+                key, fields, timeout=settings.ANALYTICS_FIELD_CATALOG_CACHE_TIMEOUT
+            )
+        return fields
+
+    def invalidate(self):
+        """Drop all cached field lists."""
+        cache.set(self.VERSION_KEY, uuid4().hex, timeout=None)
+
+
+field_catalog_cache = FieldCatalogCache()
@@ -0,0 +1,45 @@
+"""
+Export of analytics tables in file formats understood by BI tools.
+
+The records are read from the database in chunks, bypassing the result cache,
+and written out as they arrive. This way, exporting a table takes the same
+memory regardless of its size.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class _Echo:
+    """Pseudo file object which returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(table):
+    """Yield the lines of the table as CSV, starting with the column names."""
+    columns = table.field_ordering
+    writer = csv.writer(_Echo())
+
+    yield writer.writerow(columns)
+    for record in table.iter_records(cached=False):
+        yield writer.writerow([record[alias] for alias in columns])
+
+
+def iter_ndjson(table):
+    """Yield the records of the table as newline-delimited JSON objects."""
+    columns = table.field_ordering
+
+    for record in table.iter_records(cached=False):
+        data = {alias: record[alias] for alias in columns}
+        yield json.dumps(data, cls=DjangoJSONEncoder) + "\n"
+
+
+# export format: (content type, line generator)
+FORMATS = {
+    "csv": ("text/csv", iter_csv),
+    "ndjson": ("application/x-ndjson", iter_ndjson),
+}
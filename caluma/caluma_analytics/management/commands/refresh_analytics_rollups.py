@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from caluma.caluma_analytics.models import AnalyticsTable
+from caluma.caluma_analytics.pivot_table import PivotTable
+
+
+class Command(BaseCommand):
+    """
+    Create or refresh the rollups of materialized pivot tables.
+
+    Run this on a schedule (e.g. every few minutes via cron). Materialized
+    tables show the data of the last refresh, and fall back to the live data
+    until their rollup is created.
+    """
+
+    help = "Create or refresh the rollups of materialized pivot tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "id", nargs="*", help="Only refresh the analytics tables with these ids"
+        )
+
+    def handle(self, *args, **options):
+        tables = AnalyticsTable.objects.filter(
+            materialized=True, disable_visibilities=True
+        )
+        if options["id"]:
+            tables = tables.filter(pk__in=options["id"])
+
+        for table in tables:
+            if table.is_extraction():
+                self.stdout.write(f"Skipping {table.slug}, it's not a pivot table")
+                continue
+
+            pivot_table = PivotTable(table)
+            if not pivot_table.can_materialize():
+                self.stdout.write(
+                    f"Skipping {table.slug}, its labels depend on the language"
+                )
+                continue
+
+            pivot_table.refresh_rollup()
+            self.stdout.write(f"Refreshed rollup of {table.slug}")
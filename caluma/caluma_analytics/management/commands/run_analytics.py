@@ -1,9 +1,12 @@
 import hashlib
 import json
+import textwrap
 from collections import defaultdict
+from itertools import chain
 
 from django.core.management.base import BaseCommand
 
+from caluma.caluma_analytics import export
 from caluma.caluma_analytics.models import AnalyticsTable
 from caluma.caluma_analytics.simple_table import SimpleTable
 
@@ -16,6 +19,14 @@ class Command(BaseCommand):
         parser.add_argument(
             "--json", action="store_true", help="Request output in JSON format"
         )
+        parser.add_argument(
+            "--csv", action="store_true", help="Request output in CSV format"
+        )
+        parser.add_argument(
+            "--ndjson",
+            action="store_true",
+            help="Request output as newline-delimited JSON",
+        )
         parser.add_argument(
             "--sql",
             action="store_true",
@@ -47,15 +58,23 @@ class Command(BaseCommand):
             self.show_sql(table)
 
         try:
-            records = table.get_records()
+            for export_format, (_, iter_export) in export.FORMATS.items():
+                if options[export_format]:
+                    self.show_export(iter_export(table))
+                    return
 
-            if not records:  # pragma: no cover
+            records = table.iter_records()
+
+            first_record = next(records, None)
+            if first_record is None:  # pragma: no cover
                 return
+            records = chain([first_record], records)
 
             if options["json"]:
                 self.show_json(records)
             else:
-                self.show_table(records)
+                # the column widths depend on all the records
+                self.show_table(list(records))
         except (BrokenPipeError, KeyboardInterrupt):  # pragma: no cover
             # if user presses Ctrl+C, or runs output into
             # a pipe and stops that, we don't bother telling
@@ -74,11 +93,19 @@ class Command(BaseCommand):
         self.stderr.flush()
 
     def show_json(self, records):
-        print(
-            json.dumps(
-                [{k: str(v) for k, v in rec.items()} for rec in records], indent=4
-            )
-        )
+        # write the records as they are read, so the whole table never has
+        # to be kept in memory
+        print("[")
+        for index, rec in enumerate(records):
+            if index:
+                print(",")
+            data = json.dumps({k: str(v) for k, v in rec.items()}, indent=4)
+            print(textwrap.indent(data, " " * 4), end="")
+        print("\n]")
+
+    def show_export(self, lines):
+        for line in lines:
+            print(line, end="")
 
     def show_table(self, records):
         """Output the analytics table as an ASCII table to the console."""
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caluma_analytics", "0008_uuid_v7"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analyticstable",
+            name="materialized",
+            field=models.BooleanField(
+                default=False,
+                help_text="Serve the pivot table from a materialized view, which is refreshed by the `refresh_analytics_rollups` command",
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicalanalyticstable",
+            name="materialized",
+            field=models.BooleanField(
+                default=False,
+                help_text="Serve the pivot table from a materialized view, which is refreshed by the `refresh_analytics_rollups` command",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caluma_analytics", "0009_analytics_table_materialized"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="analyticstable",
+            name="materialized",
+            field=models.BooleanField(
+                default=False,
+                help_text="Serve the pivot table from a materialized view, which is refreshed by the `refresh_analytics_rollups` command. The view is shared by all users, so this only works for tables with disabled visibilities and without labels in the language of the request",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicalanalyticstable",
+            name="materialized",
+            field=models.BooleanField(
+                default=False,
+                help_text="Serve the pivot table from a materialized view, which is refreshed by the `refresh_analytics_rollups` command. The view is shared by all users, so this only works for tables with disabled visibilities and without labels in the language of the request",
+            ),
+        ),
+    ]
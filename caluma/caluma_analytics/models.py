@@ -14,6 +14,15 @@ class AnalyticsTable(SlugModel):
     meta = models.JSONField(default=dict)
 
     disable_visibilities = models.BooleanField(default=False)
+    materialized = models.BooleanField(
+        default=False,
+        help_text=(
+            "Serve the pivot table from a materialized view, which is refreshed "
+            "by the `refresh_analytics_rollups` command. The view is shared by "
+            "all users, so this only works for tables with disabled "
+            "visibilities and without labels in the language of the request"
+        ),
+    )
     name = LocalizedField(blank=False, null=False, required=False)
     description = LocalizedField(blank=True, null=True, required=False)
 
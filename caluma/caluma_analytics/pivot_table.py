@@ -2,11 +2,11 @@ from __future__ import annotations  # self-referencing annotations
 
 from collections import defaultdict
 from functools import cached_property
+from hashlib import md5
 
 from django.db import connection
-from psycopg.rows import dict_row
 
-from . import simple_table, sql
+from . import cache, simple_table, sql
 
 FUNCTION_PARAMETER_CAST = {
     "sum": "::float",
@@ -14,6 +14,18 @@ FUNCTION_PARAMETER_CAST = {
 }
 
 
+def rollup_name(table_slug):
+    """Return the name of the materialized view holding a table's rollup."""
+    return f"analytics_rollup_{md5(table_slug.encode('utf-8')).hexdigest()}"
+
+
+def drop_rollup(table_slug):
+    """Drop the rollup of the given table, e.g. as its definition changed."""
+    name = sql.quote_identifier(rollup_name(table_slug))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {name}")
+
+
 class PivotTable(simple_table.SQLAliasMixin):
     class _AnonymousInfo:
         """
@@ -32,7 +44,7 @@ class PivotTable(simple_table.SQLAliasMixin):
         self.last_query = None
         self.last_query_params = None
         self.base_table = simple_table.SimpleTable(self.table, info=info)
-        self._summary = defaultdict(int)
+        self._summary = None
 
     @cached_property
     def _fields(self):
@@ -84,37 +96,138 @@ class PivotTable(simple_table.SQLAliasMixin):
 
         return sql_query, params
 
+    def get_rollup_sql_and_params(self):
+        return f"SELECT * FROM {sql.quote_identifier(rollup_name(self.table.pk))}", {}
+
+    def can_materialize(self):
+        """Return True if the records of the table can be kept in a rollup.
+
+        The rollup is shared by all users, so it's only possible for tables
+        without visibilities, and without labels in the language of the
+        request.
+        """
+        return self.table.disable_visibilities and not any(
+            isinstance(
+                field,
+                (simple_table.ChoiceLabelField, simple_table.LocalizedAttributeField),
+            )
+            and not field.language
+            for field in self.base_table._fields.values()
+        )
+
+    def use_rollup(self):
+        """Return True if the records can be read from the table's rollup.
+
+        Until the rollup is (re-)created by `refresh_rollup()`, the records
+        are aggregated from the live data.
+        """
+        return (
+            self.table.materialized and self.can_materialize() and self._rollup_exists()
+        )
+
+    def _rollup_exists(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_matviews WHERE matviewname = %s",
+                [rollup_name(self.table.pk)],
+            )
+            return cursor.fetchone() is not None
+
+    def refresh_rollup(self):
+        """Create the rollup of the table, or refresh it if it exists already.
+
+        The rollup is refreshed concurrently, so the table can still be read
+        in the meantime. This requires a unique index, which is put on the
+        grouped columns.
+        """
+        name = rollup_name(self.table.pk)
+        with connection.cursor() as cursor:
+            if self._rollup_exists():
+                cursor.execute(
+                    "REFRESH MATERIALIZED VIEW CONCURRENTLY "
+                    f"{sql.quote_identifier(name)}"
+                )
+            else:
+                sql_query, params = self.get_sql_and_params()
+                cursor.execute(
+                    f"CREATE MATERIALIZED VIEW {sql.quote_identifier(name)} "
+                    f"AS {sql_query}",
+                    params,
+                )
+                # without grouped columns, there's a single row, so any
+                # column is unique
+                columns = self._grouped_columns() or [
+                    self._sql_alias(self._fields[0].alias)
+                ]
+                cursor.execute(
+                    f"CREATE UNIQUE INDEX {sql.quote_identifier(f'{name}_key')} "
+                    f"ON {sql.quote_identifier(name)} "
+                    f"({', '.join(sql.quote_identifier(col) for col in columns)})"
+                )
+
+        cache.result_cache.invalidate(self.table.pk)
+
+    def _grouped_columns(self):
+        """Return the columns the records are grouped by, which are unique."""
+        return [
+            self._sql_alias(field.alias)
+            for field in self._fields
+            if field.function == field.FUNCTION_VALUE
+        ]
+
     @cached_property
     def field_ordering(self):
         return list(self.table.fields.all().values_list("alias", flat=True))
 
+    def iter_records(self, limit=None, offset=0, cached=True, ordered=False):
+        """Yield the records one by one, as they are read from the database.
+
+        `limit` and `offset` select a window of the records in the database.
+        The records are then ordered by the grouped columns, which can also
+        be requested with `ordered`, e.g. to read all records of a paginated
+        table. With `cached=False`, the result cache is bypassed.
+        The summary is collected along the way if all records are read.
+        """
+        summary = defaultdict(int)
+        sql_query, params = (
+            self.get_rollup_sql_and_params()
+            if self.use_rollup()
+            else self.get_sql_and_params()
+        )
+        ordered = ordered or limit is not None or bool(offset)
+        sql_query, params = sql.paginate(
+            sql_query,
+            params,
+            limit,
+            offset,
+            order_by=self._grouped_columns() if ordered else None,
+        )
+
+        for row in cache.result_cache.get_rows(
+            self.table, sql_query, params, cached=cached
+        ):
+            record = {}
+            for field in self._fields:
+                field2 = self.base_table._fields[field.alias]
+                if field.show_output:
+                    value = row[self._sql_alias(field.alias)]
+                    self._update_summary(summary, field, value)
+                    record[field.alias] = field2.parse_value(value)
+            yield record
+
+        if limit is None and not offset:
+            self._summary = summary
+
     def get_records(self):
-        self._summary = defaultdict(int)
-        sql_query, params = self.get_sql_and_params()
-
-        with connection.connection.cursor(row_factory=dict_row) as cursor:
-            cursor.execute(sql_query, params)
-            data = cursor.fetchall()
-
-            result = []
-            for row in data:
-                record = {}
-                for field in self._fields:
-                    field2 = self.base_table._fields[field.alias]
-                    if field.show_output:
-                        value = row[self._sql_alias(field.alias)]
-                        self._update_summary(field, value)
-                        record[field.alias] = field2.parse_value(value)
-                result.append(record)
-
-            return result
-
-    def _update_summary(self, field, value):
+        return list(self.iter_records())
+
+    def _update_summary(self, summary, field, value):
         # value must to eval to True in order to not break on `None` and also ignore `0`
         if value and field.function in [field.FUNCTION_SUM, field.FUNCTION_COUNT]:
-            self._summary[field.alias] += value
+            summary[field.alias] += value
 
     def get_summary(self):
-        if not self._summary:  # pragma: no cover
-            self.get_records()
+        if self._summary is None:
+            for _record in self.iter_records():
+                pass
         return self._summary
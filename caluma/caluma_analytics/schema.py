@@ -1,18 +1,21 @@
 import graphene
 from graphene import ConnectionField, String, relay
+from graphene.relay import PageInfo
 from graphene.types import ObjectType, generic
+from graphql_relay import get_offset_with_default
 
 from ..caluma_core.filters import (
     CollectionFilterSetFactory,
     DjangoFilterConnectionField,
 )
 from ..caluma_core.mutation import Mutation, UserDefinedPrimaryKeyMixin
+from ..caluma_core.pagination import connection_from_array_slice
 from ..caluma_core.types import (
     CountableConnectionBase,
     DjangoObjectType,
     enum_type_from_field,
 )
-from . import filters, models, serializers
+from . import cache, filters, models, serializers
 
 AggregateFunction = enum_type_from_field(
     "AggregateFunction",
@@ -75,16 +78,44 @@ class AnalyticsOutput(ObjectType):
 
     @staticmethod
     def resolve_records(table, info, *args, **kwargs):
-        rows = [
-            AnalyticsRow(
-                edges=[
-                    {"node": {"alias": alias, "value": row[alias]}}
-                    for alias in table.field_ordering
-                ]
+        def _rows(records):
+            return [
+                AnalyticsRow(
+                    edges=[
+                        {"node": {"alias": alias, "value": row[alias]}}
+                        for alias in table.field_ordering
+                    ]
+                )
+                for row in records
+            ]
+
+        # the pages are read in separate queries, so the records must always
+        # be in the same order for the cursors to stay valid
+        if kwargs.get("last") is not None or kwargs.get("before") is not None:
+            # paginating backwards needs to know the number of records
+            return _rows(table.iter_records(ordered=True))
+
+        # only read the requested page (and one more record to know whether
+        # there is a next page) from the database
+        offset = get_offset_with_default(kwargs.get("after"), -1) + 1
+        first = kwargs.get("first")
+        rows = _rows(
+            table.iter_records(
+                limit=None if first is None else first + 1,
+                offset=offset,
+                ordered=True,
             )
-            for row in table.get_records()
-        ]
-        return rows
+        )
+        return connection_from_array_slice(
+            rows,
+            kwargs,
+            slice_start=offset,
+            array_length=offset + len(rows),
+            array_slice_length=len(rows),
+            connection_type=AnalyticsTableContent,
+            edge_type=AnalyticsTableContent.Edge,
+            page_info_type=PageInfo,
+        )
 
     @staticmethod
     def resolve_summary(table, info, *args, **kwargs):
@@ -111,32 +142,74 @@ class AnalyticsTable(DjangoObjectType):
         AvailableFieldConnection,
         prefix=String(required=False),
         depth=graphene.Int(required=False),
+        search=String(required=False),
     )
     result_data = graphene.Field(AnalyticsOutput)
     starting_object = StartingObject(required=False)
 
     @staticmethod
-    def resolve_available_fields(obj, info, prefix=None, depth=None, **kwargs):
+    def resolve_available_fields(
+        obj, info, prefix=None, depth=None, search=None, **kwargs
+    ):
         start = obj.get_starting_object(info)
 
         depth = depth if depth and depth > 0 else 1
         prefix = prefix.split(".") if prefix else []
 
-        return sorted(
-            [
-                {
-                    "id": ".".join(field.source_path()),
-                    "label": field.label,
-                    "full_label": field.full_label(),
-                    "source_path": ".".join(field.source_path()),
-                    "is_leaf": field.is_leaf(),
-                    "is_value": field.is_value(),
-                    "supported_functions": field.supported_functions(),
-                }
-                for path, field in start.get_fields(prefix, depth).items()
-            ],
-            key=lambda field: field["id"],
+        def serialize(field):
+            return {
+                "id": ".".join(field.source_path()),
+                "label": field.label,
+                "full_label": field.full_label(),
+                "source_path": ".".join(field.source_path()),
+                "is_leaf": field.is_leaf(),
+                "is_value": field.is_value(),
+                "supported_functions": field.supported_functions(),
+            }
+
+        def sorted_fields():
+            return sorted(
+                start.get_fields(prefix, depth).values(),
+                key=lambda field: ".".join(field.source_path()),
+            )
+
+        if search or cache.field_catalog_cache.is_enabled():
+            fields = cache.field_catalog_cache.get_fields(
+                start,
+                prefix,
+                depth,
+                lambda: [serialize(field) for field in sorted_fields()],
+            )
+            if search:
+                search = search.lower()
+                fields = [
+                    field
+                    for field in fields
+                    if search in field["source_path"].lower()
+                    or search in field["full_label"].lower()
+                ]
+            return fields
+
+        # Without cache, only the requested page is serialized
+        fields = sorted_fields()
+        offset, limit = 0, len(fields)
+        if kwargs.get("last") is None and kwargs.get("before") is None:
+            offset = get_offset_with_default(kwargs.get("after"), -1) + 1
+            if kwargs.get("first") is not None:
+                limit = kwargs["first"]
+        page = [serialize(field) for field in fields[offset : offset + limit]]
+        connection = connection_from_array_slice(
+            page,
+            kwargs,
+            slice_start=offset,
+            array_length=len(fields),
+            array_slice_length=len(page),
+            connection_type=AvailableFieldConnection,
+            edge_type=AvailableFieldConnection.Edge,
+            page_info_type=PageInfo,
         )
+        connection.length = len(fields)
+        return connection
 
     @staticmethod
     def resolve_result_data(obj, info):
@@ -156,6 +229,7 @@ class AnalyticsTable(DjangoObjectType):
             "created_at",
             "modified_at",
             "disable_visibilities",
+            "materialized",
             "available_fields",
             "result_data",
             "fields",
@@ -18,6 +18,22 @@ class AggregateFunctionField(serializers.CalumaChoiceField):
 class SaveAnalyticsTableSerializer(serializers.ModelSerializer):
     starting_object = StartingObjectField(required=True)
 
+    def validate(self, data):
+        validated_data = super().validate(data)
+
+        disable_visibilities = validated_data.get(
+            "disable_visibilities",
+            self.instance.disable_visibilities if self.instance else False,
+        )
+        if validated_data.get("materialized") and not disable_visibilities:
+            # the rollup is shared by all users, so it can't be filtered by
+            # the visibilities of the requesting user
+            raise exceptions.ValidationError(
+                "Only tables with disabled visibilities can be materialized"
+            )
+
+        return validated_data
+
     class Meta:
         model = models.AnalyticsTable
         fields = [
@@ -28,6 +44,7 @@ class SaveAnalyticsTableSerializer(serializers.ModelSerializer):
             "created_at",
             "modified_at",
             "disable_visibilities",
+            "materialized",
             "meta",
             "created_by_user",
             "created_by_group",
@@ -0,0 +1,56 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from caluma.caluma_form import models as form_models
+from caluma.caluma_workflow import models as workflow_models
+from caluma.utils import disable_raw
+
+from . import models
+from .cache import field_catalog_cache, result_cache
+from .pivot_table import drop_rollup
+
+
+@receiver(pre_save, sender=models.AnalyticsTable)
+@disable_raw
+def set_table_was_materialized(sender, instance, **kwargs):
+    instance.was_materialized = models.AnalyticsTable.objects.filter(
+        pk=instance.pk, materialized=True
+    ).exists()
+
+
+@receiver(post_save, sender=models.AnalyticsTable)
+@receiver(post_delete, sender=models.AnalyticsTable)
+@disable_raw
+def invalidate_table_results(sender, instance, **kwargs):
+    result_cache.invalidate(instance.pk)
+    # only materialized tables have a rollup, the others don't need any DDL
+    if instance.materialized or getattr(instance, "was_materialized", False):
+        drop_rollup(instance.pk)
+
+
+@receiver(post_save, sender=models.AnalyticsField)
+@receiver(post_delete, sender=models.AnalyticsField)
+@disable_raw
+def invalidate_field_table_results(sender, instance, **kwargs):
+    result_cache.invalidate(instance.table_id)
+    if models.AnalyticsTable.objects.filter(
+        pk=instance.table_id, materialized=True
+    ).exists():
+        drop_rollup(instance.table_id)
+
+
+# The available fields are derived from the forms, questions and tasks. Raw
+# saves (loaddata) change those just the same, so they invalidate as well.
+
+
+@receiver(post_save, sender=form_models.Form)
+@receiver(post_delete, sender=form_models.Form)
+@receiver(post_save, sender=form_models.Question)
+@receiver(post_delete, sender=form_models.Question)
+@receiver(post_save, sender=form_models.FormQuestion)
+@receiver(post_delete, sender=form_models.FormQuestion)
+@receiver(m2m_changed, sender=form_models.FormQuestion)
+@receiver(post_save, sender=workflow_models.Task)
+@receiver(post_delete, sender=workflow_models.Task)
+def invalidate_field_catalog(sender, **kwargs):
+    field_catalog_cache.invalidate()
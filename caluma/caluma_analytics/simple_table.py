@@ -9,14 +9,12 @@ from hashlib import md5
 from typing import List, Optional
 
 from django.conf import settings
-from django.db import connection
 from django.utils import timezone, translation
-from psycopg.rows import dict_row
 
 from caluma.caluma_form import models as form_models
 from caluma.caluma_workflow import models as workflow_models
 
-from . import models, sql
+from . import cache, models, sql
 
 
 class BaseField:
@@ -1258,6 +1256,8 @@ class SQLAliasMixin:
 
 
 class SimpleTable(SQLAliasMixin):
+    PK_ALIAS = "analytics_pk"
+
     class _AnonymousInfo:
         """
         Pseudo GraphQL info object.
@@ -1313,10 +1313,10 @@ class SimpleTable(SQLAliasMixin):
             .values_list("alias", flat=True)
         )
 
-    def get_sql_and_params(self):
+    def get_sql_and_params(self, with_pk=False):
         """Return a list of records as specified in the given table config."""
 
-        base_query = self.get_query_object()
+        base_query = self.get_query_object(with_pk)
 
         sql_query, params, _ = sql.QueryRender(base_query).as_sql(alias=None)
 
@@ -1324,11 +1324,20 @@ class SimpleTable(SQLAliasMixin):
         self.last_query_params = params
         return sql_query, params
 
-    def get_query_object(self):
+    def get_query_object(self, with_pk=False):
+        """Return the query of the table.
+
+        With `with_pk`, the primary key of the starting object is selected as
+        well (as `PK_ALIAS`), so the records can be ordered by it.
+        """
         fields = self._fields
 
         step_queries = {}
         base_query = deepcopy(self.base_query)
+        if with_pk:
+            base_query.select.append(
+                (f"{sql.quote_identifier(base_query.self_alias())}.id", self.PK_ALIAS)
+            )
 
         for alias, field in fields.items():
             query = base_query
@@ -1348,21 +1357,33 @@ class SimpleTable(SQLAliasMixin):
 
         return base_query
 
-    def get_records(self):
-        sql_query, params = self.get_sql_and_params()
+    def iter_records(self, limit=None, offset=0, cached=True, ordered=False):
+        """Yield the records one by one, as they are read from the database.
 
-        with connection.connection.cursor(row_factory=dict_row) as cursor:
-            cursor.execute(sql_query, params)
-            data = cursor.fetchall()
+        `limit` and `offset` select a window of the records in the database.
+        The records are then ordered by the starting object, which can also
+        be requested with `ordered`, e.g. to read all records of a paginated
+        table. With `cached=False`, the result cache is bypassed.
+        """
+        ordered = ordered or limit is not None or bool(offset)
+        sql_query, params = sql.paginate(
+            *self.get_sql_and_params(with_pk=ordered),
+            limit,
+            offset,
+            order_by=[self.PK_ALIAS] if ordered else None,
+        )
 
-            return [
-                {
-                    field.alias: field.parse_value(row[self._sql_alias(field.alias)])
-                    for field in self._fields.values()
-                    if field.show_output
-                }
-                for row in data
-            ]
+        for row in cache.result_cache.get_rows(
+            self.table, sql_query, params, cached=cached
+        ):
+            yield {
+                field.alias: field.parse_value(row[self._sql_alias(field.alias)])
+                for field in self._fields.values()
+                if field.show_output
+            }
+
+    def get_records(self):
+        return list(self.iter_records())
 
     def get_summary(self):
         # simple tables can't do summary, but we must implement
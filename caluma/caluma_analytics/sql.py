@@ -22,6 +22,39 @@ def _make_name(value, name_hint=None):
     return f"{prefix}_{suffix[:length]}"
 
 
+def paginate(sql_query, params, limit=None, offset=0, order_by=None):
+    """Restrict a rendered query to the given window of rows.
+
+    The rows are sorted by the given (output) columns first, so the windows
+    are stable across queries.
+    """
+    params = params.copy()
+    if order_by:
+        columns = ", ".join(quote_identifier(column) for column in order_by)
+        sql_query = f"{sql_query}\nORDER BY {columns}"
+    if limit is not None:
+        sql_query = f"{sql_query}\nLIMIT %(analytics_limit)s"
+        params["analytics_limit"] = limit
+    if offset:
+        sql_query = f"{sql_query}\nOFFSET %(analytics_offset)s"
+        params["analytics_offset"] = offset
+    return sql_query, params
+
+
+def iter_rows(sql_query, params, fetch_size=2000):
+    """Execute the query and yield its rows as dicts.
+
+    The rows are read in batches from a server-side cursor, so the result set
+    never has to fit into memory as a whole.
+    """
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql_query, params)
+        columns = [column.name for column in cursor.description]
+        while rows := cursor.fetchmany(fetch_size):
+            for row in rows:
+                yield dict(zip(columns, row))
+
+
 def quote_identifier(name):
     name = name.replace("%", "%%")
     return psycopg.sql.Identifier(name).as_string(connection.connection)
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+
+import pytest
+from django.urls import reverse
+
+from ..cache import result_cache
+from ..simple_table import SimpleTable
+
+
+def _url(slug, export_format):
+    return reverse(
+        "analytics-export", kwargs={"slug": slug, "export_format": export_format}
+    )
+
+
+def test_export_csv(db, client, settings, example_analytics, analytics_cases):
+    # exports bypass the result cache
+    settings.ANALYTICS_RESULT_CACHE_TIMEOUT = 60
+    stats = result_cache.stats()
+
+    response = client.get(_url(example_analytics.pk, "csv"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+    assert (
+        response["Content-Disposition"]
+        == f'attachment; filename="{example_analytics.pk}.csv"'
+    )
+
+    content = b"".join(response.streaming_content).decode("utf-8")
+    header, *rows = csv.reader(io.StringIO(content))
+    assert result_cache.stats() == stats
+
+    table = SimpleTable(example_analytics)
+    records = table.get_records()
+    assert header == table.field_ordering
+    assert sorted(rows) == sorted(
+        [
+            ["" if record[alias] is None else str(record[alias]) for alias in header]
+            for record in records
+        ]
+    )
+
+
+def test_export_ndjson(db, client, example_pivot_table, analytics_cases):
+    response = client.get(_url(example_pivot_table.pk, "ndjson"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+
+    lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+
+    assert len(records) == 3
+    assert sorted(record["status"] for record in records) == [
+        "completed",
+        "running",
+        "suspended",
+    ]
+    assert (
+        list(records[0].keys())
+        == example_pivot_table.get_analytics(None).field_ordering
+    )
+
+
+@pytest.mark.parametrize(
+    "slug, export_format",
+    [("not-existing", "csv"), (None, "parquet")],
+)
+def test_export_not_found(db, client, analytics_table, slug, export_format):
+    response = client.get(_url(slug or analytics_table.pk, export_format))
+
+    assert response.status_code == 404
+
+
+def test_export_unauthorized(db, client, analytics_table):
+    response = client.get(_url(analytics_table.pk, "csv"), HTTP_AUTHORIZATION="Bearer")
+
+    assert response.status_code == 401
+    assert response.json() == {
+        "errors": [{"message": "Invalid Authorization header. No credentials provided"}]
+    }
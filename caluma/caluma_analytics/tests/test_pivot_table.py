@@ -1,5 +1,7 @@
 import pytest
+from django.core.management import call_command
 
+from caluma.caluma_analytics import models, signals
 from caluma.caluma_analytics.pivot_table import PivotTable
 
 
@@ -106,3 +108,166 @@ def test_run_analytics_gql(
             "quarter": "0",
             "sub_question_sumsumsum": "17448.0",
         }
+
+
+@pytest.mark.parametrize("analytics_table__starting_object", ["cases"])
+def test_records_pagination(db, schema_executor, example_pivot_table, analytics_cases):
+    query = """
+        query run ($input: String!, $after: String) {
+          analyticsTable(slug: $input) {
+              resultData {
+                records(first: 2, after: $after) {
+                  pageInfo {
+                    hasNextPage
+                    endCursor
+                  }
+                  edges {
+                    node {
+                      edges {
+                        node {
+                          alias
+                          value
+                        }
+                      }
+                    }
+                  }
+                }
+                summary {
+                  edges {
+                    node {
+                      alias
+                      value
+                    }
+                  }
+                }
+             }
+          }
+       }
+    """
+
+    summary = PivotTable(example_pivot_table).get_summary()
+
+    statuses = []
+    after = None
+    for has_next_page in [True, False]:
+        result = schema_executor(
+            query, variable_values={"input": example_pivot_table.pk, "after": after}
+        )
+        assert not result.errors
+
+        records = result.data["analyticsTable"]["resultData"]["records"]
+        assert records["pageInfo"]["hasNextPage"] == has_next_page
+        after = records["pageInfo"]["endCursor"]
+        statuses.extend(
+            row["status"] for row in _table_output_to_rows(records["edges"])
+        )
+
+        # the summary still covers all the records
+        summary_edges = result.data["analyticsTable"]["resultData"]["summary"]["edges"]
+        summary_dict = {
+            col["node"]["alias"]: col["node"]["value"] for col in summary_edges
+        }
+        assert summary_dict["sub_question_sumsumsum"] == str(
+            summary["sub_question_sumsumsum"]
+        )
+
+    # ordered by the grouped columns, so the pages are stable
+    assert statuses == ["completed", "running", "suspended"]
+
+    # paginating backwards reads all the records
+    table = PivotTable(example_pivot_table)
+    assert [record["status"] for record in table.iter_records(limit=1, offset=2)] == [
+        statuses[2]
+    ]
+    query = query.replace("first: 2, after: $after", "last: 1, after: $after")
+    result = schema_executor(query, variable_values={"input": example_pivot_table.pk})
+    assert not result.errors
+    records = result.data["analyticsTable"]["resultData"]["records"]["edges"]
+    assert _table_output_to_rows(records)[0]["status"] == statuses[2]
+
+
+@pytest.mark.parametrize("analytics_table__starting_object", ["cases"])
+def test_materialized_rollup(
+    db, example_pivot_table, analytics_cases, case_factory, capsys
+):
+    example_pivot_table.disable_visibilities = True
+    example_pivot_table.materialized = True
+    example_pivot_table.save()
+
+    def _statuses():
+        table = PivotTable(example_pivot_table)
+        return sorted(record["status"] for record in table.get_records())
+
+    live = PivotTable(example_pivot_table).get_records()
+    assert not PivotTable(example_pivot_table).use_rollup()
+
+    call_command("refresh_analytics_rollups")
+    assert "Refreshed rollup of" in capsys.readouterr().out
+    assert PivotTable(example_pivot_table).use_rollup()
+    assert sorted(
+        PivotTable(example_pivot_table).get_records(), key=lambda r: r["status"]
+    ) == sorted(live, key=lambda r: r["status"])
+
+    # new data only shows up after the next refresh
+    case_factory(status="canceled")
+    assert _statuses() == ["completed", "running", "suspended"]
+    call_command("refresh_analytics_rollups", example_pivot_table.pk)
+    assert _statuses() == ["canceled", "completed", "running", "suspended"]
+
+    # changing the table drops the rollup
+    example_pivot_table.fields.first().save()
+    assert not PivotTable(example_pivot_table).use_rollup()
+
+    # as does turning off the materialization
+    call_command("refresh_analytics_rollups")
+    example_pivot_table.materialized = False
+    example_pivot_table.save()
+    assert not PivotTable(example_pivot_table)._rollup_exists()
+
+
+@pytest.mark.parametrize("analytics_table__starting_object", ["cases"])
+def test_not_materialized_no_drop(db, example_pivot_table, mocker):
+    drop_rollup = mocker.spy(signals, "drop_rollup")
+
+    example_pivot_table.save()
+    example_pivot_table.fields.first().save()
+    example_pivot_table.fields.first().delete()
+    example_pivot_table.delete()
+
+    assert not drop_rollup.called
+
+
+@pytest.mark.parametrize(
+    "data_source, can_materialize",
+    [
+        ("document[top_form].caluma_form.name", False),
+        ("document[top_form].caluma_form.name.en", True),
+    ],
+)
+def test_materialized_rollup_language(
+    db, example_pivot_table, analytics_cases, capsys, data_source, can_materialize
+):
+    example_pivot_table.disable_visibilities = True
+    example_pivot_table.materialized = True
+    example_pivot_table.save()
+    example_pivot_table.fields.create(
+        data_source=data_source,
+        function=models.AnalyticsField.FUNCTION_VALUE,
+        alias="form_name",
+    )
+
+    assert PivotTable(example_pivot_table).can_materialize() == can_materialize
+
+    call_command("refresh_analytics_rollups")
+    out = capsys.readouterr().out
+    assert ("its labels depend on the language" in out) != can_materialize
+    assert PivotTable(example_pivot_table).use_rollup() == can_materialize
+
+
+def test_materialized_rollup_extraction(db, analytics_table, capsys):
+    analytics_table.disable_visibilities = True
+    analytics_table.materialized = True
+    analytics_table.save()
+
+    call_command("refresh_analytics_rollups")
+    assert "it's not a pivot table" in capsys.readouterr().out
@@ -8,7 +8,9 @@ from django.core.management import call_command
 @pytest.mark.parametrize(
     "enable_filter, expect_output", [(True, [0, 1]), (False, [0, 1, 2])]
 )
-@pytest.mark.parametrize("output_mode", [[], ["--sql"], ["--sqlonly"], ["--json"]])
+@pytest.mark.parametrize(
+    "output_mode", [[], ["--sql"], ["--sqlonly"], ["--json"], ["--csv"], ["--ndjson"]]
+)
 def test_cmdline_output(
     db,
     settings,
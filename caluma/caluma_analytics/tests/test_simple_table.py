@@ -2,7 +2,10 @@ import math
 import random
 
 import pytest
+from django.core.cache import cache
 
+from caluma.caluma_analytics import sql
+from caluma.caluma_analytics.cache import result_cache
 from caluma.caluma_analytics.models import AnalyticsField
 from caluma.caluma_analytics.pivot_table import PivotTable
 from caluma.caluma_analytics.simple_table import SimpleTable
@@ -312,3 +315,76 @@ def test_subcase(
     assert records == [
         {"sub-case-form-q": child_answer.value, "main-form-q": main_answer.value}
     ]
+
+
+@pytest.mark.parametrize("analytics_table__starting_object", ["cases"])
+def test_result_cache(
+    db, settings, example_analytics, analytics_cases, case_factory, mocker
+):
+    settings.ANALYTICS_RESULT_CACHE_TIMEOUT = 60
+    # version token evicted from the cache
+    cache.delete(f"{result_cache.VERSION_KEY_PREFIX}{example_analytics.pk}")
+    iter_rows = mocker.spy(sql, "iter_rows")
+    stats = result_cache.stats()
+
+    records = SimpleTable(example_analytics).get_records()
+    assert len(records) == 10
+
+    # the result is reused, even though the data has changed in the meantime
+    case_factory()
+    assert SimpleTable(example_analytics).get_records() == records
+    assert iter_rows.call_count == 1
+
+    # saving a field of the table invalidates its results
+    example_analytics.fields.first().save()
+    assert len(SimpleTable(example_analytics).get_records()) == 11
+    assert iter_rows.call_count == 2
+
+    assert result_cache.stats() == {
+        "hit_count": stats["hit_count"] + 1,
+        "miss_count": stats["miss_count"] + 2,
+    }
+
+    # disabled
+    settings.ANALYTICS_RESULT_CACHE_TIMEOUT = 0
+    assert len(SimpleTable(example_analytics).get_records()) == 11
+    assert iter_rows.call_count == 3
+
+
+@pytest.mark.parametrize("analytics_table__starting_object", ["cases"])
+def test_paginated_records_ordered(db, example_analytics, analytics_cases, mocker):
+    iter_rows = mocker.spy(sql, "iter_rows")
+
+    list(SimpleTable(example_analytics).iter_records())
+    assert "analytics_pk" not in iter_rows.call_args.args[0]
+
+    # the pages are read separately, and need to be in the same order
+    records = list(SimpleTable(example_analytics).iter_records(ordered=True))
+    pages = [
+        list(SimpleTable(example_analytics).iter_records(limit=3, offset=offset))
+        for offset in range(0, len(records), 3)
+    ]
+    assert [record for page in pages for record in page] == records
+    assert iter_rows.call_args.args[0].endswith(
+        'ORDER BY "analytics_pk"\nLIMIT %(analytics_limit)s\n'
+        "OFFSET %(analytics_offset)s"
+    )
+
+
+@pytest.mark.parametrize("analytics_table__starting_object", ["cases"])
+def test_result_cache_max_rows(
+    db, settings, example_analytics, analytics_cases, mocker
+):
+    settings.ANALYTICS_RESULT_CACHE_TIMEOUT = 60
+    mocker.patch.object(result_cache, "MAX_ROWS", 5)
+    iter_rows = mocker.spy(sql, "iter_rows")
+
+    # larger results are streamed without being cached
+    assert len(SimpleTable(example_analytics).get_records()) == 10
+    assert len(SimpleTable(example_analytics).get_records()) == 10
+    assert iter_rows.call_count == 2
+
+    # pages are small enough
+    records = list(SimpleTable(example_analytics).iter_records(limit=5))
+    assert list(SimpleTable(example_analytics).iter_records(limit=5)) == records
+    assert iter_rows.call_count == 3
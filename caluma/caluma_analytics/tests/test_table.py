@@ -1,10 +1,12 @@
 import pytest
 from graphql_relay import to_global_id
 
+from caluma.caluma_core.visibilities import BaseVisibility, filter_queryset_for
+from caluma.caluma_form.schema import Question
 from caluma.caluma_workflow.models import Case
 
 from .. import models
-from ..simple_table import CaseStartingObject
+from ..simple_table import BaseStartingObject, CaseStartingObject
 
 MUTATION_SAVE_FIELD = """
     mutation addfield($input: SaveAnalyticsFieldInput!) {
@@ -103,6 +105,36 @@ def test_create_table(db, snapshot, schema_executor):
     )
 
 
+@pytest.mark.parametrize(
+    "disable_visibilities,existing,success",
+    [(True, False, True), (False, False, False), (None, True, True)],
+)
+def test_create_materialized_table(
+    db, schema_executor, analytics_table, disable_visibilities, existing, success
+):
+    analytics_table.disable_visibilities = True
+    analytics_table.save()
+
+    table_input = {
+        "slug": analytics_table.slug if existing else "test-table",
+        "name": "Test table thingy",
+        "startingObject": "CASES",
+        "materialized": True,
+    }
+    if disable_visibilities is not None:
+        table_input["disableVisibilities"] = disable_visibilities
+
+    result = schema_executor(
+        MUTATION_SAVE_TABLE, variable_values={"table_input": table_input}
+    )
+
+    assert bool(result.errors) != success
+    if not success:
+        assert "Only tables with disabled visibilities can be materialized" in str(
+            result.errors[0]
+        )
+
+
 @pytest.mark.parametrize(
     "prefix,depth",
     [
@@ -129,6 +161,115 @@ def test_available_fields(
     snapshot.assert_match(result.data)
 
 
+def test_available_fields_cache(
+    db, settings, analytics_table, schema_executor, form, mocker
+):
+    settings.ANALYTICS_FIELD_CATALOG_CACHE_TIMEOUT = 60
+    get_fields = mocker.spy(BaseStartingObject, "get_fields")
+    variables = {"table": analytics_table.pk, "depth": 2}
+
+    result = schema_executor(QUERY_AVAILABLE_FIELDS, variable_values=variables)
+    assert not result.errors
+    cached = schema_executor(QUERY_AVAILABLE_FIELDS, variable_values=variables)
+    assert cached.data == result.data
+    assert get_fields.call_count == 1
+
+    # changing a form drops the cached field lists
+    form.save()
+    schema_executor(QUERY_AVAILABLE_FIELDS, variable_values=variables)
+    assert get_fields.call_count == 2
+
+
+def test_available_fields_cache_no_visible_questions(
+    db, settings, analytics_table, schema_executor, form, mocker
+):
+    class HideQuestions(BaseVisibility):
+        @filter_queryset_for(Question)
+        def filter_queryset_for_question(self, node, queryset, info):
+            return queryset.none()
+
+    mocker.patch("caluma.caluma_core.types.Node.visibility_classes", [HideQuestions])
+    settings.ANALYTICS_FIELD_CATALOG_CACHE_TIMEOUT = 60
+
+    result = schema_executor(
+        QUERY_AVAILABLE_FIELDS,
+        variable_values={"table": analytics_table.pk, "depth": 2},
+    )
+    assert not result.errors
+    assert result.data["analyticsTable"]["availableFields"]["edges"]
+
+
+@pytest.mark.parametrize("cache_timeout", [0, 60])
+def test_available_fields_pagination(
+    db, settings, analytics_table, schema_executor, cache_timeout
+):
+    settings.ANALYTICS_FIELD_CATALOG_CACHE_TIMEOUT = cache_timeout
+    query = """
+        query foo ($table: String!, $first: Int, $after: String) {
+          analyticsTable(slug: $table) {
+            availableFields(depth: 2, first: $first, after: $after) {
+              totalCount
+              pageInfo {
+                hasNextPage
+                endCursor
+              }
+              edges {
+                node {
+                  sourcePath
+                }
+              }
+            }
+          }
+        }
+    """
+
+    def _page(**variables):
+        result = schema_executor(
+            query, variable_values={"table": analytics_table.pk, **variables}
+        )
+        assert not result.errors
+        return result.data["analyticsTable"]["availableFields"]
+
+    everything = _page()
+    paths = [edge["node"]["sourcePath"] for edge in everything["edges"]]
+    assert everything["totalCount"] == len(paths) > 3
+    assert paths == sorted(paths)
+
+    first = _page(first=2)
+    second = _page(first=2, after=first["pageInfo"]["endCursor"])
+    assert first["totalCount"] == second["totalCount"] == len(paths)
+    assert first["pageInfo"]["hasNextPage"]
+    assert [
+        edge["node"]["sourcePath"] for edge in first["edges"] + second["edges"]
+    ] == paths[:4]
+
+
+def test_available_fields_search(db, analytics_table, schema_executor):
+    query = """
+        query foo ($table: String!, $search: String) {
+          analyticsTable(slug: $table) {
+            availableFields(depth: 2, search: $search, first: 1) {
+              totalCount
+              edges {
+                node {
+                  sourcePath
+                }
+              }
+            }
+          }
+        }
+    """
+    result = schema_executor(
+        query, variable_values={"table": analytics_table.pk, "search": "YEAR"}
+    )
+
+    assert not result.errors
+    fields = result.data["analyticsTable"]["availableFields"]
+    assert fields["totalCount"] > 1
+    assert len(fields["edges"]) == 1
+    assert all(edge["node"]["sourcePath"].endswith(".year") for edge in fields["edges"])
+
+
 @pytest.mark.parametrize(
     "field_path, expect_error",
     [
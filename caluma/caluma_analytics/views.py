@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views import View
+from graphene_django.views import HttpError
+
+from caluma.caluma_user.views import AuthenticationMixin
+
+from . import export, models, schema
+
+
+class AnalyticsExportView(AuthenticationMixin, View):
+    """Stream the records of an analytics table as a file.
+
+    Users are authenticated the same way as for the GraphQL API, and only see
+    the tables and records they could query through it.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = self.get_user(request)
+        except HttpError as e:
+            return JsonResponse(
+                {"errors": [{"message": e.message}]}, status=e.response.status_code
+            )
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, slug, export_format):
+        if export_format not in export.FORMATS:
+            raise Http404(f"Unknown export format '{export_format}'")
+        content_type, iter_export = export.FORMATS[export_format]
+
+        # pseudo GraphQL info object, so the visibilities apply
+        info = SimpleNamespace(context=request)
+        tables = schema.AnalyticsTable.get_queryset(
+            models.AnalyticsTable.objects.all(), info
+        )
+        table = get_object_or_404(tables, pk=slug)
+
+        response = StreamingHttpResponse(
+            iter_export(table.get_analytics(info)), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{table.pk}.{export_format}"'
+        )
+        return response
@@ -1,5 +1,5 @@
 import enum
-from functools import reduce, singledispatch
+from functools import partial, reduce, singledispatch
 
 import graphene
 from django import forms
@@ -25,14 +25,16 @@ from django_filters.rest_framework import (
 from graphene import Enum, InputObjectType, List
 from graphene.types import generic
 from graphene.types.utils import get_type
-from graphene.utils.str_converters import to_camel_case
+from graphene.utils.str_converters import to_camel_case, to_snake_case
 from graphene_django import filter
 from graphene_django.converter import convert_choice_name
 from graphene_django.filter.filterset import GrapheneFilterSetMixin
 from graphene_django.forms.converter import convert_form_field
 from graphene_django.registry import get_global_registry
+from graphql.language import FragmentSpreadNode, InlineFragmentNode
 from localized_fields.fields import LocalizedField
 
+from . import loaders
 from .forms import GlobalIDFormField, GlobalIDMultipleChoiceField
 from .ordering import CalumaOrdering
 from .relay import extract_global_id
@@ -72,7 +74,7 @@ class FilterCollectionFilter(Filter):
         if value in EMPTY_VALUES:
             return qs
 
-        filter_coll = self.filterset_class()
+        filter_coll = self.filterset_class(request=self.parent.request)
         for flt in value:
             if not flt:
                 continue
@@ -489,6 +491,38 @@ class MetaFilterSet(BaseFilterSet):
     meta_value = JSONValueFilter(field_name="meta")
 
 
+def get_selected_fields(info, path):
+    """Return the (snake cased) names of the fields selected below `path`.
+
+    `path` is a list of field names, starting at the field being resolved.
+    Fragments are merged regardless of their type condition.
+    """
+
+    def flatten(selection_set):
+        for selection in selection_set.selections if selection_set else []:
+            if isinstance(selection, FragmentSpreadNode):
+                yield from flatten(info.fragments[selection.name.value].selection_set)
+            elif isinstance(selection, InlineFragmentNode):
+                yield from flatten(selection.selection_set)
+            else:
+                yield selection
+
+    selection_sets = [field_node.selection_set for field_node in info.field_nodes]
+    for name in path:
+        selection_sets = [
+            selection.selection_set
+            for selection_set in selection_sets
+            for selection in flatten(selection_set)
+            if selection.name.value == name
+        ]
+
+    return {
+        to_snake_case(selection.name.value)
+        for selection_set in selection_sets
+        for selection in flatten(selection_set)
+    }
+
+
 class DjangoFilterConnectionField(
     filter.DjangoFilterConnectionField, DjangoConnectionField
 ):
@@ -513,7 +547,7 @@ class DjangoFilterConnectionField(
             resolver=resolver,
             connection=connection,
             default_manager=default_manager,
-            queryset_resolver=queryset_resolver,
+            queryset_resolver=partial(cls.resolve_related_queryset, queryset_resolver),
             max_limit=max_limit,
             enforce_first_or_last=enforce_first_or_last,
             root=root,
@@ -521,6 +555,50 @@ class DjangoFilterConnectionField(
             **cls._clean_args_for_queryset_resolver(args),
         )
 
+    @classmethod
+    def resolve_queryset(
+        cls, connection, iterable, info, args, filtering_args, filterset_class
+    ):
+        queryset = super().resolve_queryset(
+            connection, iterable, info, args, filtering_args, filterset_class
+        )
+
+        # Only load wide columns when their values are actually requested
+        deferrable_fields = getattr(connection._meta.node, "deferrable_fields", {})
+        if not deferrable_fields:
+            return queryset
+
+        selected = get_selected_fields(info, ["edges", "node"])
+        deferred = [
+            field
+            for field, required_by in deferrable_fields.items()
+            if selected.isdisjoint(required_by)
+        ]
+        return queryset.defer(*deferred) if deferred else queryset
+
+    @classmethod
+    def resolve_related_queryset(
+        cls, queryset_resolver, connection, iterable, info, args
+    ):
+        """Resolve a reverse relation for all siblings of the parent at once.
+
+        Filters may assume that the queryset only contains objects of a single
+        parent (e.g. `visibleInContext` of answers) and pagination would have to
+        load every related object, so only unfiltered and unpaginated relations
+        are batched.
+        """
+        field = loaders.get_reverse_foreign_key(iterable)
+        if field is None or any(value is not None for value in args.values()):
+            return queryset_resolver(connection, iterable, info, args)
+
+        return loaders.load_related_list(
+            info,
+            iterable.instance,
+            field,
+            lambda queryset: queryset_resolver(connection, queryset, info, args),
+            name=(info.parent_type.name, info.field_name),
+        )
+
     @classmethod
     def _clean_args_for_queryset_resolver(cls, args):
         # Graphene parses incoming data into Enums too early, thus our filters
@@ -4,6 +4,8 @@ from django.conf import settings
 from django.core import management
 from watchman.decorators import check
 
+from caluma.caluma_analytics.cache import result_cache
+from caluma.caluma_core.jexl import JEXL
 from caluma.caluma_form import storage_clients
 
 
@@ -49,3 +51,21 @@ def check_migrations():
     checked_databases = [_check_pending_migrations(db_name) for db_name in databases]
 
     return {"database migrations": checked_databases}
+
+
+def check_jexl_cache():
+    """Report size and hit / miss / eviction counts of the JEXL cache.
+
+    The statistics are per process, so they only cover the worker serving
+    the request.
+    """
+    return {"jexl cache": {"ok": True, **JEXL.expr_cache.stats()}}
+
+
+def check_analytics_result_cache():
+    """Report the hit / miss counts of the analytics result cache.
+
+    The statistics are per process, so they only cover the worker serving
+    the request.
+    """
+    return {"analytics result cache": {"ok": True, **result_cache.stats()}}
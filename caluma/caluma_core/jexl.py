@@ -1,13 +1,17 @@
 import json
 import math
 import numbers
+from collections import OrderedDict
 from functools import partial
-from itertools import chain, count
+from itertools import chain
 from logging import getLogger
 
 import pyjexl
+from django.conf import settings
 from pyjexl.analysis import JEXLAnalyzer, ValidatingAnalyzer
-from pyjexl.exceptions import ParseError
+from pyjexl.evaluator import Context
+from pyjexl.exceptions import MissingTransformError, ParseError
+from pyjexl.operators import default_binary_operators
 from pyjexl.parser import ArrayLiteral, Literal, ObjectLiteral
 from rest_framework import exceptions
 
@@ -15,43 +19,200 @@ log = getLogger(__name__)
 
 
 class Cache:
-    """Custom cache.
+    """Custom LRU cache.
 
     For JEXL expressions, we cannot use django's cache infrastructure, as the
     cached objects are pickled. This won't work for parsed JEXL expressions, as
     they contain lambdas etc.
+
+    Once `max_size` entries are stored, the least recently used one is evicted
+    for every new entry.
     """
 
-    def __init__(self, max_size=2000, evict_to=1500):
+    def __init__(self, max_size=2000):
         self.max_size = max_size
-        self.evict_to = evict_to
 
-        self._cache = {}
-        self._mru = {}
-        self._mru_count = count()
+        self._cache = OrderedDict()
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+
+    def __len__(self):
+        return len(self._cache)
 
     def get_or_set(self, key, default):
-        if key in self._cache:
-            self._mru[key] = next(self._mru_count)
-            return self._cache[key]
+        try:
+            ret = self._cache[key]
+            self._cache.move_to_end(key)
+        except KeyError:
+            pass
+        else:
+            self.hit_count += 1
+            return ret
 
         ret = self._cache[key] = default()
-        self._mru[key] = next(self._mru_count)
+        self.miss_count += 1
 
-        if len(self._mru) > self.max_size:
-            self._evict()
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self.eviction_count += 1
 
         return ret
 
-    def _evict(self):
-        to_purge = list(sorted(self._cache.keys(), key=lambda key: self._mru[key]))
-        # to_purge contains all keys, but we only want to evict the oldest
-        # ones
-        num_to_evict = len(to_purge) - self.evict_to
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        """Return the size and hit / miss / eviction counts of the cache."""
+        return {
+            "size": len(self._cache),
+            "max_size": self.max_size,
+            "hit_count": self.hit_count,
+            "miss_count": self.miss_count,
+            "eviction_count": self.eviction_count,
+        }
+
+
+class ParsedExpression:
+    """Cache entry of a JEXL expression: The AST and it's compiled form."""
+
+    __slots__ = ("ast", "compiled")
+
+    def __init__(self, ast):
+        self.ast = ast
+        self.compiled = None
+
+
+class Compiler:
+    """Compile a parsed JEXL expression into a Python closure.
 
-        for key in to_purge[:num_to_evict]:
-            del self._cache[key]
-            del self._mru[key]
+    This mirrors pyjexl's `Evaluator`, but walks the tree only once: The
+    resulting function is called with the context and the transforms, and
+    evaluates the expression without any further dispatching.
+
+    Operators are resolved at compile time. Transforms are bound to the JEXL
+    instance (and the compiled expressions are shared), so they're looked up
+    in the given transforms upon evaluation.
+    """
+
+    def compile(self, expression):
+        method = getattr(self, "visit_" + type(expression).__name__, self.generic_visit)
+        return method(expression)
+
+    def visit_BinaryExpression(self, exp):
+        left = self.compile(exp.left)
+        right = self.compile(exp.right)
+        operator = exp.operator
+
+        if operator is default_binary_operators["&&"]:
+            return lambda ctx, tr: left(ctx, tr) and right(ctx, tr)
+        if operator is default_binary_operators["||"]:
+            return lambda ctx, tr: left(ctx, tr) or right(ctx, tr)
+
+        func = operator.evaluate
+        if operator._evaluate_lazy:  # pragma: no cover
+            return lambda ctx, tr: func(lambda: left(ctx, tr), lambda: right(ctx, tr))
+        return lambda ctx, tr: func(left(ctx, tr), right(ctx, tr))
+
+    def visit_UnaryExpression(self, exp):
+        right = self.compile(exp.right)
+        operator = exp.operator
+
+        func = operator.evaluate
+        if operator._evaluate_lazy:  # pragma: no cover
+            return lambda ctx, tr: func(lambda: right(ctx, tr))
+        return lambda ctx, tr: func(right(ctx, tr))
+
+    def visit_Literal(self, literal):
+        value = literal.value
+        return lambda ctx, tr: value
+
+    def visit_Identifier(self, identifier):
+        name = identifier.value
+
+        if identifier.relative:
+            return lambda ctx, tr: ctx.relative_value.get(name, None)
+        if identifier.subject:
+            subject = self.compile(identifier.subject)
+            return lambda ctx, tr: subject(ctx, tr).get(name, None)
+        return lambda ctx, tr: ctx.get(name, None)
+
+    def visit_ObjectLiteral(self, object_literal):
+        items = [
+            (key, self.compile(value)) for key, value in object_literal.value.items()
+        ]
+        return lambda ctx, tr: {key: value(ctx, tr) for key, value in items}
+
+    def visit_ArrayLiteral(self, array_literal):
+        values = [self.compile(value) for value in array_literal.value]
+        return lambda ctx, tr: [value(ctx, tr) for value in values]
+
+    def visit_Transform(self, transform):
+        name = transform.name
+        subject = self.compile(transform.subject)
+        args = [self.compile(arg) for arg in transform.args]
+        literal_args = (
+            [arg.value for arg in transform.args]
+            if all(isinstance(arg, Literal) for arg in transform.args)
+            else None
+        )
+
+        def evaluate(ctx, tr):
+            try:
+                transform_func = tr[name]
+            except KeyError:
+                raise MissingTransformError(
+                    f'No transform found with the name "{name}"'
+                )
+
+            if literal_args is not None:
+                arg_values = literal_args
+            else:
+                # Like pyjexl, the arguments are evaluated without any context
+                arg_values = [arg(Context(), tr) for arg in args]
+            return transform_func(subject(ctx, tr), *arg_values)
+
+        return evaluate
+
+    def visit_FilterExpression(self, filter_expression):
+        subject = self.compile(filter_expression.subject)
+        expression = self.compile(filter_expression.expression)
+
+        if filter_expression.relative:
+            return lambda ctx, tr: [
+                value
+                for value in subject(ctx, tr)
+                # pyjexl replaces empty contexts, dropping the relative value
+                if expression(ctx.with_relative(value) or Context(), tr)
+            ]
+
+        def evaluate(ctx, tr):
+            values = subject(ctx, tr)
+            filter_value = expression(ctx, tr)
+            if filter_value is True:
+                return values
+            elif filter_value is False:
+                return None
+            try:
+                return values[filter_value]
+            except (IndexError, KeyError):
+                return None
+
+        return evaluate
+
+    def visit_ConditionalExpression(self, conditional):
+        test = self.compile(conditional.test)
+        consequent = self.compile(conditional.consequent)
+        alternate = self.compile(conditional.alternate)
+        return lambda ctx, tr: (
+            consequent(ctx, tr) if test(ctx, tr) else alternate(ctx, tr)
+        )
+
+    def generic_visit(self, expression):  # pragma: no cover
+        def evaluate(ctx, tr):
+            raise ValueError("Could not evaluate expression: " + repr(expression))
+
+        return evaluate
 
 
 class JexlValidator(object):
@@ -65,7 +226,11 @@ class JexlValidator(object):
 
 
 class JEXL(pyjexl.JEXL):
-    expr_cache = Cache()
+    expr_cache = Cache(settings.JEXL_CACHE_SIZE)
+
+    # Evaluate expressions through the `Compiler`. This should only be set to
+    # `False` for debugging, in which case pyjexl's interpreter is used
+    compile_expressions = True
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -128,11 +293,43 @@ class JEXL(pyjexl.JEXL):
         power = 10**ndigits
         return float(math.floor((num * power) + 0.5) / power)
 
-    def parse(self, expression):
-        parsed_expression = self.expr_cache.get_or_set(
-            expression, lambda: super(JEXL, self).parse(expression)
+    def _parsed_expression(self, expression) -> ParsedExpression:
+        return self.expr_cache.get_or_set(
+            expression,
+            lambda: ParsedExpression(super(JEXL, self).parse(expression)),
         )
-        return parsed_expression
+
+    def parse(self, expression):
+        return self._parsed_expression(expression).ast
+
+    def compile(self, expression):
+        """Return the given expression compiled into a Python closure.
+
+        The closure is called with a pyjexl `Context` and the transforms to
+        use. Compiled expressions are cached along with the parsed ones.
+        """
+        parsed = self._parsed_expression(expression)
+        if parsed.compiled is None:
+            parsed.compiled = Compiler().compile(parsed.ast)
+        return parsed.compiled
+
+    def prepare(self, expressions) -> int:
+        """Parse and compile the given expressions ahead of their evaluation.
+
+        The results are stored in the expression cache, which is shared by all
+        JEXL instances. Invalid expressions are skipped.
+
+        Return the number of prepared expressions.
+        """
+        prepared = 0
+        for expression in expressions:
+            try:
+                self.compile(expression)
+            except ParseError:
+                log.warning("Skipping invalid JEXL expression `%s`", expression)
+                continue
+            prepared += 1
+        return prepared
 
     def validate(self, expression, ValidatingAnalyzerClass=ValidatingAnalyzer):
         try:
@@ -175,7 +372,12 @@ class JEXL(pyjexl.JEXL):
     def evaluate(self, expression, context=None):
         self._expr_stack.append(expression)
         try:
-            return super().evaluate(expression, context)
+            if not self.compile_expressions:
+                return super().evaluate(expression, context)
+
+            compiled = self.compile(expression)
+            context = Context(context) if context is not None else self.context
+            return compiled(context or Context(), self.config.transforms)
         finally:
             self._expr_stack.pop()
 
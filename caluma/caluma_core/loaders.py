@@ -0,0 +1,184 @@
+"""
+Batch loading of related objects for GraphQL resolvers.
+
+graphql-core resolves the fields of a connection node by node, so following a
+relation of every node on a page results in one query per node. To avoid this,
+the nodes of a page are marked as "siblings" of each other and relations are
+resolved for all siblings at once the first time one of them is asked for it.
+
+Loaders are kept in a registry on `info.context` which lives as long as the
+GraphQL operation, so every relation costs a constant number of queries per
+operation regardless of the page size.
+
+Values which are expensive to compute but don't belong to a batch of nodes
+(e.g. the structure of a document family) can be kept in a request cache
+instead. It is shared by all operations of a request, including filters which
+don't have access to the operation.
+"""
+
+from itertools import chain
+
+SIBLINGS_ATTR = "_caluma_siblings"
+REGISTRY_ATTR = "_caluma_loaders"
+REQUEST_CACHE_ATTR = "_caluma_request_cache"
+
+
+def primary_key(obj):
+    return obj._meta.pk.to_python(obj.pk)
+
+
+def set_siblings(objects):
+    """Mark the given objects as loaded together.
+
+    Objects which already belong to a batch keep their siblings.
+    """
+    objects = list(objects)
+    for obj in objects:
+        if not hasattr(obj, SIBLINGS_ATTR):
+            setattr(obj, SIBLINGS_ATTR, objects)
+    return objects
+
+
+def get_siblings(obj):
+    return getattr(obj, SIBLINGS_ATTR, [obj])
+
+
+class Loader:
+    """Cache values which are loaded for a batch of sibling objects.
+
+    `batch_load` receives a dict of all objects to load, keyed by `key`, and
+    has to return a dict with the loaded value for every one of these keys.
+    """
+
+    def __init__(self, batch_load, key=primary_key):
+        self.batch_load = batch_load
+        self.key = key
+        self._cache = {}
+
+    def load(self, obj):
+        key = self.key(obj)
+        if key not in self._cache:
+            batch = {self.key(sibling): sibling for sibling in get_siblings(obj)}
+            batch = {k: v for k, v in batch.items() if k not in self._cache}
+            batch[key] = obj
+            self._cache.update(self.batch_load(batch))
+        return self._cache[key]
+
+
+class LoaderRegistry:
+    def __init__(self, operation):
+        self.operation = operation
+        self.loaders = {}
+
+
+def get_loader(info, name, batch_load, key=primary_key):
+    """Return the loader registered as `name` for the current operation."""
+    registry = getattr(info.context, REGISTRY_ATTR, None)
+    if registry is None or registry.operation is not info.operation:
+        registry = LoaderRegistry(info.operation)
+        setattr(info.context, REGISTRY_ATTR, registry)
+
+    if name not in registry.loaders:
+        registry.loaders[name] = Loader(batch_load, key)
+    return registry.loaders[name]
+
+
+def get_request_cache(request, name):
+    """Return the dict registered as `name` to cache values for the request."""
+    caches = getattr(request, REQUEST_CACHE_ATTR, None)
+    if caches is None:
+        caches = {}
+        setattr(request, REQUEST_CACHE_ATTR, caches)
+    return caches.setdefault(name, {})
+
+
+def clear_loaders(info):
+    """Drop all loaded objects, e.g. after they have been changed by a mutation."""
+    registry = getattr(info.context, REGISTRY_ATTR, None)
+    if registry is not None:
+        registry.loaders.clear()
+
+    caches = getattr(info.context, REQUEST_CACHE_ATTR, None)
+    if caches is not None:
+        caches.clear()
+
+
+def load_related_object(info, obj, field, node_type=None):
+    """Load the object behind a forward or a reverse one-to-one relation.
+
+    If `node_type` is given, the related objects are passed through its
+    `get_queryset()` and thus the visibility layer.
+    """
+    if field.concrete:
+        source_attr, target_attr = field.attname, field.target_field.attname
+        key_field = field.target_field
+    else:
+        source_attr, target_attr = field.field.target_field.attname, field.field.attname
+        key_field = field.field.target_field
+
+    def key(obj, attr=source_attr):
+        # instances may carry their (foreign) keys as strings when they were
+        # created from user input
+        return key_field.to_python(getattr(obj, attr))
+
+    if key(obj) is None:
+        return None
+
+    def batch_load(objects):
+        related = {}
+        if node_type is None:
+            related = {
+                key: field.get_cached_value(sibling)
+                for key, sibling in objects.items()
+                if field.is_cached(sibling)
+            }
+
+        missing = objects.keys() - related.keys()
+        if missing:
+            queryset = field.related_model._default_manager.filter(
+                **{f"{target_attr}__in": missing}
+            )
+            if node_type is not None:
+                queryset = node_type.get_queryset(queryset, info)
+            related.update({key(rel, target_attr): rel for rel in queryset})
+
+        set_siblings(rel for rel in related.values() if rel is not None)
+        return {key: related.get(key) for key in objects}
+
+    loader = get_loader(info, ("related_object", field, node_type), batch_load, key)
+    return loader.load(obj)
+
+
+def load_related_list(info, obj, field, get_queryset, name):
+    """Load the objects pointing to `obj` through the foreign key `field`.
+
+    `get_queryset` receives the queryset of the related objects of all siblings
+    and may filter and order it, `name` identifies the loader in the registry.
+    """
+    source_attr, target_attr = field.target_field.attname, field.attname
+
+    def key(obj, attr=source_attr):
+        return field.target_field.to_python(getattr(obj, attr))
+
+    def batch_load(objects):
+        groups = {key: [] for key in objects}
+        queryset = get_queryset(
+            field.model._default_manager.filter(**{f"{target_attr}__in": groups})
+        )
+        for rel in queryset:
+            groups[key(rel, target_attr)].append(rel)
+
+        set_siblings(chain.from_iterable(groups.values()))
+        return groups
+
+    loader = get_loader(info, ("related_list", field, name), batch_load, key)
+    return loader.load(obj)
+
+
+def get_reverse_foreign_key(iterable):
+    """Return the foreign key a reverse related manager is following, if any."""
+    if getattr(iterable, "instance", None) is None:
+        return None
+
+    # many-to-many managers don't have a `field`
+    return getattr(iterable, "field", None)
@@ -9,8 +9,8 @@ def _history_user_getter(historical_instance):
 
 
 def _history_user_setter(historical_instance, user):
+    # outside of requests, the user given to bulk_history_create() is kept
     request = getattr(HistoricalRecords.thread, "request", None)
-    user = None
     if request is not None:
         user = request.user.username
         if request.user.__class__.__name__ == "AnonymousUser":
@@ -16,6 +16,7 @@ from graphql.language import ast
 from localized_fields.fields import LocalizedField
 from rest_framework import exceptions
 
+from .loaders import clear_loaders
 from .relay import extract_global_id
 
 
@@ -254,6 +255,8 @@ class Mutation(ClientIDMutation):
 
     @classmethod
     def mutate_and_get_payload(cls, root, info, **input):
+        # objects loaded by previous mutations of the same operation may change
+        clear_loaders(info)
         cls.check_permissions(root, info)
         kwargs = cls.get_serializer_kwargs(root, info, **input)
         instance = kwargs.get("instance")
@@ -266,7 +269,11 @@ class Mutation(ClientIDMutation):
         # also see https://github.com/graphql-python/graphql-core/pull/204
         # potentially split each validation error into on GraphQL error
         serializer.is_valid(raise_exception=True)
-        return cls.perform_mutate(serializer, info)
+        payload = cls.perform_mutate(serializer, info)
+
+        # the payload must not be resolved from objects loaded before the change
+        clear_loaders(info)
+        return payload
 
     @classmethod
     def perform_mutate(cls, serializer, info):
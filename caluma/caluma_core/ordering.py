@@ -1,6 +1,7 @@
 from typing import Any, Tuple, Union
 
 from django import forms
+from django.db.models import JSONField
 from django.db.models.expressions import CombinedExpression, F, Value
 from django.db.models.query import QuerySet
 from django_filters.fields import ChoiceField
@@ -47,7 +48,9 @@ class MetaFieldOrdering(CalumaOrdering):
     ) -> Tuple[QuerySet, OrderingFieldType]:
         value = (hasattr(value, "value") and value.value) or value  # noqa: B009
 
-        return qs, CombinedExpression(F(self.field_name), "->", Value(value))
+        return qs, CombinedExpression(
+            F(self.field_name), "->", Value(value), output_field=JSONField()
+        )
 
 
 class AttributeOrderingMixin(CalumaOrdering):
@@ -1,3 +1,17 @@
+import hashlib
+import json
+from datetime import datetime, time
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.postgres.fields import HStoreField
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldError, ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
 from graphql_relay import (
     Connection,
     Edge,
@@ -5,6 +19,10 @@ from graphql_relay import (
     get_offset_with_default,
     offset_to_cursor,
 )
+from graphql_relay.utils import base64, unbase64
+from rest_framework import exceptions
+
+KEYSET_CURSOR_PREFIX = "keyset:"
 
 
 def connection_from_array(
@@ -100,3 +118,171 @@ def connection_from_array_slice(
             has_next_page=end_offset < array_length,
         ),
     )
+
+
+def count_queryset(queryset):
+    """Count the rows of a queryset as configured in `TOTAL_COUNT_STRATEGY`.
+
+    * `exact` counts all rows
+    * `estimate` uses the estimate of the query planner, unless it's below
+      `TOTAL_COUNT_ESTIMATE_THRESHOLD` where counting is cheap enough
+    * `cached` caches exact counts for `TOTAL_COUNT_CACHE_TIMEOUT` seconds
+      per query, thus per combination of filters and visibilities
+    """
+    queryset = queryset.order_by()
+    strategy = settings.TOTAL_COUNT_STRATEGY
+
+    if strategy == "exact":
+        return queryset.count()
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    if strategy == "estimate":
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):  # pragma: no cover
+            plan = json.loads(plan)
+
+        estimate = plan[0]["Plan"]["Plan Rows"]
+        if estimate >= settings.TOTAL_COUNT_ESTIMATE_THRESHOLD:
+            return estimate
+        return queryset.count()
+
+    if strategy == "cached":
+        query_hash = hashlib.sha256(f"{sql}{params}".encode()).hexdigest()
+        return cache.get_or_set(
+            f"total_count_{query_hash}",
+            queryset.count,
+            settings.TOTAL_COUNT_CACHE_TIMEOUT,
+        )
+
+    raise ImproperlyConfigured(
+        f"Unknown TOTAL_COUNT_STRATEGY '{strategy}', "
+        "use one of 'exact', 'estimate' or 'cached'."
+    )
+
+
+class KeysetEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # keep microseconds, which are dropped by DjangoJSONEncoder
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def is_keyset_cursor(cursor):
+    return cursor is not None and unbase64(cursor).startswith(KEYSET_CURSOR_PREFIX)
+
+
+class Keyset:
+    """Seek through an ordered queryset by the values of its ordering.
+
+    The ordering expressions of the queryset, followed by the primary key as
+    tie breaker, are annotated on the queryset. A cursor encodes the values of
+    these annotations for one row, so the rows after it can be selected with a
+    `WHERE` clause instead of an `OFFSET`, which needs to skip all the rows in
+    between.
+    """
+
+    def __init__(self, queryset):
+        annotations = {}
+        # list of (alias, descending, nulls_first)
+        self.ordering = []
+        for i, order_by in enumerate(self._get_order_by(queryset)):
+            alias = f"_keyset_{i}"
+            annotations[alias] = order_by.expression
+            # NULLs are sorted as larger than any value by default
+            nulls_first = order_by.nulls_first or (
+                order_by.descending and not order_by.nulls_last
+            )
+            self.ordering.append((alias, order_by.descending, bool(nulls_first)))
+        self.ordering.append(("pk", False, False))
+
+        self.queryset = queryset.annotate(**annotations)
+
+    @classmethod
+    def for_queryset(cls, queryset):
+        """Return the keyset of the queryset, or None if it's not supported."""
+        try:
+            keyset = cls(queryset)
+            output_fields = [
+                keyset.queryset.query.annotations[alias].output_field
+                for alias, _, _ in keyset.ordering[:-1]
+            ]
+        except FieldError:
+            # e.g. random ordering or expressions without known output type
+            return None
+
+        if any(isinstance(field, HStoreField) for field in output_fields):
+            # hstore values (e.g. localized fields) can't be compared
+            return None
+        return keyset
+
+    @staticmethod
+    def _get_order_by(queryset):
+        query = queryset.query
+        ordering = query.order_by or (
+            query.default_ordering and queryset.model._meta.ordering
+        )
+        for order_by in ordering or []:
+            if isinstance(order_by, str):
+                order_by = OrderBy(
+                    F(order_by.lstrip("-")), descending=order_by.startswith("-")
+                )
+            elif not isinstance(order_by, OrderBy):
+                order_by = order_by.asc()
+            yield order_by
+
+    def order(self, queryset, backwards=False):
+        return queryset.order_by(
+            *(
+                OrderBy(
+                    F(alias),
+                    descending=descending != backwards,
+                    nulls_first=(nulls_first != backwards) or None,
+                    nulls_last=(nulls_first == backwards) or None,
+                )
+                for alias, descending, nulls_first in self.ordering
+            )
+        )
+
+    def cursor(self, obj):
+        values = [getattr(obj, alias) for alias, _, _ in self.ordering]
+        return base64(KEYSET_CURSOR_PREFIX + json.dumps(values, cls=KeysetEncoder))
+
+    def seek(self, cursor, backwards=False):
+        """Return a filter for all rows after (or before) the given cursor."""
+        try:
+            values = json.loads(unbase64(cursor)[len(KEYSET_CURSOR_PREFIX) :])
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise exceptions.ValidationError(f"Invalid cursor '{cursor}'")
+
+        conditions = []
+        equal = Q()
+        for (alias, descending, nulls_first), value in zip(self.ordering, values):
+            beyond = self._beyond(
+                alias, value, descending != backwards, nulls_first != backwards
+            )
+            if beyond is not None:
+                conditions.append(equal & beyond)
+            equal &= Q(
+                **{f"{alias}__isnull": True} if value is None else {alias: value}
+            )
+
+        return reduce(or_, conditions)
+
+    @staticmethod
+    def _beyond(alias, value, descending, nulls_first):
+        if value is None:
+            return Q(**{f"{alias}__isnull": False}) if nulls_first else None
+
+        beyond = Q(**{f"{alias}__{'lt' if descending else 'gt'}": value})
+        if not nulls_first:
+            beyond |= Q(**{f"{alias}__isnull": True})
+        return beyond
@@ -30,3 +30,22 @@ def extract_serializer_input_fields(serializer_class, instance):
 def extract_global_id_input_fields(instance):
     global_id = to_global_id(type(instance).__name__, instance.pk)
     return {"id": global_id, "clientMutationId": "testid"}
+
+
+def evaluate_compiled_and_interpreted(jexl, *args, **kwargs):
+    """Evaluate a JEXL expression both compiled and interpreted.
+
+    Return both results for comparison. Exceptions are returned as a tuple
+    of their type and message.
+    """
+
+    def evaluate(compile_expressions):
+        jexl.compile_expressions = compile_expressions
+        try:
+            return jexl.evaluate(*args, **kwargs)
+        except Exception as exc:
+            return type(exc), str(exc)
+        finally:
+            del jexl.compile_expressions
+
+    return evaluate(True), evaluate(False)
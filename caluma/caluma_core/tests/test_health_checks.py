@@ -3,6 +3,9 @@ from django.core import management
 from django.urls import reverse
 from watchman import settings as watchman_settings
 
+from caluma.caluma_analytics.cache import result_cache
+from caluma.caluma_core.jexl import JEXL, Cache
+
 
 def test_db_connection_working(
     disable_logs, track_errors, capsys, client, snapshot, minio_mock_working, db
@@ -176,3 +179,35 @@ def test_healthz_disabled(capsys, client, settings):
     # assert exception type
     *_, err = capsys.readouterr()
     assert not err
+
+
+def test_jexl_cache_check(track_errors, mocker):
+    # imported here, as the checks need to be decorated by `track_errors`
+    from caluma.caluma_core.health_checks import check_jexl_cache
+
+    mocker.patch.object(JEXL, "expr_cache", Cache(10))
+
+    JEXL().evaluate("1 + 1")
+    JEXL().evaluate("1 + 1")
+
+    assert check_jexl_cache() == {
+        "jexl cache": {
+            "ok": True,
+            "size": 1,
+            "max_size": 10,
+            "hit_count": 1,
+            "miss_count": 1,
+            "eviction_count": 0,
+        }
+    }
+
+
+def test_analytics_result_cache_check(track_errors, mocker):
+    # imported here, as the checks need to be decorated by `track_errors`
+    from caluma.caluma_core.health_checks import check_analytics_result_cache
+
+    mocker.patch.multiple(result_cache, hit_count=3, miss_count=2)
+
+    assert check_analytics_result_cache() == {
+        "analytics result cache": {"ok": True, "hit_count": 3, "miss_count": 2}
+    }
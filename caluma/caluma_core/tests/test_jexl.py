@@ -4,6 +4,7 @@ import pyjexl
 import pytest
 
 from ..jexl import JEXL, Cache, CalumaAnalyzer, ExtractTransformSubjectAnalyzer
+from . import evaluate_compiled_and_interpreted
 
 
 @pytest.mark.parametrize(
@@ -75,31 +76,33 @@ def test_debug_transform(expression, expected_log, expected_output, caplog):
 
 
 def test_jexl_cache():
-    cache = Cache(20, 10)
+    cache = Cache(20)
 
     # fill the cache "to the brim"
-    for x in range(19):
+    for x in range(20):
         cache.get_or_set(x, lambda: "test")
-    assert len(cache._mru) == 19
-    assert len(cache._cache) == 19
+    assert len(cache) == 20
 
-    # insert last element before eviction
-    cache.get_or_set("x", lambda: "x")
-    assert len(cache._mru) == 20
-    assert len(cache._cache) == 20
+    # use the oldest entry, so it's not evicted
+    assert cache.get_or_set(0, lambda: "other") == "test"
 
-    # one more - this should trigger eviction
+    # one more - this should evict the least recently used entry
     cache.get_or_set("y", lambda: "y")
-    assert len(cache._mru) == 10
-    assert len(cache._cache) == 10
+    assert len(cache) == 20
+    assert 0 in cache._cache
+    assert 1 not in cache._cache
+    assert list(cache._cache)[-2:] == [0, "y"]
 
-    # now make sure the right entries were evicted
-    for x in range(10):
-        assert x not in cache._cache
-        assert x not in cache._mru
+    assert cache.stats() == {
+        "size": 20,
+        "max_size": 20,
+        "hit_count": 1,
+        "miss_count": 21,
+        "eviction_count": 1,
+    }
 
-    # validate invariants
-    assert cache._cache.keys() == cache._mru.keys()
+    cache.clear()
+    assert len(cache) == 0
 
 
 @pytest.mark.parametrize(
@@ -223,3 +226,70 @@ def test_caluma_analyzer(expression, expected):
 
     jexl = JEXL()
     assert list(jexl.analyze(expression, NodeAnalyzer)) == expected
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        # literals and operators
+        "1 + 2 * 3 - 4 / 2",
+        "(1 + 2) * 3 // 2 % 4 ^ 2",
+        "'foo' + 'bar' == 'foobar'",
+        "1 != 2 && 2 >= 2 && 1 < 2 && 3 <= 2",
+        "!true || !(1 > 2)",
+        "false && 'foo'|missing",
+        "true || 'foo'|missing",
+        "'a' in ['a', 'b'] && 'ab' in 'cabd'",
+        "[1, 2] intersects [2, 3]",
+        "1 + 'a'",
+        "1 / 0",
+        "{a: 1, b: [num, {c: str}]}",
+        "num > 1 ? 'big' : 'small'",
+        "missing ? 'yes' : 'no'",
+        # identifiers
+        "num",
+        "foo.baz.x",
+        "foo.baz.missing",
+        "foo['baz']['x']",
+        "missing",
+        "missing.attr",
+        # filters
+        "foo.bar[1]",
+        "foo.bar[10]",
+        "foo.bar[true]",
+        "foo.bar[false]",
+        "items[.a > 1]",
+        "items[.a > 1][0].b",
+        "items[.b == str]",
+        "[{a: 1}, {a: 2}][.a == 1]",
+        # transforms
+        "items|mapby('a')|sum",
+        "items|mapby('a', 'b')",
+        "items|mapby(str)",
+        "foo.bar|max|round(num)",
+        "[items|length, str|length]|avg",
+        "'foo'|missing",
+        "'foo'|missing(1)",
+    ],
+)
+@pytest.mark.parametrize("context", [None, {}])
+def test_compiled_expressions(expression, context):
+    jexl = JEXL(
+        context={
+            "foo": {"bar": [1, 2, 3], "baz": {"x": 1}},
+            "items": [{"a": 1, "b": "x"}, {"a": 2, "b": "abc"}],
+            "num": 5,
+            "str": "abc",
+        }
+    )
+
+    compiled, interpreted = evaluate_compiled_and_interpreted(jexl, expression, context)
+    assert compiled == interpreted
+
+
+def test_compiled_expression_cache():
+    jexl = JEXL()
+    compiled = jexl.compile("1 + 1")
+
+    assert jexl.compile("1 + 1") is compiled
+    assert compiled(pyjexl.evaluator.Context(), jexl.config.transforms) == 2
@@ -1,6 +1,14 @@
 import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.test.utils import CaptureQueriesContext
 from graphql_relay import offset_to_cursor
 
+from ...caluma_form.models import Document
+from ..pagination import Keyset, count_queryset, is_keyset_cursor
+
 
 @pytest.mark.parametrize(
     "first,last,before,after,has_next,has_previous",
@@ -138,3 +146,265 @@ def test_pagination_cursor(db, schema_executor, question_factory):
 
     result2 = schema_executor(query, variable_values={"after": cursor})
     assert len(result2.data["allQuestions"]["edges"]) == 17
+
+
+@pytest.mark.parametrize("total_count", [False, True])
+def test_pagination_total_count(db, schema_executor, document_factory, total_count):
+    document_factory.create_batch(4)
+
+    query = """
+        query {
+          allDocuments(first: 3) {
+            %s
+            pageInfo {
+              hasNextPage
+            }
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """ % ("totalCount" if total_count else "")
+
+    with CaptureQueriesContext(connection) as context:
+        result = schema_executor(query)
+
+    assert not result.errors
+    assert result.data["allDocuments"]["pageInfo"]["hasNextPage"]
+    assert len(result.data["allDocuments"]["edges"]) == 3
+    assert result.data["allDocuments"].get("totalCount", 4) == 4
+    # the total is only counted when requested
+    assert total_count == any(
+        "COUNT(" in query["sql"] for query in context.captured_queries
+    )
+
+
+@pytest.mark.parametrize(
+    "strategy,threshold,expected",
+    [("exact", 0, 3), ("estimate", 1000, 3), ("cached", 0, 3)],
+)
+def test_count_queryset(
+    db,
+    settings,
+    django_assert_num_queries,
+    document_factory,
+    strategy,
+    threshold,
+    expected,
+):
+    settings.TOTAL_COUNT_STRATEGY = strategy
+    settings.TOTAL_COUNT_ESTIMATE_THRESHOLD = threshold
+    document_factory.create_batch(3)
+
+    assert count_queryset(Document.objects.all()) == expected
+    assert count_queryset(Document.objects.none()) == 0
+
+    if strategy == "cached":
+        # counts are cached per query
+        document_factory()
+        with django_assert_num_queries(0):
+            assert count_queryset(Document.objects.all()) == expected
+        assert count_queryset(Document.objects.filter(form__isnull=False)) == 4
+
+
+def test_count_queryset_estimate(db, settings, mocker, document_factory):
+    settings.TOTAL_COUNT_STRATEGY = "estimate"
+    settings.TOTAL_COUNT_ESTIMATE_THRESHOLD = 0
+    document_factory.create_batch(3)
+
+    # the estimate of the query planner is used as it is
+    count = mocker.spy(type(Document.objects.all()), "count")
+    assert count_queryset(Document.objects.all()) >= 0
+    count.assert_not_called()
+
+
+def test_count_queryset_unknown_strategy(db, settings):
+    settings.TOTAL_COUNT_STRATEGY = "guess"
+
+    with pytest.raises(ImproperlyConfigured):
+        count_queryset(Document.objects.all())
+
+
+@pytest.mark.parametrize(
+    "order",
+    [
+        None,
+        [{"meta": "rank"}],
+        [{"meta": "rank", "direction": "DESC"}, {"attribute": "CREATED_AT"}],
+    ],
+)
+@pytest.mark.parametrize("backwards", [False, True])
+def test_keyset_pagination(
+    db, settings, schema_executor, document_factory, order, backwards
+):
+    settings.KEYSET_PAGINATION = True
+    for rank in [3, None, 1, 3, None, 2, 1]:
+        document_factory(meta={"rank": rank} if rank else {})
+
+    query = """
+        query (
+          $order: [DocumentOrderSetType]
+          $first: Int
+          $after: String
+          $last: Int
+          $before: String
+        ) {
+          allDocuments(
+            order: $order
+            first: $first
+            after: $after
+            last: $last
+            before: $before
+          ) {
+            pageInfo {
+              startCursor
+              endCursor
+              hasNextPage
+              hasPreviousPage
+            }
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+
+    result = schema_executor(query, variable_values={"order": order})
+    assert not result.errors
+    expected = [edge["node"]["id"] for edge in result.data["allDocuments"]["edges"]]
+
+    ids = []
+    variables = {"order": order, "last" if backwards else "first": 3}
+    with CaptureQueriesContext(connection) as context:
+        while True:
+            result = schema_executor(query, variable_values=variables)
+            assert not result.errors
+
+            page = result.data["allDocuments"]
+            page_ids = [edge["node"]["id"] for edge in page["edges"]]
+            if backwards:
+                ids = page_ids + ids
+                variables["before"] = page["pageInfo"]["startCursor"]
+                has_more = page["pageInfo"]["hasPreviousPage"]
+            else:
+                ids += page_ids
+                variables["after"] = page["pageInfo"]["endCursor"]
+                has_more = page["pageInfo"]["hasNextPage"]
+            assert is_keyset_cursor(variables["after" if not backwards else "before"])
+            if not has_more:
+                break
+
+    assert ids == expected
+    # the total isn't counted unless requested
+    assert not any("COUNT(" in query["sql"] for query in context.captured_queries)
+
+
+def test_keyset_pagination_total_count(db, settings, schema_executor, document_factory):
+    settings.KEYSET_PAGINATION = True
+    document_factory.create_batch(4)
+
+    query = """
+        query {
+          allDocuments(first: 3, last: 2) {
+            totalCount
+            pageInfo {
+              hasPreviousPage
+              hasNextPage
+            }
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+
+    result = schema_executor(query)
+    assert not result.errors
+    assert result.data["allDocuments"]["totalCount"] == 4
+    assert result.data["allDocuments"]["pageInfo"] == {
+        "hasPreviousPage": True,
+        "hasNextPage": True,
+    }
+    assert len(result.data["allDocuments"]["edges"]) == 2
+
+
+@pytest.mark.parametrize(
+    "order,after,expected_keyset",
+    [
+        ([{"attribute": "SLUG"}], None, True),
+        ([{"attribute": "SLUG"}], offset_to_cursor(0), False),
+        ([{"attribute": "NAME"}], None, False),
+    ],
+)
+def test_keyset_pagination_fallback(
+    db, settings, schema_executor, form_factory, order, after, expected_keyset
+):
+    settings.KEYSET_PAGINATION = True
+    form_factory.create_batch(3)
+
+    # localized fields can't be used as keys and legacy cursors keep working
+    query = """
+        query ($order: [FormOrderSetType], $after: String) {
+          allForms(first: 1, after: $after, order: $order) {
+            edges {
+              cursor
+            }
+          }
+        }
+    """
+
+    result = schema_executor(query, variable_values={"order": order, "after": after})
+    assert not result.errors
+    cursor = result.data["allForms"]["edges"][0]["cursor"]
+    assert is_keyset_cursor(cursor) == expected_keyset
+
+
+@pytest.mark.parametrize("after", ["a2V5c2V0OltdCg==", "a2V5c2V0Om5vdCBqc29u"])
+def test_keyset_pagination_invalid_cursor(db, settings, schema_executor, after):
+    settings.KEYSET_PAGINATION = True
+
+    query = """
+        query ($after: String) {
+          allDocuments(first: 1, after: $after) {
+            edges {
+              cursor
+            }
+          }
+        }
+    """
+
+    result = schema_executor(query, variable_values={"after": after})
+    assert (
+        result.errors[0].message
+        == f"[ErrorDetail(string=\"Invalid cursor '{after}'\", code='invalid')]"
+    )
+
+
+@pytest.mark.parametrize(
+    "ordering,supported",
+    [
+        ([], True),
+        (["-created_at"], True),
+        ([Lower("form__slug"), "-modified_at"], True),
+        ([F("form__name").desc()], False),
+        (["?"], False),
+    ],
+)
+def test_keyset_for_queryset(db, document_factory, ordering, supported):
+    document_factory.create_batch(4)
+
+    queryset = Document.objects.order_by(*ordering)
+    keyset = Keyset.for_queryset(queryset)
+    assert bool(keyset) == supported
+
+    if keyset:
+        documents = list(keyset.order(keyset.queryset))
+        assert documents == list(queryset.order_by(*ordering, "pk"))
+        seek = keyset.seek(keyset.cursor(documents[1]))
+        assert list(keyset.order(keyset.queryset.filter(seek))) == documents[2:]
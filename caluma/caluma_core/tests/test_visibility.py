@@ -2,7 +2,7 @@ import pytest
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models import CharField, QuerySet
 
-from caluma.caluma_form.schema import Question
+from caluma.caluma_workflow.schema import Case
 
 from .. import models
 from ..types import DjangoObjectType, Node
@@ -256,24 +256,14 @@ def test_custom_visibility_chained_decorators(db, history_mock):
     assert queryset.count() == 1
 
 
-@pytest.mark.xfail(
-    reason="Didn't find a way to actually test the visibility aware resolver"
-)
 @pytest.mark.parametrize("suppress, expect_calls", [(True, False), (False, True)])
 def test_suppress_visibility(
-    db,
-    history_mock,
-    mocker,
-    suppress,
-    expect_calls,
-    answer_factory,
-    question_factory,
-    schema_executor,
-):  # pragma: no cover
+    db, history_mock, mocker, suppress, expect_calls, work_item, schema_executor
+):
     class CustomVisibility(BaseVisibility):
         was_called = False
 
-        @filter_queryset_for(Question)
+        @filter_queryset_for(Case)
         def filter_queryset_for_custom_node(self, node, queryset, info):
             CustomVisibility.was_called = True
             # only care about being called, not actual filtering
@@ -281,40 +271,28 @@ def test_suppress_visibility(
 
         @property
         def suppress_visibilities(self):
-            return ["Answer.question"] if suppress else []
+            return ["WorkItem.case"] if suppress else []
 
     mocker.patch("caluma.caluma_core.types.Node.visibility_classes", [CustomVisibility])
 
-    # Just so we have something to fetch (document and
-    # question created implicitly)
-    answer_factory(question__type="integer")
-
-    # This should trigger the `question` resolver on the answer, which
-    # we test the suppressor on
+    # This triggers the `case` resolver on the work item, which we test the
+    # suppressor on
     res = schema_executor(
         """
         query foo {
-            allDocuments {
+            allWorkItems {
                 edges {
                     node {
-                       answers {
-                           edges {
-                               node {
-                                   id
-                                   ... on IntegerAnswer {
-                                       question {
-                                           slug
-                                       }
-                                   }
-                               }
-                           }
-                       }
+                        case {
+                            id
+                        }
                     }
                 }
-           }
-       }
+            }
+        }
         """
     )
     assert not res.errors
+    assert res.data["allWorkItems"]["edges"][0]["node"]["case"]
 
     assert expect_calls == CustomVisibility.was_called
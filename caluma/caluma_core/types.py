@@ -1,6 +1,7 @@
 from collections.abc import Iterable
 
 import graphene
+from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models.query import QuerySet
 from django.db.models.query_utils import DeferredAttribute
@@ -12,7 +13,14 @@ from graphene_django.rest_framework import serializer_converter
 from graphene_django.utils import maybe_queryset
 from graphql_relay import cursor_to_offset, get_offset_with_default, offset_to_cursor
 
-from .pagination import connection_from_array, connection_from_array_slice
+from .loaders import set_siblings
+from .pagination import (
+    Keyset,
+    connection_from_array,
+    connection_from_array_slice,
+    count_queryset,
+    is_keyset_cursor,
+)
 
 
 def enum_type_from_field(
@@ -62,6 +70,10 @@ class Node(object):
     # to avoid recursive import error
     visibility_classes = None
 
+    # Wide model fields which connections only load if one of the given
+    # GraphQL fields is requested on their nodes, e.g. `{"meta": ["meta"]}`
+    deferrable_fields = {}
+
     @classmethod
     def get_queryset(cls, queryset, info):
         if cls.visibility_classes is None:
@@ -96,8 +108,8 @@ class CountableConnectionBase(graphene.Connection):
             # DjangoConnectionField sets the length already
             return self.length
         except AttributeError:
-            if isinstance(self.iterable, QuerySet):  # pragma: no cover
-                return self.iterable.count()
+            if isinstance(self.iterable, QuerySet):
+                return count_queryset(self.iterable)
             return len(self.iterable)
 
 
@@ -117,6 +129,20 @@ class DjangoConnectionField(DjangoConnectionField):
 
     @classmethod
     def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        iterable = maybe_queryset(iterable)
+        if (
+            settings.KEYSET_PAGINATION
+            and isinstance(iterable, QuerySet)
+            and args.get("offset") is None
+            and not any(
+                args.get(arg) and not is_keyset_cursor(args[arg])
+                for arg in ["after", "before"]
+            )
+        ):
+            keyset = Keyset.for_queryset(iterable)
+            if keyset:
+                return cls.resolve_keyset_connection(connection, args, iterable, keyset)
+
         # Remove the offset parameter and convert it to an after cursor.
         offset = args.pop("offset", None)
         after = args.get("after")
@@ -126,20 +152,23 @@ class DjangoConnectionField(DjangoConnectionField):
             # input offset starts at 1 while the graphene offset starts at 0
             args["after"] = offset_to_cursor(offset - 1)
 
-        iterable = maybe_queryset(iterable)
-
-        if isinstance(iterable, QuerySet):
+        if isinstance(iterable, QuerySet) and any(
+            args.get(pagination_arg) is not None
+            for pagination_arg in ["before", "after", "first", "last"]
+        ):
             # only query count on database when pagination is needed
             # resolve_connection may be removed again once following issue is fixed:
             # https://github.com/graphql-python/graphene-django/issues/177
-            if all(
-                args.get(pagination_arg) is None
-                for pagination_arg in ["before", "after", "first", "last"]
-            ):
-                list_length = len(iterable)
-            else:
-                list_length = iterable.count()
-        else:  # pragma: no cover
+            if args.get("before") is None and args.get("last") is None:
+                # we only need to know whether there are more rows than
+                # requested, `totalCount` is counted when it's requested
+                connection = cls.resolve_forward_connection(connection, args, iterable)
+                connection.iterable = iterable
+                set_siblings(edge.node for edge in connection.edges)
+                return connection
+
+            list_length = iterable.count()
+        else:
             list_length = len(iterable)
         list_slice_length = (
             min(max_limit, list_length) if max_limit is not None else list_length
@@ -170,6 +199,80 @@ class DjangoConnectionField(DjangoConnectionField):
         )
         connection.iterable = iterable
         connection.length = list_length
+        # resolve relations of all nodes on this page together
+        set_siblings(edge.node for edge in connection.edges)
+        return connection
+
+    @classmethod
+    def resolve_forward_connection(cls, connection, args, queryset):
+        """Slice a page without counting all rows.
+
+        One row more than requested is fetched to find out whether there is
+        a next page.
+        """
+        after = get_offset_with_default(args.get("after"), -1) + 1
+        first = args.get("first")
+        array_slice = list(
+            queryset[after:] if first is None else queryset[after : after + first + 1]
+        )
+        return connection_from_array_slice(
+            array_slice,
+            args,
+            slice_start=after,
+            array_length=after + len(array_slice),
+            array_slice_length=len(array_slice),
+            connection_type=connection,
+            edge_type=connection.Edge,
+            page_info_type=PageInfo,
+        )
+
+    @classmethod
+    def resolve_keyset_connection(cls, connection, args, queryset, keyset):
+        """Paginate by seeking to the cursors instead of counting rows.
+
+        The total count is only queried when it's actually requested.
+        """
+        first, last = args.get("first"), args.get("last")
+        after, before = args.get("after"), args.get("before")
+
+        page = keyset.queryset
+        if after:
+            page = page.filter(keyset.seek(after))
+        if before:
+            page = page.filter(keyset.seek(before, backwards=True))
+
+        has_previous_page = after is not None
+        has_next_page = before is not None
+        if first is None and last is not None:
+            nodes = list(keyset.order(page, backwards=True)[: last + 1])
+            has_previous_page = len(nodes) > last
+            nodes = nodes[:last][::-1]
+        else:
+            page = keyset.order(page)
+            if first is not None:
+                page = page[: first + 1]
+            nodes = list(page)
+            if first is not None:
+                has_next_page = len(nodes) > first
+                nodes = nodes[:first]
+            if last is not None and len(nodes) > last:
+                has_previous_page = True
+                nodes = nodes[-last:]
+
+        edges = [
+            connection.Edge(node=node, cursor=keyset.cursor(node)) for node in nodes
+        ]
+        connection = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_previous_page,
+                has_next_page=has_next_page,
+            ),
+        )
+        connection.iterable = queryset
+        set_siblings(nodes)
         return connection
 
 
@@ -1,6 +1,7 @@
 from django.conf import settings
-from django.urls import re_path
+from django.urls import path, re_path
 
+from caluma.caluma_analytics.views import AnalyticsExportView
 from caluma.caluma_core import views
 from caluma.caluma_user.views import AuthenticationGraphQLView
 
@@ -11,4 +12,9 @@ urlpatterns = [
         name="graphql",
     ),
     re_path("healthz/?", views.health_check_status, name="healthz"),
+    path(
+        "analytics/<slug:slug>.<slug:export_format>",
+        AnalyticsExportView.as_view(),
+        name="analytics-export",
+    ),
 ]
@@ -1,6 +1,6 @@
 from typing import Any, Optional
 
-from caluma.caluma_form import domain_logic, models
+from caluma.caluma_form import domain_logic, models, structure
 from caluma.caluma_user.models import BaseUser
 
 
@@ -10,6 +10,7 @@ def save_answer(
     user: Optional[BaseUser] = None,
     value: Optional[Any] = None,
     context: Optional[dict] = None,
+    validation_context: Optional[structure.FieldSet] = None,
     **kwargs,
 ) -> models.Answer:
     """
@@ -17,6 +18,9 @@ def save_answer(
 
     Similar to saveDocumentStringAnswer and the likes, it performes upsert.
     :param value: Must match the question type
+    :param validation_context: Structure of the document's family. If given,
+        the answer is patched into it instead of building a new structure,
+        which speeds up saving multiple answers of the same document.
     """
 
     data = {"question": question, "document": document, "value": value}
@@ -24,7 +28,7 @@ def save_answer(
 
     answer = models.Answer.objects.filter(question=question, document=document).first()
     answer = domain_logic.SaveAnswerLogic.get_new_answer(
-        data, user, answer, context=context
+        data, user, answer, context=context, validation_context=validation_context
     )
 
     return answer
@@ -1,11 +1,16 @@
+import threading
 import time
 from collections import defaultdict
 from graphlib import TopologicalSorter
 from logging import getLogger
-from typing import Self
+from typing import Any, Callable, Optional, Self
+
+from django.db import connection, transaction
+from django.utils import timezone
 
 from caluma.caluma_form import models, structure, validators
 from caluma.caluma_form.jexl import QuestionJexl
+from caluma.caluma_form.utils import forms_containing_question
 
 log = getLogger(__name__)
 
@@ -60,11 +65,124 @@ def recalculate_and_update_dependents(calc_field: structure.ValueField):
         recalculate_dependent_fields(calc_field)
 
 
-def recalculate_field(calc_field: structure.ValueField) -> bool:
+class CalcAnswerBatch:
+    """Collect calculated answers to write them to the database in bulk.
+
+    The answers are updated in the structure right away, so subsequent
+    calculations see the new values, but are only stored once `write()`
+    is called. As bulk operations skip the model's save(), the history
+    records are created explicitly. They are attributed to `user` (a
+    username) unless they are written within a request.
+    """
+
+    def __init__(self, user: Optional[str] = None):
+        self.user = user
+        self._created: dict[str, models.Answer] = {}
+        self._updated: dict[str, models.Answer] = {}
+        self._old_values: dict[str, Any] = {}
+
+    def __len__(self):
+        return len(self._created) + len(self._updated)
+
+    def add(self, calc_field: structure.ValueField, value) -> models.Answer:
+        """Set the calculated value, and return the (unsaved) answer."""
+        answer = calc_field.answer
+        if answer is None:
+            answer = models.Answer(
+                question=calc_field.question,
+                document=calc_field.parent._document,
+                value=value,
+            )
+            self._created[answer.pk] = answer
+            self._old_values[answer.pk] = None
+        else:
+            self._old_values.setdefault(answer.pk, answer.value)
+            answer.value = value
+            if answer.pk not in self._created:
+                self._updated[answer.pk] = answer
+        return answer
+
+    def changes(self) -> list[tuple[models.Answer, Any]]:
+        """Return the collected answers, along with their previous value."""
+        return [
+            (answer, self._old_values[answer.pk])
+            for answer in [*self._created.values(), *self._updated.values()]
+        ]
+
+    @transaction.atomic
+    def write(self):
+        """Store all collected answers, along with their history."""
+        created = list(self._created.values())
+        updated = list(self._updated.values())
+
+        history_attrs = {"history_question_type": models.Question.TYPE_CALCULATED_FLOAT}
+        # bulk operations bypass `Answer.save()`
+        for answer in [*created, *updated]:
+            answer.value_number = answer.get_value_number()
+
+        if created:
+            # The answer may have been created since the structure was
+            # loaded. In that case, it's updated instead
+            models.Answer.objects.bulk_create(
+                created,
+                update_conflicts=True,
+                unique_fields=["document", "question"],
+                update_fields=["value", "value_number", "modified_at"],
+            )
+            conflicting = self._apply_stored_pks(created)
+            created = [answer for answer in created if answer not in conflicting]
+            models.Answer.history.bulk_history_create(
+                created, default_user=self.user, custom_historical_attrs=history_attrs
+            )
+            updated += conflicting
+
+        if updated:
+            now = timezone.now()
+            for answer in updated:
+                answer.modified_at = now
+            models.Answer.objects.bulk_update(
+                updated, ["value", "value_number", "modified_at"]
+            )
+            models.Answer.history.bulk_history_create(
+                updated,
+                update=True,
+                default_user=self.user,
+                custom_historical_attrs=history_attrs,
+            )
+
+    def _apply_stored_pks(self, answers: list[models.Answer]) -> list[models.Answer]:
+        """Set the primary keys of rows updated instead of inserted by bulk_create.
+
+        Conflicting rows keep their primary key, which bulk_create doesn't
+        report back for UUIDs. Return the answers whose row already existed.
+        """
+        stored_pks = {
+            (str(document_id), question_id): pk
+            for document_id, question_id, pk in models.Answer.objects.filter(
+                document__in={answer.document_id for answer in answers},
+                question__in={answer.question_id for answer in answers},
+            ).values_list("document_id", "question_id", "pk")
+        }
+
+        conflicting = []
+        for answer in answers:
+            stored_pk = stored_pks[(str(answer.document_id), answer.question_id)]
+            if stored_pk != answer.pk:
+                answer.pk = stored_pk
+                conflicting.append(answer)
+        return conflicting
+
+
+def recalculate_field(
+    calc_field: structure.ValueField, batch: Optional[CalcAnswerBatch] = None
+) -> bool:
     """Recalculate the given value field and store the new answer.
 
     If it's not a calculated field, nothing happens.
 
+    If a `batch` is given, the new answer is only updated in the structure
+    and collected in the batch, to be written to the database later on.
+
     Unless you know what you're doing, you should probably use
     `recalculate_and_update_dependents()` instead, as this variant
     will not update any dependents of the calculated field.
@@ -87,16 +205,20 @@ def recalculate_field(calc_field: structure.ValueField) -> bool:
     if did_change or not calc_field.answer:
         # If the value changed, or we have no answer for the calc
         # question: update the value
-        answer, _ = models.Answer.objects.update_or_create(
-            question=calc_field.question,
-            document=calc_field.parent._document,
-            defaults={"value": value},
-        )
-
-        # no need to refresh recursive - all subsequent dependents will be
-        # explicitly recalculated anyway, so we won't need to hit the DB
-        # and refresh them here (repeatedly)
-        calc_field.refresh(answer, recursive=False)
+        if batch is not None:
+            answer = batch.add(calc_field, value)
+        else:
+            answer, _ = models.Answer.objects.update_or_create(
+                question=calc_field.question,
+                document=calc_field.parent._document,
+                defaults={"value": value},
+            )
+
+        # no need to reload the dependents - all subsequent calculated
+        # dependents will be explicitly recalculated anyway, so we won't need
+        # to hit the DB and refresh them here (repeatedly). We still need to
+        # clear their memoised results though, as they may depend on our value
+        calc_field.refresh(answer, reload_dependents=False)
     duration = time.time() - start
 
     status = (
@@ -208,7 +330,12 @@ class DependencyList(list):
         reason_ids = self._reasons[id(field)]
         return [self._fields_by_id[field_id] for field_id in reason_ids]
 
-    def perform_recalculation(self, allow_culling=True, recalculate_roots=True):
+    def perform_recalculation(
+        self,
+        allow_culling=True,
+        recalculate_roots=True,
+        batch: Optional[CalcAnswerBatch] = None,
+    ):
         """Recalculate all fields in the associated structure.
 
         If allow_culling is set to False, the "culling" optimisation is disabled:
@@ -217,7 +344,13 @@ class DependencyList(list):
         If recalculate_roots is set to False, the fields that were used to initialize
         this DependencyList will not be recalculated. This is useful if they have
         been recalculated already.
+
+        The updated answers are written to the database in bulk once all
+        fields are recalculated. If a `batch` is given, the answers are only
+        collected in it, and writing them is the caller's responsibility.
         """
+        write_batch = batch is None
+        batch = CalcAnswerBatch() if write_batch else batch
         for field in self:
             is_root = id(field) in self._roots
             if (
@@ -234,7 +367,7 @@ class DependencyList(list):
             if is_root and not recalculate_roots:
                 did_update = True
             else:
-                did_update = recalculate_field(field)
+                did_update = recalculate_field(field, batch)
 
             if allow_culling and not did_update:
                 for dep_slug in field.question.calc_dependents:
@@ -243,6 +376,10 @@ class DependencyList(list):
                     for dep_field in dep_fields:
                         self.remove_reason_for(dep_field, field)
 
+        if write_batch and batch:
+            log.debug("Writing %d recalculated answers", len(batch))
+            batch.write()
+
 
 def recalculate_dependent_fields(
     *changed_fields: structure.BaseField, recalculate_roots: bool = False
@@ -276,11 +413,205 @@ def recalculate_all_calc_fields(struc):
     DependencyList(*calculated_fields).perform_recalculation()
 
 
-def update_or_create_calc_answer(question, document):
-    """Recalculate all answers in the document after calc dependency change."""
+def update_or_create_calc_answer(
+    question: models.Question, document: models.Document, user: Optional[str] = None
+):
+    """Recalculate all answers in the document after calc dependency change.
 
+    The answers are written in bulk via `CalcAnswerBatch`, which means no
+    `post_save` signal is sent for them.
+    """
     root = validators.DocumentValidator().get_validation_context(document.family)
     fields_to_recalc = root.find_all_fields_by_slug(question.slug)
-    dependencies_to_recalc = DependencyList(*fields_to_recalc)
+    batch = CalcAnswerBatch(user)
+    DependencyList(*fields_to_recalc).perform_recalculation(
+        allow_culling=False, batch=batch
+    )
+    batch.write()
+
+
+def recalculate_families(
+    family_ids: list[str],
+    question_slugs: list[str],
+    write: bool = True,
+    user: Optional[str] = None,
+) -> CalcAnswerBatch:
+    """Recalculate the given calculated questions in the given families.
+
+    All families are loaded with a single FastLoader, and the recalculated
+    answers are written in bulk. The expressions are still evaluated per
+    family, as their results depend on the family's answers (parsing and
+    compiling them is cached per process). Pass `write=False` to only
+    calculate the changes, which are available via the returned batch. The
+    history of the answers is attributed to `user`.
+    """
+    fastloader = structure.FastLoader.for_queryset(
+        models.Document.objects.filter(pk__in=family_ids)
+    )
+    validator = validators.DocumentValidator()
+    batch = CalcAnswerBatch(user)
+
+    for family_id in family_ids:
+        root = validator.get_validation_context(
+            fastloader.document_by_id(family_id), _fastloader=fastloader
+        )
+        fields_to_recalc = [
+            field
+            for slug in question_slugs
+            for field in root.find_all_fields_by_slug(slug)
+        ]
+        if fields_to_recalc:
+            DependencyList(*fields_to_recalc).perform_recalculation(
+                allow_culling=False, batch=batch
+            )
+
+    if write:
+        batch.write()
+    return batch
+
+
+def recalculate_calc_question(
+    question: models.Question,
+    chunk_size: int = 100,
+    progress: Optional[Callable[[int, int], None]] = None,
+    user: Optional[str] = None,
+):
+    """Recalculate the given calculated question in all affected families.
+
+    The families are processed in chunks of `chunk_size` (see
+    `recalculate_families()`), the history of the answers is attributed to
+    `user`.
+
+    If given, `progress` is called with the number of processed and total
+    families after each chunk.
+    """
+    forms = forms_containing_question(question)
+    family_ids = list(
+        models.Document.objects.filter(form__in=forms)
+        .order_by("family_id")
+        .values_list("family_id", flat=True)
+        .distinct()
+    )
+
+    for start in range(0, len(family_ids), chunk_size):
+        chunk = family_ids[start : start + chunk_size]
+        recalculate_families(chunk, [question.slug], user=user)
+
+        if progress:
+            progress(start + len(chunk), len(family_ids))
+
+
+class RecalculationWorker:
+    """Recalculate calculated questions one after the other in a background thread.
+
+    Questions waiting to be recalculated are only queued once, and the thread
+    only runs while there is work. Across processes, the recalculations of the
+    same question are serialized with an advisory lock.
+
+    The queue is kept in memory, but the queued questions are also recorded
+    as `PendingCalcRecalculation` until they are recalculated. Recalculations
+    which didn't finish when the process exits can be caught up on with the
+    `recalculate_calc_answers --pending` command.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queue: list[str] = []
+        self._thread = None
+
+    def enqueue(self, question_slug: str):
+        with self._lock:
+            if question_slug not in self._queue:
+                self._queue.append(question_slug)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="calc-recalculation"
+                )
+                self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the queue is processed, return whether it was."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._thread is None, timeout)
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._queue:
+                        self._thread = None
+                        self._idle.notify_all()
+                        return
+                    question_slug = self._queue.pop(0)
+                self._recalculate(question_slug)
+        finally:
+            connection.close()
+
+    def _recalculate(self, question_slug):
+        def log_progress(done, total):
+            log.info("Recalculation of %s: %d/%d families", question_slug, done, total)
+
+        try:
+            recalculate_pending_calc_question(question_slug, progress=log_progress)
+        except Exception:  # pragma: no cover
+            log.exception("Recalculation of %s failed", question_slug)
+
+
+recalculation_worker = RecalculationWorker()
+
+
+def mark_calc_question_pending(question_slug: str):
+    """Record that the answers of the given question need to be recalculated."""
+    models.PendingCalcRecalculation.objects.update_or_create(
+        question_id=question_slug, defaults={"queued_at": timezone.now()}
+    )
 
-    dependencies_to_recalc.perform_recalculation(allow_culling=False)
+
+def recalculate_pending_calc_question(
+    question_slug: str,
+    chunk_size: int = 100,
+    progress: Optional[Callable[[int, int], None]] = None,
+):
+    """Recalculate the given question, and clear its pending record.
+
+    Recalculations of the same question are serialized across processes with
+    an advisory lock. The pending record is only cleared if the question
+    wasn't queued again in the meantime.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", [question_slug])
+    try:
+        pending = models.PendingCalcRecalculation.objects.filter(
+            question_id=question_slug
+        ).first()
+        question = models.Question.objects.get(pk=question_slug)
+        recalculate_calc_question(
+            question,
+            chunk_size=chunk_size,
+            progress=progress,
+            user=question.modified_by_user,
+        )
+        if pending:
+            models.PendingCalcRecalculation.objects.filter(
+                question_id=question_slug, queued_at__lte=pending.queued_at
+            ).delete()
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", [question_slug])
+
+
+def recalculate_calc_question_deferred(question_slug: str):
+    """Queue `recalculate_calc_question()` on the background worker.
+
+    Intended to be called once the transaction changing the question (and
+    calling `mark_calc_question_pending()`) is committed, so the change
+    doesn't block on the amount of data. The progress is logged.
+    """
+    log.info(
+        "Queued recalculation of %s, the answers are outdated until it is "
+        "finished. If the process exits before, run "
+        "`recalculate_calc_answers --pending`.",
+        question_slug,
+    )
+    recalculation_worker.enqueue(question_slug)
@@ -46,7 +46,15 @@ class BaseLogic:
 
 class SaveAnswerLogic:
     @classmethod
-    def get_new_answer(cls, data, user, answer, context=None):
+    def get_new_answer(cls, data, user, answer, context=None, validation_context=None):
+        """Validate and save an answer.
+
+        If a `validation_context` (the document family's structure) is given,
+        the saved answer is patched into it in place instead of building a new
+        structure for the recalculation of the dependents. This allows saving
+        multiple answers of the same family while building the structure only
+        once.
+        """
         validated_data = cls.pre_save(
             cls.validate_for_save(
                 data,
@@ -59,9 +67,13 @@ class SaveAnswerLogic:
 
         files = validated_data.pop("files", None)
         if answer is None:
-            answer = cls.create(validated_data, user)
+            answer = cls.create(
+                validated_data, user, validation_context=validation_context
+            )
         else:
-            answer = cls.update(answer, validated_data, user)
+            answer = cls.update(
+                answer, validated_data, user, validation_context=validation_context
+            )
 
         # FILES type needs a bit more work due to the reverse
         # relation of file -> answer
@@ -69,6 +81,8 @@ class SaveAnswerLogic:
             if files is None:
                 raise ValidationError("Files input must be a list")
             cls.update_answer_files(answer, files)
+            if validation_context is not None:
+                cls.patch_validation_context(validation_context, answer)
 
         return cls.post_save(answer)
 
@@ -121,6 +135,7 @@ class SaveAnswerLogic:
         answer: models.Answer = None,
         origin: bool = False,
         context: dict = None,
+        request=None,
     ) -> dict:
         question = data["question"]
 
@@ -150,6 +165,7 @@ class SaveAnswerLogic:
             instance=answer,
             origin=origin,
             data_source_context=context,
+            request=request,
         )
 
         return data
@@ -165,33 +181,74 @@ class SaveAnswerLogic:
         return answer
 
     @staticmethod
-    def recalculate_dependents(answer, update_info):
-        """Update the dependent calc answers when this given answer has changed."""
-        is_table = answer.question.type == models.Question.TYPE_TABLE
-        if not is_table and not answer.question.calc_dependents:
-            return
+    def patch_validation_context(validation_context, answer):
+        """Update the given structure in place with the saved answer.
+
+        Return the answer's field, or None if the answer's document is not
+        part of the structure.
+        """
+        field = validation_context.get_root().find_field_by_document_and_question(
+            answer.document_id, answer.question_id
+        )
+        if field:
+            # Calculated dependents are recalculated by the caller, no need
+            # to reload them from the DB
+            field.refresh(answer, reload_dependents=False)
+        return field
+
+    @staticmethod
+    def recalculate_dependents(
+        answer, update_info, validation_context=None, request=None
+    ):
+        """Update the dependent calc answers when this given answer has changed.
+
+        If a validation context is given, the answer is patched into it (see
+        `BaseField.refresh()`), and the recalculation is done on that
+        structure, keeping it consistent for further use. If a request is
+        given instead, the same is done with the structure of the family cached
+        on the request (see `validators.get_family_validation_context()`), so
+        it's built at most once for validating and saving the answer.
+        """
         if not answer.document:
             # Default answer
             return
-        log.debug("update_calc_dependents(%s)", answer)
 
-        struc = validators.DocumentValidator().get_validation_context(
-            answer.document.family
-        )
-        field = struc.find_field_by_answer(answer)
-        if not field:  # pragma: no cover
-            # not covering this, because it's a developer error
-            raise ConfigurationError(
-                "Saved an answer in a form structure where it doesn't belong: "
-                f"question={answer.question_id}, root form={struc.get_root().get_form().slug}",
+        if validation_context is None and request is not None:
+            validation_context = validators.get_cached_family_validation_context(
+                answer.document, request
             )
 
+        field = None
+        if validation_context is not None:
+            field = SaveAnswerLogic.patch_validation_context(validation_context, answer)
+
+        is_table = answer.question.type == models.Question.TYPE_TABLE
+        if not is_table and not answer.question.calc_dependents:
+            return
+        log.debug("update_calc_dependents(%s)", answer)
+
+        if not field:
+            # No structure given, or the answer's document isn't part of it
+            # (for example a table row that is not attached yet)
+            struc = validators.get_family_validation_context(answer.document, request)
+            field = struc.find_field_by_answer(answer)
+            if not field:  # pragma: no cover
+                # not covering this, because it's a developer error
+                raise ConfigurationError(
+                    "Saved an answer in a form structure where it doesn't belong: "
+                    f"question={answer.question_id}, root form={struc.get_root().get_form().slug}",
+                )
+
         recalculate_dependent_fields(field)
 
     @classmethod
     @transaction.atomic
     def create(
-        cls, validated_data: dict, user: Optional[BaseUser] = None
+        cls,
+        validated_data: dict,
+        user: Optional[BaseUser] = None,
+        validation_context=None,
+        request=None,
     ) -> models.Answer:
         if validated_data["question"].type == models.Question.TYPE_TABLE:
             documents = validated_data.pop("documents")
@@ -206,13 +263,20 @@ class SaveAnswerLogic:
         if answer.question.type == models.Question.TYPE_TABLE:
             update_info = answer.create_answer_documents(documents)
 
-        cls.recalculate_dependents(answer, update_info)
+        cls.recalculate_dependents(answer, update_info, validation_context, request)
 
         return answer
 
     @classmethod
     @transaction.atomic
-    def update(cls, answer, validated_data, user: Optional[BaseUser] = None):
+    def update(
+        cls,
+        answer,
+        validated_data,
+        user: Optional[BaseUser] = None,
+        validation_context=None,
+        request=None,
+    ):
         if answer.question.type == models.Question.TYPE_TABLE:
             documents = validated_data.pop("documents")
             answer.unlink_unused_rows(docs_to_keep=documents)
@@ -226,7 +290,7 @@ class SaveAnswerLogic:
         if answer.question.type == models.Question.TYPE_TABLE:
             update_info = answer.create_answer_documents(documents)
 
-        cls.recalculate_dependents(answer, update_info)
+        cls.recalculate_dependents(answer, update_info, validation_context, request)
 
         return answer
 
@@ -271,11 +335,18 @@ class RemoveDocumentLogic:
 
         document.delete()
 
+        # The document is already deleted, so the structures are up to date.
+        # Build them only once per family, recalculation keeps them consistent
+        structures = {}
         for answer in affected_answers:
-            struc = validators.DocumentValidator().get_validation_context(
-                answer.document.family
-            )
-            field = struc.find_field_by_answer(answer)
+            family_id = answer.document.family_id
+            if family_id not in structures:
+                structures[family_id] = (
+                    validators.DocumentValidator().get_validation_context(
+                        answer.document.family
+                    )
+                )
+            field = structures[family_id].find_field_by_answer(answer)
             if field:
                 recalculate_dependent_fields(field)
 
@@ -288,6 +359,7 @@ class SaveDefaultAnswerLogic(SaveAnswerLogic):
         answer: models.Answer = None,
         origin: bool = False,
         context: dict = None,
+        request=None,
     ) -> dict:
         if data["question"].type in [
             models.Question.TYPE_FILES,
@@ -302,12 +374,21 @@ class SaveDefaultAnswerLogic(SaveAnswerLogic):
             )
 
         data["document"] = None  # send None as document for validation
-        return SaveAnswerLogic.validate_for_save(data, user, answer, origin, context)
+        return SaveAnswerLogic.validate_for_save(
+            data, user, answer, origin, context, request
+        )
 
     @staticmethod
     @transaction.atomic
-    def create(validated_data: dict, user: Optional[BaseUser] = None) -> models.Answer:
-        answer = SaveAnswerLogic.create(validated_data, user)
+    def create(
+        validated_data: dict,
+        user: Optional[BaseUser] = None,
+        validation_context=None,
+        request=None,
+    ) -> models.Answer:
+        answer = SaveAnswerLogic.create(
+            validated_data, user, validation_context, request
+        )
         answer.question.default_answer = answer
         answer.question.save()
 
@@ -316,9 +397,15 @@ class SaveDefaultAnswerLogic(SaveAnswerLogic):
     @staticmethod
     @transaction.atomic
     def update(
-        answer, validated_data, user: Optional[BaseUser] = None
+        answer,
+        validated_data,
+        user: Optional[BaseUser] = None,
+        validation_context=None,
+        request=None,
     ) -> models.Answer:
-        return SaveAnswerLogic.update(answer, validated_data, user)
+        return SaveAnswerLogic.update(
+            answer, validated_data, user, validation_context, request
+        )
 
 
 class SaveDocumentLogic:
@@ -2,9 +2,10 @@ import shlex
 from functools import reduce
 
 import graphene
+from django.contrib.postgres.search import SearchQuery
 from django.core import exceptions
 from django.db import ProgrammingError
-from django.db.models import F, Func, OuterRef, Q, Subquery
+from django.db.models import Count, F, Func, OuterRef, Q, Subquery
 from django.forms import BooleanField
 from django.utils import translation
 from django_filters.constants import EMPTY_VALUES
@@ -24,7 +25,12 @@ from ..caluma_core.filters import (
 from ..caluma_core.forms import GlobalIDFormField
 from ..caluma_core.ordering import AttributeOrderingFactory, MetaFieldOrdering
 from ..caluma_core.relay import extract_global_id
-from ..caluma_form.models import Answer, DynamicOption, Form, Question, QuestionOption
+from ..caluma_form.models import (
+    AnswerSearchText,
+    Form,
+    Question,
+    QuestionOption,
+)
 from ..caluma_form.ordering import AnswerValueOrdering
 from . import models, validators
 
@@ -121,7 +127,10 @@ class VisibleOptionFilter(Filter):
         validator = validators.AnswerValidator()
         return qs.filter(
             slug__in=validator.visible_options(
-                document, qs.first().questionoption_set.first().question, qs
+                document,
+                qs.first().questionoption_set.first().question,
+                qs,
+                request=self.parent.request,
             )
         )
 
@@ -254,33 +263,68 @@ class HasAnswerFilter(Filter):
     VALID_LOOKUPS["datetime"] = VALID_LOOKUPS["integer"]
     VALID_LOOKUPS["calculated_float"] = VALID_LOOKUPS["float"]
 
+    NUMBER_TYPES = (
+        models.Question.TYPE_INTEGER,
+        models.Question.TYPE_FLOAT,
+        models.Question.TYPE_CALCULATED_FLOAT,
+    )
+    NUMBER_LOOKUPS = (
+        AnswerLookupMode.EXACT,
+        AnswerLookupMode.LT,
+        AnswerLookupMode.LTE,
+        AnswerLookupMode.GT,
+        AnswerLookupMode.GTE,
+        AnswerLookupMode.IN,
+    )
+
     def filter(self, qs, value):
         if value in EMPTY_VALUES:  # pragma: no cover
             return qs
 
-        for expr in value:
-            qs = self.apply_expr(qs, expr)
+        slugs = {expr["question"] for expr in value}
+        questions = models.Question.objects.in_bulk(slugs)
+        if slugs - questions.keys():
+            raise models.Question.DoesNotExist(
+                "Question matching query does not exist."
+            )
+
+        conditions = [
+            self.get_condition(questions[expr["question"]], expr) for expr in value
+        ]
+
+        # Conditions on the same hierarchy are checked by one grouped query.
+        # If the documents are reached through a multi-valued relation, every
+        # condition may be met by another related document though.
+        if self._is_multi_valued(qs.model):
+            groups = [[condition] for condition in conditions]
+        else:
+            groups = [
+                [condition for condition in conditions if condition[0] == hierarchy]
+                for hierarchy in dict.fromkeys(hierarchy for hierarchy, _ in conditions)
+            ]
+
+        for group in groups:
+            qs = qs.filter(**{f"{self.document_id}__in": self.get_documents(group)})
         return qs
 
-    def apply_expr(self, qs, expr):
+    def get_condition(self, question, expr):
+        """Return the hierarchy and the lookup of answers matching `expr`."""
         lookup = expr.get("lookup", self.lookup_expr)
         lookup_expr = (hasattr(lookup, "value") and lookup.value) or lookup
 
-        question_slug = expr["question"]
         match_value = expr.get("value")
         if lookup == AnswerLookupMode.ISNULL:
             match_value = True
 
         hierarchy = expr.get("hierarchy", AnswerHierarchyMode.FAMILY)
 
-        question = models.Question.objects.get(slug=question_slug)
         self._validate_lookup(question, lookup)
 
         answer_value = "value"
         if question.type == models.Question.TYPE_DATE:
             answer_value = "date"
-
-        answers = models.Answer.objects.all()
+        elif self._compare_numbers(question, lookup, match_value):
+            answer_value = "value_number"
 
         if lookup == AnswerLookupMode.INTERSECTS:
             inner_lookup = "exact"
@@ -290,26 +334,62 @@ class HasAnswerFilter(Filter):
             ):
                 inner_lookup = "contains"
 
-            exprs = [
-                Q(**{f"value__{inner_lookup}": val, "question__slug": question_slug})
-                for val in match_value
-            ]
+            exprs = [Q(**{f"value__{inner_lookup}": val}) for val in match_value]
             # connect all expressions with OR
-            answers = answers.filter(reduce(lambda a, b: a | b, exprs))
+            condition = reduce(lambda a, b: a | b, exprs, Q(pk__in=[]))
         else:
-            answers = answers.filter(
-                **{
-                    f"{answer_value}__{lookup_expr}": match_value,
-                    "question__slug": question_slug,
-                }
-            )
+            condition = Q(**{f"{answer_value}__{lookup_expr}": match_value})
 
-        if hierarchy == AnswerHierarchyMode.FAMILY:
-            return qs.filter(
-                **{f"{self.document_id}__in": answers.values("document__family")}
-            )
-        else:
-            return qs.filter(**{f"{self.document_id}__in": answers.values("document")})
+        return hierarchy, Q(question=question) & condition
+
+    def get_documents(self, conditions):
+        """Return the documents having answers matching all the conditions.
+
+        All conditions have to be on the same hierarchy.
+        """
+        hierarchy = conditions[0][0]
+        document = (
+            "document__family"
+            if hierarchy == AnswerHierarchyMode.FAMILY
+            else "document"
+        )
+
+        answers = models.Answer.objects.filter(
+            reduce(lambda a, b: a | b, [condition for _, condition in conditions])
+        )
+        if len(conditions) == 1:
+            return answers.values(document)
+
+        # every condition has to be met by one of the answers of a document
+        matches = {
+            f"match_{i}": Count("pk", filter=condition)
+            for i, (_, condition) in enumerate(conditions)
+        }
+        return (
+            answers.values(document)
+            .annotate(**matches)
+            .filter(**{f"{match}__gt": 0 for match in matches})
+            .values(document)
+        )
+
+    def _is_multi_valued(self, model):
+        for name in self.document_id.split("__")[:-1]:
+            field = model._meta.get_field(name)
+            if field.one_to_many or field.many_to_many:
+                return True
+            model = field.related_model
+        return False
+
+    def _compare_numbers(self, question, lookup, match_value):
+        """Check whether the lookup can be done on the indexed numeric value."""
+        if question.type not in self.NUMBER_TYPES or lookup not in self.NUMBER_LOOKUPS:
+            return False
+
+        values = match_value if lookup == AnswerLookupMode.IN else [match_value]
+        return all(
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            for value in values
+        )
 
     def _validate_lookup(self, question, lookup):
         try:
@@ -377,18 +457,6 @@ class SearchAnswersFilterField(CompositeFieldClass):
 class SearchAnswersFilter(Filter):
     field_class = SearchAnswersFilterField
 
-    FIELD_MAP = {
-        Question.TYPE_TEXT: "value",
-        Question.TYPE_TEXTAREA: "value",
-        Question.TYPE_DATE: "date",
-        Question.TYPE_CHOICE: "value",
-        Question.TYPE_MULTIPLE_CHOICE: "value",
-        Question.TYPE_DYNAMIC_CHOICE: "value",
-        Question.TYPE_DYNAMIC_MULTIPLE_CHOICE: "value",
-        Question.TYPE_INTEGER: "value",
-        Question.TYPE_FLOAT: "value",
-    }
-
     def __init__(self, *args, **kwargs):
         self.document_id = kwargs.pop("document_id")
         super().__init__(*args, **kwargs)
@@ -440,7 +508,7 @@ class SearchAnswersFilter(Filter):
             # Combine querysets: All questions of the given forms, as well as the
             # explicitly-requested questions.
             questions = questions | form_questions.filter(
-                type__in=self.FIELD_MAP.keys()
+                type__in=AnswerSearchText.QUESTION_TYPES
             )
 
         return questions
@@ -458,84 +526,48 @@ class SearchAnswersFilter(Filter):
             qs = qs.filter(
                 **{
                     f"{self.document_id}__in": answers_with_word.values(
-                        "document__family"
+                        "answer__document__family"
                     )
                 }
             )
 
         return qs
 
-    def _word_lookup_for_question(self, question, word, lookup):
-        if question.type not in (
-            Question.TYPE_CHOICE,
-            Question.TYPE_DYNAMIC_CHOICE,
-            Question.TYPE_MULTIPLE_CHOICE,
-            Question.TYPE_DYNAMIC_MULTIPLE_CHOICE,
-        ):
+    @staticmethod
+    def _word_lookup(word, lookup):
+        if lookup == SearchLookupMode.TEXT.value:
             return Q(
-                **{
-                    f"{self.FIELD_MAP[question.type]}__{lookup}": word,
-                    "question": question,
-                }
+                text__search=SearchQuery(word, config=AnswerSearchText.SEARCH_CONFIG)
             )
+        if lookup == SearchLookupMode.CONTAINS.value:
+            return Q(text__icontains=word)
 
-        # (Multiple) choice lookups need more specific treatment...
-        lang = translation.get_language()
-        is_multiple = question.type in (
-            Question.TYPE_MULTIPLE_CHOICE,
-            Question.TYPE_DYNAMIC_MULTIPLE_CHOICE,
-        )
-        is_dynamic = question.type in (
-            Question.TYPE_DYNAMIC_CHOICE,
-            Question.TYPE_DYNAMIC_MULTIPLE_CHOICE,
-        )
-
-        # find all options of our given question that match the
-        # word, then use their slugs for lookup
-        if is_dynamic:
-            matching_options = (
-                DynamicOption.objects.all()
-                .filter(question=question, **{f"label__{lang}__{lookup}": word})
-                .values_list("slug", flat=True)
-            )
-        else:
-            matching_options = question.options.filter(
-                **{f"label__{lang}__{lookup}": word}
-            ).values_list("slug", flat=True)
-
-        if not matching_options:
-            # no labels = no results
-            return Q(value=False) & Q(value=True)
-
-        filt = "value__contains" if is_multiple else "value"
-        return reduce(
-            lambda a, b: a | b, [Q(**{filt: slug}) for slug in matching_options]
-        )
+        # the trigram index only covers case insensitive lookups, so the
+        # matches are narrowed down by those first
+        return Q(**{f"text__i{lookup}": word, f"text__{lookup}": word})
 
     def _answers_with_word(self, questions, word, lookup, form_slugs):
-        if not questions:
-            return Answer.objects.none()
-
-        exprs = [
-            self._word_lookup_for_question(question, word, lookup)
-            for question in questions
-        ]
-
-        # join expressions with OR
-        answer_qs = Answer.objects.filter(reduce(lambda a, b: a | b, exprs))
+        # option labels are searched in the current language only
+        search_texts = AnswerSearchText.objects.filter(
+            self._word_lookup(word, lookup),
+            question__in=questions,
+            language__in=["", translation.get_language()],
+        )
 
         # add form filter if given,
         # otherwise it would return all answers of the question filter ignoring the form filter
         if form_slugs not in EMPTY_VALUES:
-            answer_qs = answer_qs.filter(document__form__pk__in=form_slugs)
+            search_texts = search_texts.filter(
+                answer__document__form__pk__in=form_slugs
+            )
 
-        return answer_qs
+        return search_texts
 
     def _validate_and_get_questions(self, question_slugs):
         res = []
         for q_slug in question_slugs:
             question = Question.objects.get(pk=q_slug)
-            if question.type not in self.FIELD_MAP:
+            if question.type not in AnswerSearchText.QUESTION_TYPES:
                 raise exceptions.ValidationError(
                     f"Questions of type {question.type} cannot be used in searchAnswers"
                 )
@@ -616,9 +648,16 @@ class VisibleAnswerFilter(Filter):
             return qs
 
         # assuming qs can only ever be in the context of a single document
-        document = qs.first().document.family
+        document = qs.first().document
+        validation_context = validators.get_family_validation_context(
+            document, self.parent.request
+        )
         validator = validators.DocumentValidator()
-        return qs.filter(question__slug__in=validator.visible_questions(document))
+        return qs.filter(
+            question__slug__in=validator.visible_questions(
+                document.family, validation_context=validation_context
+            )
+        )
 
 
 class VisibleQuestionFilter(Filter):
@@ -632,8 +671,18 @@ class VisibleQuestionFilter(Filter):
 
         # assuming qs can only ever be in the context of a single document
         document = models.Document.objects.get(pk=document_id)
+        validation_context = None
+        if document.pk == document.family_id:
+            # table rows are evaluated on their own, not in the family's context
+            validation_context = validators.get_family_validation_context(
+                document, self.parent.request
+            )
         validator = validators.DocumentValidator()
-        return qs.filter(slug__in=validator.visible_questions(document))
+        return qs.filter(
+            slug__in=validator.visible_questions(
+                document, validation_context=validation_context
+            )
+        )
 
 
 class QuestionFilterSet(MetaFilterSet):
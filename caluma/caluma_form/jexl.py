@@ -1,16 +1,21 @@
 import weakref
 from collections import ChainMap
 from functools import partial
+from itertools import chain
+from logging import getLogger
 
 from pyjexl.analysis import ValidatingAnalyzer
+from pyjexl.exceptions import ParseError
 
 from caluma.caluma_core.exceptions import QuestionMissing
 
 from ..caluma_core.jexl import (
     JEXL,
+    CalumaAnalyzer,
     ExtractTransformArgumentAnalyzer,
     ExtractTransformSubjectAnalyzer,
 )
+from .models import Option, Question
 
 """
 Form JEXL handling
@@ -27,6 +32,8 @@ Design principles:
 * JEXL evaluation happens lazily, but the results are cached.
 """
 
+log = getLogger(__name__)
+
 
 class QuestionValidatingAnalyzer(ValidatingAnalyzer):
     def visit_Transform(self, transform):
@@ -36,7 +43,31 @@ class QuestionValidatingAnalyzer(ValidatingAnalyzer):
         yield from super().visit_Transform(transform)
 
 
+class DependencyAnalyzer(CalumaAnalyzer):
+    """Extract what the result of an expression depends on.
+
+    Yields "answer" for every `answer` transform and "context" for every
+    (non-relative) identifier, which is looked up in the context.
+    """
+
+    def visit_Transform(self, transform):
+        if transform.name == "answer":
+            yield "answer"
+
+        yield from self.generic_visit(transform)
+
+    def visit_Identifier(self, identifier):
+        if not identifier.relative:
+            yield "context"
+
+        yield from self.generic_visit(identifier)
+
+
 class QuestionJexl(JEXL):
+    EXPRESSION_CONSTANT = "constant"
+    EXPRESSION_CONTEXT = "context"
+    EXPRESSION_ANSWER = "answer"
+
     def __init__(self, field, **kwargs):
         """Initialize QuestionJexl.
 
@@ -86,6 +117,28 @@ class QuestionJexl(JEXL):
             expr, partial(ExtractTransformArgumentAnalyzer, transforms=transforms)
         )
 
+    def classify(self, expr):
+        """Return what the result of the given expression depends on.
+
+        * `EXPRESSION_CONSTANT`: Nothing, the result is always the same
+        * `EXPRESSION_CONTEXT`: Only the context (e.g. `info.form`), but no
+          answers
+        * `EXPRESSION_ANSWER`: Answers of other questions
+
+        Invalid expressions are considered to depend on answers, so they're
+        always evaluated (and fail) in the same way as before.
+        """
+        try:
+            dependencies = set(self.analyze(expr, DependencyAnalyzer))
+        except ParseError:
+            return self.EXPRESSION_ANSWER
+
+        if "answer" in dependencies:
+            return self.EXPRESSION_ANSWER
+        if "context" in dependencies:
+            return self.EXPRESSION_CONTEXT
+        return self.EXPRESSION_CONSTANT
+
     def evaluate(self, expr, raise_on_error=True):
         try:
             return super().evaluate(expr, ChainMap(self.context))
@@ -98,3 +151,24 @@ class QuestionJexl(JEXL):
             if raise_on_error:
                 raise
             return None
+
+
+def warm_up_cache():
+    """Parse and compile the JEXL expressions of all questions and options.
+
+    Intended to be called at startup, so the expressions don't need to be
+    parsed upon the first requests.
+    """
+    expressions = set(
+        chain(
+            Question.objects.values_list("is_hidden", flat=True).distinct(),
+            Question.objects.values_list("is_required", flat=True).distinct(),
+            Question.objects.exclude(calc_expression=None)
+            .values_list("calc_expression", flat=True)
+            .distinct(),
+            Option.objects.values_list("is_hidden", flat=True).distinct(),
+        )
+    )
+    prepared = QuestionJexl(field=None).prepare(expressions)
+    log.info("Prepared %d question JEXL expressions", prepared)
+    return prepared
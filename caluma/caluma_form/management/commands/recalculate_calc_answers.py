@@ -1,7 +1,26 @@
-from django.core.management.base import BaseCommand
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 
-from caluma.caluma_form.calc_questions import update_or_create_calc_answer
-from caluma.caluma_form.models import Answer, Question
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from caluma.caluma_form.calc_questions import (
+    recalculate_families,
+    recalculate_pending_calc_question,
+)
+from caluma.caluma_form.models import Answer, PendingCalcRecalculation, Question
+
+
+def recalculate_chunk(family_ids, question_slugs, dry_run):
+    """Recalculate a chunk of families, and return the changed answers.
+
+    Top-level function, so it can be run in a worker process.
+    """
+    batch = recalculate_families(family_ids, question_slugs, write=not dry_run)
+    return [
+        (str(answer.document_id), answer.question_id, old_value, answer.value)
+        for answer, old_value in batch.changes()
+    ]
 
 
 class Command(BaseCommand):
@@ -10,26 +29,124 @@ class Command(BaseCommand):
 
     Due to a bug, answers to calculated questions were wrong, if they contained values
     from table rows. This command recalculates all of them.
+
+    The affected families are recalculated in chunks, optionally spread over
+    multiple worker processes.
+
+    With `--pending`, the deferred recalculations which didn't finish (see
+    `CALC_RECALCULATION_DEFERRED`) are caught up on instead.
     """
 
     help = "Recalculate calculated answers containing values from TableAnswers."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            "-w",
+            dest="workers",
+            type=int,
+            default=1,
+            help="Number of worker processes to recalculate the families with.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            dest="chunk_size",
+            type=int,
+            default=100,
+            help="Number of families to load and write at once.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            dest="dry_run",
+            action="store_true",
+            default=False,
+            help="Only report the answers that would change.",
+        )
+        parser.add_argument(
+            "--pending",
+            dest="pending",
+            action="store_true",
+            default=False,
+            help="Recalculate the questions whose deferred recalculation is pending.",
+        )
+
     def handle(self, *args, **options):
+        if options["pending"]:
+            if options["dry_run"] or options["workers"] > 1:
+                raise CommandError(
+                    "--pending can't be combined with --dry-run or --workers"
+                )
+            return self.handle_pending(options["chunk_size"])
+
         affected_questions = (
             Question.objects.filter(type="table")
             .exclude(calc_dependents=[])
             .values_list("calc_dependents", flat=True)
         )
 
-        affected_questions_clean = set(
-            [slug for entry in affected_questions for slug in entry]
+        affected_questions_clean = sorted(
+            set([slug for entry in affected_questions for slug in entry])
+        )
+
+        family_ids = list(
+            Answer.objects.filter(
+                question__type="calculated_float",
+                document__isnull=False,
+                question__slug__in=affected_questions_clean,
+            )
+            .order_by("document__family_id")
+            .values_list("document__family_id", flat=True)
+            .distinct()
+        )
+
+        chunk_size = options["chunk_size"]
+        chunks = [
+            family_ids[start : start + chunk_size]
+            for start in range(0, len(family_ids), chunk_size)
+        ]
+        args = (
+            chunks,
+            [affected_questions_clean] * len(chunks),
+            [options["dry_run"]] * len(chunks),
+        )
+
+        if options["workers"] > 1:
+            # Every worker needs its own database connection. Close ours,
+            # so the forked processes don't share it.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], mp_context=get_context("fork")
+            ) as executor:
+                results = list(executor.map(recalculate_chunk, *args))
+        else:
+            results = list(map(recalculate_chunk, *args))
+
+        changes = [change for result in results for change in result]
+        for document_id, question_id, old_value, new_value in changes:
+            if options["dry_run"] or options["verbosity"] > 1:
+                self.stdout.write(
+                    f"{document_id} {question_id}: {old_value} -> {new_value}"
+                )
+
+        self.stdout.write(
+            f"{'Would update' if options['dry_run'] else 'Updated'} "
+            f"{len(changes)} answers in {len(family_ids)} families"
         )
 
-        calc_answers = Answer.objects.filter(
-            question__type="calculated_float",
-            document__isnull=False,
-            question__slug__in=affected_questions_clean,
+    def handle_pending(self, chunk_size):
+        question_slugs = list(
+            PendingCalcRecalculation.objects.order_by("queued_at").values_list(
+                "question_id", flat=True
+            )
         )
 
-        for answer in calc_answers.iterator():
-            update_or_create_calc_answer(answer.question, answer.document)
+        for question_slug in question_slugs:
+
+            def progress(done, total):
+                self.stdout.write(f"{question_slug}: {done}/{total} families")
+
+            recalculate_pending_calc_question(
+                question_slug, chunk_size=chunk_size, progress=progress
+            )
+
+        self.stdout.write(f"Recalculated {len(question_slugs)} pending questions")
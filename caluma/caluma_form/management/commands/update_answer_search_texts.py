@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from caluma.caluma_form.models import Answer, AnswerSearchText
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the texts searched by the `searchAnswers` filter.
+
+    The search texts are maintained when answers are saved. This command fills
+    them for existing answers, e.g. after upgrading or loading data.
+    """
+
+    help = "Rebuild the texts searched by the `searchAnswers` filter."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--questions",
+            dest="questions",
+            nargs="*",
+            default=None,
+            help="Only rebuild the answers to the given questions.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            dest="chunk_size",
+            type=int,
+            default=1000,
+            help="Number of answers to load and write at once.",
+        )
+
+    def handle(self, *args, **options):
+        answers = (
+            Answer.objects.filter(
+                question__type__in=AnswerSearchText.QUESTION_TYPES,
+                document__isnull=False,
+            )
+            .select_related("question")
+            .order_by("pk")
+        )
+        if options["questions"]:
+            answers = answers.filter(question__in=options["questions"])
+
+        chunk_size = options["chunk_size"]
+        count = 0
+        last_pk = None
+        while True:
+            chunk = answers if last_pk is None else answers.filter(pk__gt=last_pk)
+            chunk = list(chunk[:chunk_size])
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                AnswerSearchText.update_answers(chunk)
+            count += len(chunk)
+            last_pk = chunk[-1].pk
+
+        self.stdout.write(f"Updated search texts of {count} answers")
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caluma_form", "0050_answersearchtext"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answer",
+            name="value_number",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        # Same as `Answer.get_value_number()`
+        migrations.RunSQL(
+            """
+            UPDATE caluma_form_answer
+            SET value_number = (value #>> '{}')::double precision
+            WHERE jsonb_typeof(value) = 'number'
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                condition=models.Q(("value_number__isnull", False)),
+                fields=["question", "value_number"],
+                name="answer_question_number_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                condition=models.Q(("date__isnull", False)),
+                fields=["question", "date"],
+                name="answer_question_date_idx",
+            ),
+        ),
+    ]
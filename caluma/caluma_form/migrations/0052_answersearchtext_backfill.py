@@ -0,0 +1,69 @@
+from django.db import migrations
+
+# Same texts as `AnswerSearchText.get_texts()`, built in the database as
+# there may be millions of answers (see `AnswerSearchText.number_text()` for
+# the numbers)
+BACKFILL_SQL = """
+    WITH answers AS (
+        SELECT answer.id, answer.question_id, answer.document_id, answer.value,
+            answer.date, question.type
+        FROM caluma_form_answer answer
+        JOIN caluma_form_question question ON question.slug = answer.question_id
+        WHERE answer.document_id IS NOT NULL
+    ),
+    selected AS (
+        SELECT DISTINCT answers.id, answers.question_id, answers.document_id,
+            answers.type, slug.value #>> '{}' AS slug
+        FROM answers
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE jsonb_typeof(answers.value)
+                WHEN 'array' THEN answers.value
+                ELSE jsonb_build_array(answers.value)
+            END
+        ) slug
+        WHERE answers.type IN (
+            'choice', 'multiple_choice', 'dynamic_choice', 'dynamic_multiple_choice'
+        )
+        AND jsonb_typeof(slug.value) = 'string'
+    )
+    INSERT INTO caluma_form_answersearchtext (answer_id, question_id, language, text)
+    SELECT id, question_id, '', value #>> '{}'
+    FROM answers
+    WHERE type IN ('text', 'textarea') AND jsonb_typeof(value) = 'string'
+    UNION ALL
+    SELECT id, question_id, '', to_char(date, 'YYYY-MM-DD')
+    FROM answers
+    WHERE type = 'date' AND date IS NOT NULL
+    UNION ALL
+    SELECT id, question_id, '', value #>> '{}'
+    FROM answers
+    WHERE type IN ('integer', 'float') AND jsonb_typeof(value) <> 'null'
+    UNION ALL
+    SELECT selected.id, selected.question_id, label.key, label.value
+    FROM selected
+    JOIN caluma_form_option opt ON opt.slug = selected.slug
+    CROSS JOIN LATERAL each(opt.label) label
+    WHERE selected.type IN ('choice', 'multiple_choice') AND label.value <> ''
+    UNION ALL
+    SELECT selected.id, selected.question_id, label.key, label.value
+    FROM selected
+    JOIN caluma_form_dynamicoption opt
+        ON opt.slug = selected.slug
+        AND opt.question_id = selected.question_id
+        AND opt.document_id = selected.document_id
+    CROSS JOIN LATERAL each(opt.label) label
+    WHERE selected.type IN ('dynamic_choice', 'dynamic_multiple_choice')
+    AND label.value <> ''
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caluma_form", "0051_answer_value_number"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            BACKFILL_SQL, reverse_sql="DELETE FROM caluma_form_answersearchtext"
+        ),
+    ]
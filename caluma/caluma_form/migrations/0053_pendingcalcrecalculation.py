@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caluma_form", "0052_answersearchtext_backfill"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingCalcRecalculation",
+            fields=[
+                (
+                    "question",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="caluma_form.question",
+                    ),
+                ),
+                ("queued_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,9 +1,14 @@
+from collections import defaultdict
+from decimal import Decimal
 from functools import wraps
 
 import uuid_extensions
 from django.contrib.postgres.fields import ArrayField
-from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
 from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.utils.functional import cached_property
 from localized_fields.fields import LocalizedField, LocalizedTextField
 from minio import S3Error
@@ -368,16 +373,62 @@ class Document(core_models.UUIDModel):
             ]
         }
         """
-        answers = {}
-        for answer in self.answers.all():
-            if answer.question.type == Question.TYPE_TABLE:
-                answers[answer.question_id] = [
-                    answer.flat_answer_map() for answer in answer.documents.all()
-                ]
-            else:
-                answers[answer.question_id] = answer.value or answer.date
+        return self.flat_answer_maps([self])[self.pk]
+
+    @staticmethod
+    def flat_answer_maps(documents, answers=None, row_documents=None):
+        """Return the flattened answer maps of the given documents, keyed by pk.
+
+        The answers and table rows are loaded for all documents at once, level
+        by level, so this takes two queries per level of nested tables
+        regardless of the number of documents and table rows.
+
+        `answers` and `row_documents` are querysets the answers and row
+        documents are taken from, e.g. to apply the visibilities.
+        """
+        if answers is None:
+            answers = Answer.objects.all()
+        answers = answers.select_related("question")
+
+        answers_by_document = defaultdict(list)
+        rows = defaultdict(list)
+        document_ids = {
+            Document._meta.pk.to_python(document.pk) for document in documents
+        }
+        while document_ids:
+            table_answers = []
+            for answer in answers.filter(document__in=document_ids):
+                answers_by_document[answer.document_id].append(answer)
+                if answer.question.type == Question.TYPE_TABLE:
+                    table_answers.append(answer.pk)
+
+            answer_documents = AnswerDocument.objects.filter(
+                answer__in=table_answers
+            ).order_by("-sort")
+            if row_documents is not None:
+                answer_documents = answer_documents.filter(document__in=row_documents)
+
+            document_ids = set()
+            for answer_id, document_id in answer_documents.values_list(
+                "answer_id", "document_id"
+            ):
+                rows[answer_id].append(document_id)
+                document_ids.add(document_id)
+
+        def flat_answer_map(document_id):
+            return {
+                answer.question_id: (
+                    [flat_answer_map(row) for row in rows[answer.pk]]
+                    if answer.question.type == Question.TYPE_TABLE
+                    else answer.value or answer.date
+                )
+                for answer in answers_by_document[document_id]
+            }
 
-        return answers
+        return {
+            document.pk: flat_answer_map(Document._meta.pk.to_python(document.pk))
+            for document in documents
+        }
 
     def set_family(self, root_doc):
         """Set the family to the given root_doc.
@@ -579,9 +630,12 @@ class Answer(core_models.BaseModel):
         Document, through="AnswerDocument", related_name="+"
     )
     date = models.DateField(null=True, blank=True)
+    # numeric values, so they can be compared and ordered using an index
+    value_number = models.FloatField(null=True, blank=True, editable=False)
 
     # override history to add extra fields on historical model
     history = HistoricalRecords(
+        excluded_fields=["value_number"],
         inherit=True,
         history_user_id_field=models.CharField(null=True, max_length=150),
         history_user_setter=core_models._history_user_setter,
@@ -589,6 +643,19 @@ class Answer(core_models.BaseModel):
         bases=[QuestionTypeHistoricalModel],
     )
 
+    def get_value_number(self):
+        """Return the value if it's a number, as stored in `value_number`."""
+        if isinstance(self.value, (int, float)) and not isinstance(self.value, bool):
+            return float(self.value)
+        return None
+
+    def save(self, *args, **kwargs):
+        self.value_number = self.get_value_number()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "value" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "value_number"}
+        super().save(*args, **kwargs)
+
     def delete(self, *args, **kwargs):
         # Files need to be deleted in sequence (not via on_delete)
         # so the deletion code on the storage is properly triggered
@@ -717,41 +784,68 @@ class Answer(core_models.BaseModel):
 
     @property
     def selected_options(self):
-        map = {
-            Question.TYPE_CHOICE: (Option, {"slug": self.value}),
-            Question.TYPE_MULTIPLE_CHOICE: (Option, {"slug__in": self.value}),
-            Question.TYPE_DYNAMIC_CHOICE: (
-                DynamicOption,
-                {
-                    "slug": self.value,
-                    "question": self.question,
-                    "document": self.document,
-                },
-            ),
-            Question.TYPE_DYNAMIC_MULTIPLE_CHOICE: (
-                DynamicOption,
-                {
-                    "slug__in": self.value,
-                    "question": self.question,
-                    "document": self.document,
-                },
-            ),
-        }
+        return self.get_selected_options([self])[self.pk]
 
-        if self.question.type not in map:
-            return None
+    @staticmethod
+    def get_selected_options(answers):
+        """Return the selected options of the given answers, keyed by answer pk.
 
-        if not self.value:
-            return []
+        The options are in the same order as the value. Answers to questions
+        without options get `None`. Only one query per kind of option is needed
+        for all answers together.
+        """
+        dynamic_types = (
+            Question.TYPE_DYNAMIC_CHOICE,
+            Question.TYPE_DYNAMIC_MULTIPLE_CHOICE,
+        )
+        option_types = (
+            Question.TYPE_CHOICE,
+            Question.TYPE_MULTIPLE_CHOICE,
+            *dynamic_types,
+        )
 
-        model, filters = map[self.question.type]
-        queryset = model.objects.filter(**filters)
+        def slugs(answer):
+            # multiple choice answers may hold a single slug as well
+            value = answer.value if isinstance(answer.value, list) else [answer.value]
+            # drop duplicates, but keep the order of the value
+            return list(dict.fromkeys(slug for slug in value if isinstance(slug, str)))
 
-        def index_from_value(obj):
-            return self.value.index(obj.slug)
+        selected = {
+            answer.pk: [] if answer.question.type in option_types else None
+            for answer in answers
+        }
+        answers = [
+            answer
+            for answer in answers
+            if answer.question.type in option_types and answer.value
+        ]
+        static_answers = [a for a in answers if a.question.type not in dynamic_types]
+        dynamic_answers = [a for a in answers if a.question.type in dynamic_types]
+
+        options = {}
+        if static_answers:
+            options.update(
+                (option.slug, option)
+                for option in Option.objects.filter(
+                    slug__in={slug for a in static_answers for slug in slugs(a)}
+                )
+            )
+        if dynamic_answers:
+            options.update(
+                ((option.slug, option.question_id, option.document_id), option)
+                for option in DynamicOption.objects.filter(
+                    slug__in={slug for a in dynamic_answers for slug in slugs(a)},
+                    question__in={a.question_id for a in dynamic_answers},
+                    document__in={a.document_id for a in dynamic_answers},
+                )
+            )
 
-        # Keep the same order as the value
-        return sorted(queryset, key=index_from_value)
+        for answer in answers:
+            keys = slugs(answer)
+            if answer.question.type in dynamic_types:
+                keys = [(key, answer.question_id, answer.document_id) for key in keys]
+            selected[answer.pk] = [options[key] for key in keys if key in options]
+        return selected
 
     def __repr__(self):
         return f"Answer(document={self.document!r}, question={self.question!r}, value={self.value!r})"
@@ -759,7 +853,138 @@ class Answer(core_models.BaseModel):
     class Meta:
         # a question may only be answerd once per document
         unique_together = ("document", "question")
-        indexes = [models.Index(fields=["date"]), GinIndex(fields=["meta", "value"])]
+        indexes = [
+            models.Index(fields=["date"]),
+            GinIndex(fields=["meta", "value"]),
+            # range lookups and orderings always concern a single question
+            models.Index(
+                fields=["question", "value_number"],
+                condition=models.Q(value_number__isnull=False),
+                name="answer_question_number_idx",
+            ),
+            models.Index(
+                fields=["question", "date"],
+                condition=models.Q(date__isnull=False),
+                name="answer_question_date_idx",
+            ),
+        ]
+
+
+class AnswerSearchText(models.Model):
+    """Searchable text of an answer, used by the `searchAnswers` filter.
+
+    Every answer to a searchable question gets one entry with its value as
+    text. Answers to choice questions get one entry per selected option and
+    language containing the option's label instead.
+    """
+
+    QUESTION_TYPES = (
+        Question.TYPE_TEXT,
+        Question.TYPE_TEXTAREA,
+        Question.TYPE_DATE,
+        Question.TYPE_CHOICE,
+        Question.TYPE_MULTIPLE_CHOICE,
+        Question.TYPE_DYNAMIC_CHOICE,
+        Question.TYPE_DYNAMIC_MULTIPLE_CHOICE,
+        Question.TYPE_INTEGER,
+        Question.TYPE_FLOAT,
+    )
+
+    # answers are multilingual, so words are indexed as they are (has to match
+    # the config of the index below)
+    SEARCH_CONFIG = "simple"
+
+    answer = models.ForeignKey(
+        Answer, on_delete=models.CASCADE, related_name="search_texts"
+    )
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="+")
+    # empty for texts which don't depend on the language
+    language = models.CharField(max_length=10, blank=True)
+    text = models.TextField()
+
+    @staticmethod
+    def number_text(value):
+        """Format the number the way PostgreSQL renders it from a `jsonb`.
+
+        Floats are stored as their `repr()`, which PostgreSQL reads as an
+        exact `numeric`, and renders without exponent or negative zero.
+        """
+        if isinstance(value, float):
+            return format(Decimal(repr(value + 0.0)), "f")
+        return str(value)
+
+    @classmethod
+    def get_texts(cls, answer, selected_options):
+        if answer.question.type in (Question.TYPE_TEXT, Question.TYPE_TEXTAREA):
+            return [("", answer.value)] if isinstance(answer.value, str) else []
+        if answer.question.type == Question.TYPE_DATE:
+            return [("", str(answer.date))] if answer.date else []
+        if answer.question.type in (Question.TYPE_INTEGER, Question.TYPE_FLOAT):
+            return (
+                [("", cls.number_text(answer.value))]
+                if answer.value is not None
+                else []
+            )
+
+        return [
+            (language, label)
+            for option in selected_options
+            for language, label in option.label.items()
+            if label
+        ]
+
+    @classmethod
+    def update_answers(cls, answers, created=False):
+        """Rebuild the search texts of the given answers.
+
+        Pass `created` for new answers, which don't have any search texts yet.
+        """
+        answers = [
+            answer
+            for answer in answers
+            if answer.document_id and answer.question.type in cls.QUESTION_TYPES
+        ]
+        selected_options = Answer.get_selected_options(answers)
+
+        if not created:
+            cls.objects.filter(answer__in=answers).delete()
+        cls.objects.bulk_create(
+            cls(
+                answer=answer,
+                question_id=answer.question_id,
+                language=language,
+                text=text,
+            )
+            for answer in answers
+            for language, text in cls.get_texts(answer, selected_options[answer.pk])
+        )
+
+    class Meta:
+        indexes = [
+            # Django compares case insensitively on the upper cased value
+            GinIndex(
+                OpClass(Upper("text"), name="gin_trgm_ops"),
+                name="answersearchtext_trgm",
+            ),
+            GinIndex(
+                SearchVector("text", config="simple"),
+                name="answersearchtext_vector",
+            ),
+        ]
+
+
+class PendingCalcRecalculation(models.Model):
+    """Calculated question whose answers still need to be recalculated.
+
+    Deferred recalculations (see `CALC_RECALCULATION_DEFERRED`) are recorded
+    here until they are finished, so they can be caught up on with the
+    `recalculate_calc_answers --pending` command if the process exits before.
+    """
+
+    question = models.OneToOneField(
+        Question, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+    queued_at = models.DateTimeField(default=timezone.now)
 
 
 def _ignore_missing_file(fn):
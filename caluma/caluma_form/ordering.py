@@ -1,7 +1,7 @@
 from typing import Any, Tuple
 
 from django import forms
-from django.db.models import OuterRef, Subquery
+from django.db.models import FilteredRelation, OuterRef, Q, Subquery
 from django.db.models.expressions import F
 from django.db.models.query import QuerySet
 from rest_framework import exceptions
@@ -33,8 +33,8 @@ class AnswerValueOrdering(CalumaOrdering):
         # Last, return a field corresponding to the value
         question = Question.objects.get(pk=value)
         QUESTION_TYPE_TO_FIELD = {
-            Question.TYPE_INTEGER: "value",
-            Question.TYPE_FLOAT: "value",
+            Question.TYPE_INTEGER: "value_number",
+            Question.TYPE_FLOAT: "value_number",
             Question.TYPE_DATE: "date",
             Question.TYPE_CHOICE: "value",
             Question.TYPE_TEXTAREA: "value",
@@ -50,15 +50,31 @@ class AnswerValueOrdering(CalumaOrdering):
                 f"Question '{question.slug}' has unsupported type {question.type} for ordering"
             )
 
-        answers_subquery = Subquery(
-            Answer.objects.filter(
-                question=question,
-                document=OuterRef(f"{self._document_locator_prefix}pk"),
-            ).values(value_field)
-        )
+        prefix = self._document_locator_prefix
         ann_name = f"order_{value}"
 
-        qs = qs.annotate(**{ann_name: answers_subquery})
+        if question.type == Question.TYPE_FILES:
+            # an answer may have multiple files, which a join would multiply
+            answers_subquery = Subquery(
+                Answer.objects.filter(
+                    question=question,
+                    document=OuterRef(f"{prefix}pk"),
+                ).values(value_field)
+            )
+            qs = qs.annotate(**{ann_name: answers_subquery})
+            return qs, F(ann_name)
+
+        # Join the answer (there is at most one per document and question),
+        # so typed columns are ordered on directly, and their indexes apply.
+        # The slug may not be valid as (unquoted) table alias, so the joined
+        # relation is numbered instead
+        relation_name = f"order_answer_{len(qs.query.annotations)}"
+        condition = Q(**{f"{prefix}answers__question": question})
+        if value_field != "value":
+            condition &= Q(**{f"{prefix}answers__{value_field}__isnull": False})
+        qs = qs.annotate(
+            **{relation_name: FilteredRelation(f"{prefix}answers", condition=condition)}
+        ).annotate(**{ann_name: F(f"{relation_name}__{value_field}")})
 
         # TODO: respect document_via
         return qs, F(ann_name)
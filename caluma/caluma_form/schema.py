@@ -1,4 +1,9 @@
+from datetime import date
+from itertools import chain
+from uuid import UUID
+
 import graphene
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from graphene import relay
 from graphene.types import ObjectType, generic
@@ -12,6 +17,7 @@ from ..caluma_core.filters import (
     DjangoFilterInterfaceConnectionField,
     InterfaceMetaFactory,
 )
+from ..caluma_core.loaders import get_loader, load_related_list, set_siblings
 from ..caluma_core.mutation import Mutation, UserDefinedPrimaryKeyMixin
 from ..caluma_core.relay import extract_global_id
 from ..caluma_core.types import (
@@ -25,7 +31,7 @@ from ..caluma_data_source.data_source_handlers import get_data_source_data
 from ..caluma_data_source.schema import DataSourceDataConnection
 from . import filters, models, serializers, structure
 from .format_validators import get_format_validators
-from .validators import DocumentValidator, get_validity
+from .validators import DocumentValidator, get_validities, get_validity
 
 
 def resolve_answer(answer):
@@ -39,6 +45,14 @@ def resolve_answer(answer):
     return QUESTION_ANSWER_TYPES[answer.question.type]
 
 
+def load_selected_options(answer, info):
+    def batch_load(answers):
+        selected = models.Answer.get_selected_options(answers.values())
+        return {key: selected[answer.pk] for key, answer in answers.items()}
+
+    return get_loader(info, "Answer.selected_options", batch_load).load(answer)
+
+
 def resolve_question(question):
     return QUESTION_OBJECT_TYPES[question.type]
 
@@ -821,6 +835,11 @@ class Answer(Node, graphene.Interface):
 
     resolve_question = suppressable_visibility_resolver()
 
+    deferrable_fields = {
+        "value": ["value", "selected_option", "selected_options"],
+        "meta": ["meta"],
+    }
+
     @classmethod
     def resolve_type(cls, instance, info):
         return resolve_answer(instance)
@@ -841,7 +860,7 @@ class IntegerAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "files", "date")
+        exclude = ("document", "documents", "files", "date", "value_number")
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -851,7 +870,7 @@ class FloatAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "files", "date")
+        exclude = ("document", "documents", "files", "date", "value_number")
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -864,7 +883,7 @@ class DateAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "files")
+        exclude = ("document", "documents", "files", "value_number")
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -884,12 +903,12 @@ class StringAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
     selected_option = graphene.Field(SelectedOption)
 
     def resolve_selected_option(self, info, **args):
-        selected_options = self.selected_options
+        selected_options = load_selected_options(self, info)
         return selected_options[0] if selected_options else None
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "files", "date")
+        exclude = ("document", "documents", "files", "date", "value_number")
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -898,9 +917,12 @@ class ListAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
     value = graphene.List(graphene.String)
     selected_options = ConnectionField(SelectedOptionConnection)
 
+    def resolve_selected_options(self, info, **args):
+        return load_selected_options(self, info)
+
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "files", "date")
+        exclude = ("document", "documents", "files", "date", "value_number")
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -910,6 +932,17 @@ class AnswerConnection(CountableConnectionBase):
         node = Answer
 
 
+def serialize_flat_answer_map(value):
+    """Convert the dates of a flat answer map, which JSON doesn't support."""
+    if isinstance(value, dict):
+        return {key: serialize_flat_answer_map(val) for key, val in value.items()}
+    if isinstance(value, list):
+        return [serialize_flat_answer_map(val) for val in value]
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
 class Document(FormDjangoObjectType):
     answers = DjangoFilterInterfaceConnectionField(
         AnswerConnection,
@@ -922,12 +955,35 @@ class Document(FormDjangoObjectType):
     modified_content_at = graphene.DateTime()
     modified_content_by_user = graphene.String()
     modified_content_by_group = graphene.String()
+    flat_answer_map = generic.GenericScalar(
+        description="All answers of the document, keyed by question slug. "
+        "Table answers hold a list of the flattened answers of their rows."
+    )
 
     resolve_form = suppressable_visibility_resolver()
     resolve_case = suppressable_visibility_resolver()
     resolve_source = suppressable_visibility_resolver()
     resolve_work_item = suppressable_visibility_resolver()
 
+    deferrable_fields = {"meta": ["meta"]}
+
+    def resolve_flat_answer_map(self, info, **args):
+        def batch_load(documents):
+            flat_answer_maps = models.Document.flat_answer_maps(
+                documents.values(),
+                answers=Answer.get_queryset(models.Answer.objects.all(), info),
+                row_documents=Document.get_queryset(
+                    models.Document.objects.all(), info
+                ),
+            )
+            return {
+                key: flat_answer_maps[document.pk]
+                for key, document in documents.items()
+            }
+
+        flat_answer_map = get_loader(info, "Document.flat_answer_map", batch_load)
+        return serialize_flat_answer_map(flat_answer_map.load(self))
+
     class Meta:
         model = models.Document
         exclude = ("family", "dynamicoption_set")
@@ -939,11 +995,22 @@ class TableAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
     value = graphene.List(Document)
 
     def resolve_value(self, info, **args):
-        return self.documents.order_by("-answerdocument__sort")
+        def batch_load(answers):
+            rows = {pk: [] for pk in answers}
+            for answer_document in (
+                models.AnswerDocument.objects.filter(answer__in=answers)
+                .select_related("document")
+                .order_by("-sort")
+            ):
+                rows[answer_document.answer_id].append(answer_document.document)
+            set_siblings(chain.from_iterable(rows.values()))
+            return rows
+
+        return get_loader(info, "TableAnswer.value", batch_load).load(self)
 
     class Meta:
         model = models.Answer
-        exclude = ("documents", "files", "date")
+        exclude = ("documents", "files", "date", "value_number")
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -964,11 +1031,17 @@ class FilesAnswer(AnswerQuerysetMixin, FormDjangoObjectType):
     value = graphene.List(File, required=True)
 
     def resolve_value(self, info, **args):
-        return self.files.all()
+        return load_related_list(
+            info,
+            self,
+            models.File._meta.get_field("answer"),
+            lambda queryset: queryset,
+            name="FilesAnswer.value",
+        )
 
     class Meta:
         model = models.Answer
-        exclude = ("document", "documents", "date", "files")
+        exclude = ("document", "documents", "date", "files", "value_number")
         use_connection = False
         interfaces = (Answer, graphene.Node)
 
@@ -1199,15 +1272,24 @@ def validate(qs, info, global_id, **kwargs):
     result = get_validity(
         get_object_or_404(qs, pk=extract_global_id(global_id)),
         info.context.user,
+        request=info.context,
         **kwargs,
     )
 
-    errors = result.pop("errors")
-    result = ValidationResult(
-        **result, errors=[ValidationEntry(**err) for err in errors]
-    )
+    return [validation_result(result)]
+
+
+def _normalize_uuid(pk):
+    """Return the canonical form of the given UUID, or None if it is invalid."""
+    try:
+        return str(UUID(pk))
+    except ValueError:
+        return None
+
 
-    return [result]
+def validation_result(result):
+    errors = result.pop("errors")
+    return ValidationResult(**result, errors=[ValidationEntry(**err) for err in errors])
 
 
 class Query:
@@ -1253,6 +1335,17 @@ class Query:
         data_source_context=graphene.JSONString(),
     )
 
+    documents_validity = ConnectionField(
+        DocumentValidityConnection,
+        ids=graphene.List(graphene.NonNull(graphene.ID), required=True),
+        data_source_context=graphene.JSONString(),
+        description=(
+            "The validity of many documents at once, in the order of the given "
+            "IDs. The structure of all their families is loaded in one go. "
+            "Fails if any of the documents doesn't exist or isn't visible."
+        ),
+    )
+
     document_global_jexl_context = generic.GenericScalar(
         id=graphene.ID(required=True),
         description=(
@@ -1274,6 +1367,28 @@ class Query:
             **kwargs,
         )
 
+    def resolve_documents_validity(self, info, ids, **kwargs):
+        pks = [_normalize_uuid(extract_global_id(global_id)) for global_id in ids]
+        documents = {
+            str(document.pk): document
+            for document in Document.get_queryset(
+                models.Document.objects.filter(pk__in=[pk for pk in pks if pk]), info
+            )
+        }
+        # like `documentValidity`, fail instead of leaving out documents
+        missing = [global_id for global_id, pk in zip(ids, pks) if pk not in documents]
+        if missing:
+            raise Http404(f"No Document matches the given IDs: {', '.join(missing)}")
+
+        results = get_validities(
+            [documents[pk] for pk in pks],
+            info.context.user,
+            request=info.context,
+            **kwargs,
+        )
+
+        return [validation_result(result) for result in results]
+
     def resolve_answer_validity(self, info, id, **kwargs):
         return validate(
             Answer.get_queryset(models.Answer.objects.all(), info),
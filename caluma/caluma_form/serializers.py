@@ -15,7 +15,7 @@ from rest_framework.serializers import (
 from caluma.caluma_form.exceptions import CustomFormatValidationError
 
 from ..caluma_core import serializers
-from . import domain_logic, models, validators
+from . import domain_logic, models, structure, validators
 from .jexl import QuestionJexl
 
 
@@ -83,6 +83,8 @@ class AddFormQuestionSerializer(serializers.ModelSerializer):
                 models.FormQuestion.objects.filter(
                     form=instance, question=question
                 ).update(sort=sort)
+            # bulk updates don't send any signals
+            structure.form_structure_cache.invalidate()
 
         return instance
 
@@ -133,6 +135,8 @@ class ReorderFormQuestionsSerializer(serializers.ModelSerializer):
             models.FormQuestion.objects.filter(form=instance, question=question).update(
                 sort=sort
             )
+        # bulk updates don't send any signals
+        structure.form_structure_cache.invalidate()
 
         return instance
 
@@ -590,6 +594,7 @@ class SaveAnswerSerializer(serializers.ModelSerializer):
                 self.instance,
                 True,
                 data.pop("data_source_context", None),
+                self.context["request"],
             )
         except CustomFormatValidationError as exc:
             detail = exc.detail[0]
@@ -599,13 +604,19 @@ class SaveAnswerSerializer(serializers.ModelSerializer):
 
     @transaction.atomic
     def create(self, validated_data):
+        # Passing the request lets validation and recalculation share the
+        # structure of the document's family, so it's built at most once
         return domain_logic.SaveAnswerLogic.create(
-            validated_data, user=self.context["request"].user
+            validated_data,
+            user=self.context["request"].user,
+            request=self.context["request"],
         )
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        return domain_logic.SaveAnswerLogic.update(instance, validated_data)
+        return domain_logic.SaveAnswerLogic.update(
+            instance, validated_data, request=self.context["request"]
+        )
 
     class Meta:
         model = models.Answer
@@ -1,4 +1,10 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.db.models.signals import (
+    m2m_changed,
     post_delete,
     post_init,
     post_save,
@@ -11,13 +17,12 @@ from simple_history.signals import pre_create_historical_record
 from caluma.caluma_core.events import filter_events
 from caluma.utils import disable_raw
 
-from . import models
+from . import models, structure
 from .calc_questions import (
+    mark_calc_question_pending,
+    recalculate_calc_question,
+    recalculate_calc_question_deferred,
     update_calc_dependents,
-    update_or_create_calc_answer,
-)
-from .utils import (
-    forms_containing_question,
 )
 
 
@@ -61,6 +66,111 @@ def set_document_family(sender, instance, **kwargs):
     instance.family = instance
 
 
+# Invalidate the form structure cache
+#
+# The FastLoader keeps the form side of the structure cached across requests,
+# so any change in a form definition needs to drop it. This also applies to
+# raw saves (loaddata), as those change the definitions just the same.
+
+
+@receiver(post_save, sender=models.Form)
+@receiver(post_delete, sender=models.Form)
+@receiver(post_save, sender=models.Question)
+@receiver(post_delete, sender=models.Question)
+@receiver(post_save, sender=models.FormQuestion)
+@receiver(post_delete, sender=models.FormQuestion)
+@receiver(m2m_changed, sender=models.FormQuestion)
+@receiver(post_save, sender=models.Option)
+@receiver(post_delete, sender=models.Option)
+@receiver(post_save, sender=models.QuestionOption)
+@receiver(post_delete, sender=models.QuestionOption)
+@receiver(m2m_changed, sender=models.QuestionOption)
+def invalidate_form_structure_cache(sender, **kwargs):
+    structure.form_structure_cache.invalidate()
+
+
+# Update the search texts of answers
+#
+# The texts searched by `searchAnswers` are maintained whenever an answer or
+# the label of one of its selected options changes. Raw saves are skipped, use
+# the `update_answer_search_texts` command after loading data.
+
+
+@receiver(post_save, sender=models.Answer)
+@disable_raw
+@filter_events(
+    lambda instance: instance.question.type in models.AnswerSearchText.QUESTION_TYPES
+)
+def update_search_texts(sender, instance, created, **kwargs):
+    models.AnswerSearchText.update_answers([instance], created=created)
+
+
+@receiver(pre_save, sender=models.Option)
+@disable_raw
+def save_option_label_changed(sender, instance, **kwargs):
+    original_label = (
+        models.Option.objects.filter(pk=instance.pk)
+        .values_list("label", flat=True)
+        .first()
+    )
+    instance.label_changed = (
+        original_label is not None and original_label != instance.label
+    )
+
+
+@receiver(post_save, sender=models.Option)
+@disable_raw
+@filter_events(lambda instance: getattr(instance, "label_changed", False))
+def update_search_texts_from_option(sender, instance, **kwargs):
+    _update_option_search_texts(instance, instance.questions.all())
+
+
+@receiver(pre_delete, sender=models.Option)
+def save_option_questions(sender, instance, **kwargs):
+    # the questions are unlinked by the time the option is deleted
+    instance.question_ids = list(instance.questions.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=models.Option)
+def update_search_texts_on_option_delete(sender, instance, **kwargs):
+    _update_option_search_texts(instance, getattr(instance, "question_ids", []))
+
+
+@receiver(post_save, sender=models.DynamicOption)
+@disable_raw
+def update_search_texts_from_dynamic_option(sender, instance, **kwargs):
+    _update_dynamic_option_search_texts(instance)
+
+
+@receiver(post_delete, sender=models.DynamicOption)
+def update_search_texts_on_dynamic_option_delete(sender, instance, **kwargs):
+    # dynamic options are deleted along with their document, wait until the
+    # answers are gone as well
+    transaction.on_commit(partial(_update_dynamic_option_search_texts, instance))
+
+
+def _update_dynamic_option_search_texts(dynamic_option):
+    models.AnswerSearchText.update_answers(
+        models.Answer.objects.filter(
+            question_id=dynamic_option.question_id,
+            document_id=dynamic_option.document_id,
+        ).select_related("question")
+    )
+
+
+def _update_option_search_texts(option, questions):
+    models.AnswerSearchText.update_answers(
+        models.Answer.objects.filter(
+            Q(value=option.slug) | Q(value__contains=[option.slug]),
+            question__in=questions,
+            question__type__in=[
+                models.Question.TYPE_CHOICE,
+                models.Question.TYPE_MULTIPLE_CHOICE,
+            ],
+        ).select_related("question")
+    )
+
+
 # Update calc dependents on pre_save
 #
 # Every question that is referenced in a `calcExpression` will memoize the
@@ -167,14 +277,10 @@ def _recalculate_dependents(question):
 
 
 def _recalculate_all_questions(question):
-    forms = forms_containing_question(question)
-    seen_family_ids = set()
-    for document in (
-        models.Document.objects.filter(form__in=forms)
-        .select_related("family")
-        .only("family")
-        .iterator()
-    ):
-        if document.family.pk not in seen_family_ids:
-            update_or_create_calc_answer(question, document.family)
-        seen_family_ids.add(document.family.pk)
+    if settings.CALC_RECALCULATION_DEFERRED:
+        mark_calc_question_pending(question.slug)
+        transaction.on_commit(
+            partial(recalculate_calc_question_deferred, question.slug)
+        )
+    else:
+        recalculate_calc_question(question)
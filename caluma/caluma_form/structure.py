@@ -19,6 +19,7 @@ from __future__ import annotations
 import collections
 import copy
 import itertools
+import threading
 import typing
 import weakref
 from abc import ABC
@@ -28,6 +29,11 @@ from dataclasses import dataclass, field
 from functools import singledispatch, wraps
 from logging import getLogger
 from typing import Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
 
 from caluma.caluma_core import exceptions
 
@@ -50,33 +56,78 @@ from caluma.caluma_form.models import (
 log = getLogger(__name__)
 
 
+class MemoTable:
+    """Memoised results of a single object, see `object_local_memoise`."""
+
+    __slots__ = ("values", "hit_count", "miss_count")
+
+    def __init__(self):
+        self.values = {}
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def __len__(self):
+        return len(self.values)
+
+
+class MemoStats:
+    """Hit / miss counter of a memoised method, see `memoise_stats()`."""
+
+    __slots__ = ("name", "hit_count", "miss_count")
+
+    def __init__(self, name):
+        self.name = name
+        self.hit_count = 0
+        self.miss_count = 0
+
+
+_memoised_methods: list[MemoStats] = []
+
+
 def object_local_memoise(method):
     """Decorate a method to become object-local memoised.
 
     In other words - The method will cache it's results. If the method is called
     twice with the same arguments, it will return the cached result instead.
 
+    The results are keyed by a precomputed method id along with the (hashable)
+    arguments. Unhashable arguments fall back to their `repr()`.
+
     For debugging purposes, you can also set `object_local_memoise.enabled`
     to `False`, which will then behave just as if the memoising didn't happen.
     """
+    method_id = len(_memoised_methods)
+    stats = MemoStats(method.__qualname__)
+    _memoised_methods.append(stats)
 
     @wraps(method)
     def new_method(self, *args, **kwargs):
         if not object_local_memoise.enabled:  # pragma: no cover
             # for debugging purposes
             return method(self, *args, **kwargs)
-        if not hasattr(self, "_memoise"):
-            clear_memoise(self)
+        try:
+            table = self._memoise
+        except AttributeError:
+            table = clear_memoise(self)
+
+        key = (method_id, args, tuple(kwargs.items())) if kwargs else (method_id, args)
+        values = table.values
+        try:
+            found = key in values
+        except TypeError:
+            key = repr(key)
+            found = key in values
 
-        key = str([args, kwargs, method])
-        if key in self._memoise:
+        if found:
             object_local_memoise.hit_count += 1
-            self._memoise_hit_count += 1
-            return self._memoise[key]
+            table.hit_count += 1
+            stats.hit_count += 1
+            return values[key]
         ret = method(self, *args, **kwargs)
-        self._memoise_miss_count += 1
         object_local_memoise.miss_count += 1
-        self._memoise[key] = ret
+        table.miss_count += 1
+        stats.miss_count += 1
+        values[key] = ret
         return ret
 
     return new_method
@@ -90,15 +141,173 @@ setattr(object_local_memoise, "hit_count", 0)
 setattr(object_local_memoise, "miss_count", 0)
 
 
-def clear_memoise(obj):
+def memoise_stats() -> dict:
+    """Return the hit / miss counts of the memoised methods.
+
+    Intended for exporting to a metrics system, or for analysing the
+    effectiveness of the memoisation.
+    """
+    return {
+        "hit_count": object_local_memoise.hit_count,
+        "miss_count": object_local_memoise.miss_count,
+        "methods": {
+            stats.name: {"hit_count": stats.hit_count, "miss_count": stats.miss_count}
+            for stats in _memoised_methods
+        },
+    }
+
+
+def clear_memoise(obj) -> MemoTable:
     """Clear memoise cache for given object.
 
     If an object uses the `@object_local_memoise` decorator, you can then
     call `clear_memoise()` on that object to clear all it's cached data.
     """
-    obj._memoise = {}
-    obj._memoise_hit_count = 0
-    obj._memoise_miss_count = 0
+    obj._memoise = MemoTable()
+    return obj._memoise
+
+
+@dataclass
+class CachedForm:
+    """The immutable, document-independent part of a form's structure."""
+
+    form: Form
+    questions: list[Question]
+    options: dict[str, list[Option]]
+    # question -> expression property -> referenced question slugs
+    references: dict[str, dict[str, set[str]]]
+
+    def copy(self) -> CachedForm:
+        """Return a copy with their own model instances.
+
+        Only the model instances are copied, without any cached relations.
+        Their field values and the references are shared, and must not be
+        changed in place.
+        """
+        return CachedForm(
+            form=_copy_instance(self.form),
+            questions=[_copy_instance(question) for question in self.questions],
+            options={
+                question_id: [_copy_instance(option) for option in options]
+                for question_id, options in self.options.items()
+            },
+            references=self.references,
+        )
+
+
+def _copy_instance(instance):
+    new = copy.copy(instance)
+    new._state.fields_cache = {}
+    new.__dict__.pop("_prefetched_objects_cache", None)
+    return new
+
+
+class FormStructureCache:
+    """Process-wide cache of the form side of the structure.
+
+    Form definitions change very rarely compared to how often documents are
+    validated, but loading them (and parsing all the JEXL expressions to build
+    the dependency graph) is the most expensive part of the FastLoader for big
+    forms. This cache keeps the loaded forms, questions and options around
+    across requests.
+
+    Invalidation works via a version token stored in Django's cache. Whenever
+    a form definition changes, the token is replaced, and every process drops
+    its local entries on the next lookup. This means that a shared cache
+    backend (memcached for example) is required if Caluma runs in multiple
+    processes.
+
+    Within a transaction that modified any form definition, the cache is
+    bypassed, so uncommitted (and possibly rolled back) changes never leak
+    into the process-wide cache.
+
+    Every lookup gets its own copy of the model instances (see
+    `CachedForm.copy()`), as they are mutated while building structures
+    (cached relations, fields set on them), so concurrent requests must never
+    share them. Copying just the instances is a lot cheaper than copying
+    the entries as a whole.
+    """
+
+    VERSION_KEY = "caluma_form_structure_cache_version"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._forms: dict[str, CachedForm] = {}
+
+    def is_enabled(self):
+        if not settings.FORM_STRUCTURE_CACHE:
+            return False
+
+        if getattr(connection, "caluma_form_structure_changed", False):
+            if connection.in_atomic_block:
+                return False
+            connection.caluma_form_structure_changed = False
+
+        return True
+
+    def get_version(self):
+        version = cache.get(self.VERSION_KEY)
+        if version is None:
+            # Token missing (first use, or evicted): Any previously cached
+            # data must be considered stale
+            cache.add(self.VERSION_KEY, uuid4().hex, timeout=None)
+            version = cache.get(self.VERSION_KEY)
+        return version
+
+    def get_forms(self, form_ids) -> tuple[str, dict[str, CachedForm]]:
+        """Return the current version and the cached entries of the given forms.
+
+        The version needs to be passed back to `store()` when adding newly
+        loaded forms, so data loaded during an invalidation is discarded.
+        """
+        version = self.get_version()
+        with self._lock:
+            if version != self._version:
+                self._forms = {}
+                self._version = version
+            cached = {
+                form_id: self._forms[form_id]
+                for form_id in form_ids
+                if form_id in self._forms
+            }
+        return version, {
+            form_id: cached_form.copy() for form_id, cached_form in cached.items()
+        }
+
+    def store(self, version, cached_forms: Iterable[CachedForm]):
+        # the loader keeps using the given instances
+        copies = {
+            cached_form.form.pk: cached_form.copy() for cached_form in cached_forms
+        }
+        with self._lock:
+            if version != self._version:
+                # Invalidated while loading, so the data might be stale already
+                return
+            self._forms.update(copies)
+
+    def clear(self):
+        with self._lock:
+            self._forms = {}
+            self._version = None
+
+    def invalidate(self):
+        """Invalidate the cache in all processes.
+
+        The invalidation is repeated after the current transaction commits, as
+        other processes may have loaded the old definitions in the meantime.
+        """
+        self._invalidate_version()
+        if connection.in_atomic_block:
+            connection.caluma_form_structure_changed = True
+            transaction.on_commit(self._invalidate_version)
+
+    def _invalidate_version(self):
+        cache.set(self.VERSION_KEY, uuid4().hex, timeout=None)
+        self.clear()
+
+
+form_structure_cache = FormStructureCache()
 
 
 class FastLoader:
@@ -181,9 +390,31 @@ class FastLoader:
             lambda: defaultdict(list)
         )
 
-    def _store_question(self, question):
+        # Jexl expression -> what it's result depends on (see
+        # `QuestionJexl.classify()`)
+        self._expression_kinds: dict[str, str] = {}
+
+    def _store_question(self, question, references=None):
         self._questions[question.pk] = question
+        self.expression_kind(question.is_hidden)
+        self.expression_kind(question.is_required)
+
+        if references is None:
+            references = self._extract_references(question)
+
+        for expr_property, referenced_questions in references.items():
+            for dependency_slug in referenced_questions:
+                self._jexl_dependencies[dependency_slug][question.pk].append(
+                    expr_property
+                )
+        return references
+
+    def _extract_references(self, question):
+        """Return the questions referenced in the given question's expressions.
 
+        Return format is a dict of expression property -> set of question slugs.
+        """
+        references = {}
         # Build a comprehensive dependency graph for all JEXL expressions
         for expr_property in ["is_hidden", "calc_expression", "is_required"]:
             jexl_expr = getattr(question, expr_property)
@@ -192,16 +423,26 @@ class FastLoader:
                 continue
             # Evaluator is only used for extracting answer transforms & friends,
             # so is field-independent here
-            referenced_questions = set(
+            references[expr_property] = set(
                 itertools.chain(
                     self._evaluator.extract_referenced_questions(jexl_expr),
                     self._evaluator.extract_referenced_mapby_questions(jexl_expr),
                 )
             )
-            for dependency_slug in referenced_questions:
-                self._jexl_dependencies[dependency_slug][question.pk].append(
-                    expr_property
-                )
+        return references
+
+    def expression_kind(self, expression) -> str:
+        """Return what the result of the given expression depends on.
+
+        Expressions that don't depend on any answers only need to be evaluated
+        once per document (and form location), see `BaseField.evaluate_jexl()`.
+        """
+        try:
+            return self._expression_kinds[expression]
+        except KeyError:
+            kind = self._evaluator.classify(expression)
+            self._expression_kinds[expression] = kind
+            return kind
 
     def dependents_of_question(self, slug):
         """Return the dependents of the given question.
@@ -218,13 +459,62 @@ class FastLoader:
         return self._jexl_dependencies[slug]
 
     def _load_form_entities(self, known_forms):
+        form_cache = form_structure_cache if form_structure_cache.is_enabled() else None
+        version = None
+        collected_forms = set()
+
+        if form_cache:
+            version, cached_forms = form_cache.get_forms(known_forms)
+            for cached_form in cached_forms.values():
+                collected_forms.update(self._store_cached_form(cached_form))
+            known_forms = set(known_forms) - set(cached_forms)
+
+        if known_forms:
+            collected_forms.update(
+                self._query_form_entities(known_forms, form_cache, version)
+            )
+
+        newly_collected_forms = collected_forms - set(self._forms.keys())
+        if newly_collected_forms:
+            self._load_form_entities(list(newly_collected_forms))
+
+    def _store_cached_form(self, cached_form: CachedForm):
+        """Add a form from the form structure cache.
+
+        Return the sub and row forms referenced by the form's questions.
+        """
+        form_id = cached_form.form.pk
+        self._forms[form_id] = cached_form.form
+        self._questions_by_form[form_id] = list(cached_form.questions)
+
+        collected_forms = set()
+        for question in cached_form.questions:
+            self._store_question(question, cached_form.references[question.pk])
+
+            if question.type == Question.TYPE_TABLE:
+                collected_forms.add(question.row_form_id)
+            if question.type == Question.TYPE_FORM:
+                collected_forms.add(question.sub_form_id)
+
+        for question_id, options in cached_form.options.items():
+            if question_id not in self._question_options:
+                self._question_options[question_id] = list(options)
+
+        return collected_forms
+
+    def _query_form_entities(self, known_forms, form_cache=None, version=None):
+        """Load the given forms from the database.
+
+        Return the sub and row forms referenced by the form's questions.
+        """
         form_questions = (
             FormQuestion.objects.filter(form__in=known_forms)
             .select_related("question")
             .select_related("form")
             .order_by("-sort")
         )
-        choice_questions = []
+        choice_questions = set()
+        references = {}
 
         collected_forms = set()
 
@@ -234,7 +524,7 @@ class FastLoader:
 
             # This is already pre-sorted, so we can naively append() here
             self._questions_by_form[fq.form_id].append(fq.question)
-            self._store_question(fq.question)
+            references[fq.question.pk] = self._store_question(fq.question)
 
             if fq.question.type == Question.TYPE_TABLE:
                 collected_forms.add(fq.question.row_form_id)
@@ -246,7 +536,7 @@ class FastLoader:
                 Question.TYPE_CHOICE,
                 Question.TYPE_MULTIPLE_CHOICE,
             ]:
-                choice_questions.append(fq.question.pk)
+                choice_questions.add(fq.question.pk)
 
         # It could be that the requested forms don't have any questions. We'd still
         # need to add them to our "known" set.
@@ -259,7 +549,7 @@ class FastLoader:
 
         if choice_questions:
             already_have_options = set(self._question_options.keys())
-            newly_needed = set(choice_questions) - already_have_options
+            newly_needed = choice_questions - already_have_options
             for qo in (
                 QuestionOption.objects.filter(question__in=newly_needed)
                 .order_by("-sort")
@@ -267,9 +557,29 @@ class FastLoader:
             ):
                 self._question_options[qo.question_id].append(qo.option)
 
-        newly_collected_forms = collected_forms - set(self._forms.keys())
-        if newly_collected_forms:
-            self._load_form_entities(list(newly_collected_forms))
+        if form_cache:
+            form_cache.store(
+                version,
+                (
+                    CachedForm(
+                        form=self._forms[form_id],
+                        questions=list(self._questions_by_form[form_id]),
+                        options={
+                            question.pk: list(self._question_options[question.pk])
+                            for question in self._questions_by_form[form_id]
+                            if question.pk in choice_questions
+                        },
+                        references={
+                            question.pk: references[question.pk]
+                            for question in self._questions_by_form[form_id]
+                        },
+                    )
+                    for form_id in known_forms
+                    if form_id in self._forms
+                ),
+            )
+
+        return collected_forms
 
     def _load_document_entities(self, documents):
         # First: All Documents - These are fetchable via zero JOINs
@@ -325,6 +635,83 @@ class FastLoader:
         for do in DynamicOption.objects.filter(document__in=self._documents):
             self._dynamic_options_by_question[do.question_id][do.slug] = do
 
+    def update_answer(self, answer: Answer):
+        """Update the given (saved) answer in the loaded data.
+
+        This is used to keep the loader in sync when patching an existing
+        structure, instead of loading everything again. Related data that may
+        change along with the answer (files, dynamic options) is reloaded.
+        """
+        self._answers[str(answer.pk)] = answer
+        self._answers_by_document[str(answer.document_id)][answer.question_id] = answer
+
+        question = self._questions.get(answer.question_id)
+        if question and question.type == Question.TYPE_FILES:
+            self._files_by_answer[str(answer.pk)] = list(
+                File.objects.filter(answer=answer).order_by("created_at")
+            )
+        elif question and question.type in (
+            Question.TYPE_DYNAMIC_CHOICE,
+            Question.TYPE_DYNAMIC_MULTIPLE_CHOICE,
+        ):
+            self._dynamic_options_by_question[question.pk].update(
+                {
+                    do.slug: do
+                    for do in DynamicOption.objects.filter(
+                        question=question, document=answer.document_id
+                    )
+                }
+            )
+
+    def refresh_table_rows(self, answer: Answer):
+        """Reload the rows of the given table answer.
+
+        Row documents that were not part of the loaded data yet are loaded
+        along with their answers (including nested table rows).
+        """
+        answer_documents = list(
+            AnswerDocument.objects.filter(answer=answer).order_by("-sort")
+        )
+        self._table_rows_by_answer[str(answer.pk)] = [
+            str(ad.document_id) for ad in answer_documents
+        ]
+
+        new_documents = {
+            str(ad.document_id)
+            for ad in answer_documents
+            if str(ad.document_id) not in self._documents
+        }
+        while new_documents:
+            self._documents.update(
+                {
+                    str(document.pk): document
+                    for document in Document.objects.filter(
+                        pk__in=new_documents
+                    ).select_related(*self.VALIDATION_CONTEXT_RELATIONS)
+                }
+            )
+            self._load_answers(new_documents)
+
+            for file in File.objects.filter(
+                answer__document__in=new_documents
+            ).order_by("answer_id", "created_at"):
+                self._files_by_answer[str(file.answer_id)].append(file)
+
+            for do in DynamicOption.objects.filter(document__in=new_documents):
+                self._dynamic_options_by_question[do.question_id][do.slug] = do
+
+            nested_rows = AnswerDocument.objects.filter(
+                answer__document__in=new_documents
+            ).order_by("answer_id", "-sort")
+            new_documents = set()
+            for ad in nested_rows:
+                self._answerdocuments[str(ad.pk)] = ad
+                self._table_rows_by_answer[str(ad.answer_id)].append(
+                    str(ad.document_id)
+                )
+                if str(ad.document_id) not in self._documents:
+                    new_documents.add(str(ad.document_id))
+
     def question_for_answer(self, answer_id):
         ans = self._answers[str(answer_id)]
         return self._questions[ans.question_id]
@@ -504,6 +891,13 @@ class BaseField(ABC):
         Note: If there are no dependencies, we return False. Question slugs
         referring to missing fields are ignored.
         """
+        # deferred import to avoid circular dependency
+        from caluma.caluma_form.jexl import QuestionJexl
+
+        if self._fastloader.expression_kind(expr) != QuestionJexl.EXPRESSION_ANSWER:
+            # No answers involved, so there are no dependencies to check
+            return False
+
         dependencies = list(self.get_evaluator().extract_referenced_questions(expr))
         dep_fields = {
             dep: self.get_field(dep) for dep in dependencies if self.get_field(dep)
@@ -593,23 +987,27 @@ class BaseField(ABC):
                 return fld
         return None
 
-    def refresh(self, answer=None, recursive=True):
+    def refresh(self, answer=None, recursive=True, reload_dependents=True):
         """Refresh this field's answer.
 
         If an answer is given, use it and update the structure in-place.
         Otherwise, look in the DB.
 
-        Also clear out all the caches on our own field as well as all
-        the calc dependents.
+        Also clear out all the caches on our own field as well as on everything
+        that depends on it (see `clear_dependent_memoise()`).
 
         Note: Saving the answer is the caller's responsibility, we only
         update the structure in-memory.
 
-        By default, this will also refresh all calculated questions that
-        depend on this field. If you know what you're doing, you can speed
-        things up by passing `recursive=False` here. It is then your
-        responsibility to refresh / recalculate any dependents as needed to
-        keep the structure in a consistent state.
+        By default, this will also reload the answers of all fields that
+        depend on this field from the DB. If the dependents are going to be
+        recalculated on this structure anyway, pass `reload_dependents=False`
+        to avoid the queries.
+
+        If you know what you're doing, you can speed things up even more by
+        passing `recursive=False` here, which only clears our own caches. It is
+        then your responsibility to refresh / recalculate any dependents as
+        needed to keep the structure in a consistent state.
         """
         if answer:
             self.answer = answer
@@ -620,12 +1018,74 @@ class BaseField(ABC):
                 question=self.question, document=self.parent._document
             ).first()
 
+        if self.answer:
+            self._fastloader.update_answer(self.answer)
+        self._refresh_children()
+
         clear_memoise(self)
         if not recursive:
             return
-        for dep in self._fastloader.dependents_of_question(self.slug()):
-            for dep_field in self.get_root().find_all_fields_by_slug(dep):
-                dep_field.refresh()
+
+        dependents = self.clear_dependent_memoise()
+        if reload_dependents:
+            for dep_field in dependents:
+                dep_field.refresh(recursive=False)
+
+    def _refresh_children(self):
+        """Update the child fields after the answer has changed."""
+        pass
+
+    def clear_dependent_memoise(self) -> list[BaseField]:
+        """Clear the memoised results of this field and everything depending on it.
+
+        Instead of clearing the whole structure, only the following fields are
+        affected:
+
+        * Fields referencing this field in one of their JEXL expressions, as
+          given by the fastloader's dependency graph, and transitively the
+          fields depending on those
+        * The fieldsets containing an affected field, as their value and
+          emptiness are derived from their children
+        * The children of affected fieldsets and tables whose expressions
+          reference a changed field, as their visibility depends on them
+
+        Return the fields that were reached via the dependency graph.
+        """
+        root = self.get_root()
+        fields_by_slug, parents = root.get_field_index()
+
+        dependents = {}
+        # field id -> whether the field's own expressions may be affected
+        seen: dict[int, bool] = {}
+        queue = [(self, False)]
+
+        while queue:
+            fld, is_dependent = queue.pop()
+            if id(fld) in seen and (seen[id(fld)] or not is_dependent):
+                continue
+            seen[id(fld)] = is_dependent
+            clear_memoise(fld)
+
+            if id(fld) in parents:
+                queue.append((parents[id(fld)] or root, False))
+
+            if is_dependent and isinstance(fld, (FieldSet, RowSet)):
+                queue.extend((child, True) for child in fld.children())
+
+            slug = fld.slug()
+            if not slug:
+                continue
+            for dep_slug in self._fastloader.dependents_of_question(slug):
+                for dep_field in fields_by_slug.get(dep_slug, []):
+                    # Within table rows, the same slug exists once per row.
+                    # Skip the fields that reference another row's field
+                    target = dep_field.get_field(slug)
+                    if target is None or target is fld:
+                        dependents.setdefault(id(dep_field), dep_field)
+                        queue.append((dep_field, True))
+
+        dependents.pop(id(self), None)
+        return list(dependents.values())
 
     def calculate(self):
         try:
@@ -643,6 +1103,44 @@ class BaseField(ABC):
         if (fast_result := fast_results.get(expression)) is not None:
             return fast_result
 
+        # deferred import to avoid circular dependency
+        from caluma.caluma_form.jexl import QuestionJexl
+
+        kind = self._fastloader.expression_kind(expression)
+        if kind == QuestionJexl.EXPRESSION_ANSWER:
+            return self._evaluate_jexl(expression, raise_on_error)
+
+        # The result doesn't depend on any answers, so it's the same for every
+        # field in the document (constant) or at least for every field in the
+        # same place in the form structure (e.g. all rows of a table). We only
+        # evaluate it once and keep the result in the root fieldset.
+        key = (
+            (expression,)
+            if kind == QuestionJexl.EXPRESSION_CONSTANT
+            else (expression, *self._get_location())
+        )
+        results = self.get_root()._static_jexl_results
+        if key not in results:
+            try:
+                results[key] = self._evaluate_jexl(expression)
+            except Exception:
+                # Don't keep errors around, but report them as usual
+                return self._evaluate_jexl(expression, raise_on_error)
+        return results[key]
+
+    def _get_location(self):
+        """Return what identifies the local `info` context of this field.
+
+        See `get_local_info_context()`.
+        """
+        parent = self.get_parent_fieldset()
+        return (
+            self.get_form().slug,
+            parent.get_form().slug if parent else None,
+            parent.question.slug if parent else None,
+        )
+
+    def _evaluate_jexl(self, expression: str, raise_on_error=True):
         eval = self.get_evaluator()
 
         try:
@@ -797,6 +1295,10 @@ class FieldSet(BaseField):
         self.parent = weakref.proxy(parent) if parent else None
 
         self._own_fields = {}
+        self._field_index = None
+        # Results of expressions that don't depend on answers. Only used in the
+        # root fieldset, see `evaluate_jexl()`
+        self._static_jexl_results = {}
 
         if parent:
             # Our context is an extension of the parent's context. That way, we can
@@ -871,6 +1373,33 @@ class FieldSet(BaseField):
                     yield child
                     yield from child.get_all_fields()
 
+    def get_field_index(self):
+        """Return lookup tables for all fields in the structure.
+
+        Return a tuple of a dict of question slug -> list of fields (same order
+        as `get_all_fields()`) and a dict of field id -> parent field. For
+        direct children of this fieldset, the parent is given as `None`, to
+        avoid a reference cycle.
+
+        The index is built once and kept until the structure changes (table
+        rows being refreshed).
+        """
+        if self._field_index is None:
+            fields_by_slug = defaultdict(list)
+            parents = {}
+
+            def _index(container):
+                for child in container.children():
+                    parents[id(child)] = container if container is not self else None
+                    fields_by_slug[child.slug()].append(child)
+                    if isinstance(child, (FieldSet, RowSet)):
+                        _index(child)
+
+            _index(self)
+            self._field_index = (dict(fields_by_slug), parents)
+
+        return self._field_index
+
     def find_all_fields_by_slug(self, slug: str) -> list[BaseField]:
         """Return all fields with the given question slug.
 
@@ -882,6 +1411,10 @@ class FieldSet(BaseField):
         If you need the one field that the `answer` transform would return in
         this context, use `.get_field()` instead.
         """
+        if not self.parent:
+            # Root fieldset: Use the index instead of traversing everything
+            return list(self.get_field_index()[0].get(slug, []))
+
         result = []
         for formfield in self.get_all_fields():
             if formfield.slug() == slug:
@@ -977,23 +1510,42 @@ class RowSet(BaseField):
 
         self.parent = weakref.proxy(parent)
 
-        if answer:
-            self.rows = [
-                FieldSet(
+        self.rows = []
+        self._build_rows()
+
+    def _build_rows(self):
+        """Build the row fieldsets, reusing the ones of still-existing rows."""
+        if not self.answer:
+            self.rows = []
+            return
+
+        existing_rows = {str(row._document.pk): row for row in self.rows}
+        rows = []
+        for rownum, row_doc in enumerate(
+            self._fastloader.rows_for_table_answer(self.answer.pk), start=1
+        ):
+            row = existing_rows.get(str(row_doc.pk))
+            if row:
+                row.rownum = rownum
+            else:
+                row = FieldSet(
                     document=row_doc,
-                    question=question,
-                    form=self._fastloader.form_by_id(question.row_form_id),
+                    question=self.question,
+                    form=self.form,
                     parent=self,
                     global_context=self.get_global_context(),
                     rownum=rownum,
                     _fastloader=self._fastloader,
                 )
-                for rownum, row_doc in enumerate(
-                    self._fastloader.rows_for_table_answer(answer.pk), start=1
-                )
-            ]
-        else:
-            self.rows = []
+            rows.append(row)
+        self.rows = rows
+
+    def _refresh_children(self):
+        if self.answer:
+            self._fastloader.refresh_table_rows(self.answer)
+        self._build_rows()
+        # Rows have changed, so the root's field index is outdated
+        self.get_root()._field_index = None
 
     def get_value(self):
         if self.is_hidden():  # pragma: no cover
@@ -10,7 +10,7 @@ from rest_framework.exceptions import ValidationError
 from caluma.caluma_core.tests import extract_serializer_input_fields
 from caluma.caluma_core.validations import BaseValidation
 
-from .. import api, models, serializers
+from .. import api, models, serializers, validators
 from ..models import Answer, Question
 
 
@@ -633,3 +633,70 @@ def test_answer_validity(
     assert validity["id"] == str(answer.id)
     assert validity["isValid"] == is_valid
     assert len(validity["errors"]) == num_errors
+
+
+@pytest.mark.parametrize(
+    "question__type,answer__value,expected",
+    [
+        (Question.TYPE_MULTIPLE_CHOICE, ["b", "a", "b", "missing"], ["b", "a"]),
+        (Question.TYPE_CHOICE, None, []),
+        (Question.TYPE_TEXT, "a", None),
+    ],
+)
+def test_answer_selected_options(
+    db, question, answer, question_option_factory, expected
+):
+    question_option_factory(question=question, option__slug="a")
+    question_option_factory(question=question, option__slug="b")
+
+    selected_options = answer.selected_options
+
+    if expected is None:
+        assert selected_options is None
+    else:
+        assert [option.slug for option in selected_options] == expected
+
+
+def test_save_answer_mutation_builds_structure_once(
+    db,
+    schema_executor,
+    form_and_document,
+    form_question_factory,
+    question_option_factory,
+    mocker,
+):
+    form, document, _questions, _answers = form_and_document(use_subform=True)
+    choice = form_question_factory(
+        form=form, question__slug="choice", question__type=Question.TYPE_CHOICE
+    ).question
+    # options with JEXL need the structure for the validation
+    question_option_factory(question=choice, option__slug="a")
+    question_option_factory(
+        question=choice, option__slug="b", option__is_hidden="'sub_question'|answer"
+    )
+    calc = form_question_factory(
+        form=form,
+        question__slug="calc",
+        question__type=Question.TYPE_CALCULATED_FLOAT,
+        question__calc_expression="'choice'|answer == 'a' ? 1 : 2",
+    ).question
+    spy = mocker.spy(validators.DocumentValidator, "get_validation_context")
+
+    query = """
+        mutation($input: SaveDocumentStringAnswerInput!) {
+          saveDocumentStringAnswer(input: $input) {
+            clientMutationId
+          }
+        }
+    """
+    result = schema_executor(
+        query,
+        variable_values={
+            "input": {"document": str(document.pk), "question": "choice", "value": "a"}
+        },
+    )
+    assert not result.errors
+
+    # validation and recalculation share the structure of the family
+    assert spy.call_count == 1
+    assert document.answers.get(question=calc).value == 1
@@ -20,4 +20,5 @@ def test_save_answer_with_context(db, mocker, question_factory, document):
         question=question,
         user=None,
         value="foo",
+        request=None,
     )
@@ -1,6 +1,10 @@
+import threading
+from types import SimpleNamespace
+
 import pytest
 
-from caluma.caluma_form import calc_questions, models, structure
+from caluma.caluma_core.models import HistoricalRecords
+from caluma.caluma_form import calc_questions, models, signals, structure
 from caluma.caluma_form.api import save_answer, save_default_answer, save_document
 from caluma.caluma_form.serializers import (
     RemoveAnswerSerializer,
@@ -310,3 +314,242 @@ def test_remove_question_from_form_recalculation(
     # Verify q_calc is recalculated (should be 100 + 10 = 110, as q_input|answer(100) returns 100 if missing)
     ans_calc.refresh_from_db()
     assert ans_calc.value == 110.0
+
+
+@pytest.mark.parametrize("num_rows", [2, 6])
+@pytest.mark.django_db
+def test_recalculation_batched_writes(
+    form_factory,
+    question_factory,
+    form_question_factory,
+    document_factory,
+    answer_factory,
+    django_assert_num_queries,
+    num_rows,
+):
+    """Verify that recalculated answers are written in bulk, with history."""
+    form = form_factory(slug="form")
+    q_root = question_factory(slug="q_root", type=models.Question.TYPE_INTEGER)
+    form_question_factory(form=form, question=q_root)
+
+    row_form = form_factory(slug="row_form")
+    q_table = question_factory(
+        slug="q_table", type=models.Question.TYPE_TABLE, row_form=row_form
+    )
+    form_question_factory(form=form, question=q_table)
+    q_calc = question_factory(
+        slug="q_calc",
+        type=models.Question.TYPE_CALCULATED_FLOAT,
+        calc_expression="'q_root'|answer(0) * 2",
+    )
+    form_question_factory(form=row_form, question=q_calc)
+
+    doc = document_factory(form=form)
+    table_answer = answer_factory(document=doc, question=q_table, value=None)
+    rows = document_factory.create_batch(num_rows, form=row_form, family=doc)
+    table_answer.documents.add(*rows)
+    # Half of the rows already have a calculated answer
+    for row in rows[::2]:
+        answer_factory(document=row, question=q_calc, value=0)
+
+    root_answer = answer_factory(document=doc, question=q_root, value=21)
+    root = structure.FieldSet(doc)
+    root_field = root.get_field("q_root")
+    root_field.refresh(root_answer, reload_dependents=False)
+
+    # Savepoint handling, bulk create and update, stored primary keys of the
+    # created answers, one history insert each
+    with django_assert_num_queries(7):
+        calc_questions.recalculate_dependent_fields(root_field)
+
+    calc_answers = models.Answer.objects.filter(question=q_calc)
+    assert [answer.value for answer in calc_answers] == [42.0] * num_rows
+
+    for answer in calc_answers:
+        latest = answer.history.latest()
+        assert latest.value == 42.0
+        assert latest.history_question_type == models.Question.TYPE_CALCULATED_FLOAT
+    assert (
+        models.Answer.history.filter(question=q_calc, history_type="~").count()
+        == num_rows // 2
+    )
+
+    # The structure has been updated in-memory
+    assert [field.get_value() for field in root.find_all_fields_by_slug("q_calc")] == [
+        42.0
+    ] * num_rows
+
+
+@pytest.fixture
+def calc_families(form_factory, question_factory, form_question_factory):
+    """Create five families, each with a table row feeding a calc question."""
+    form = form_factory(slug="form")
+    row_form = form_factory(slug="row_form")
+    q_table = question_factory(
+        slug="q_table", type=models.Question.TYPE_TABLE, row_form=row_form
+    )
+    form_question_factory(form=form, question=q_table)
+    q_value = question_factory(slug="q_value", type=models.Question.TYPE_INTEGER)
+    form_question_factory(form=row_form, question=q_value)
+    q_calc = question_factory(
+        slug="q_calc",
+        type=models.Question.TYPE_CALCULATED_FLOAT,
+        calc_expression="'q_table'|answer|mapby('q_value')|sum",
+    )
+    form_question_factory(form=form, question=q_calc)
+    q_table.refresh_from_db()
+    q_value.refresh_from_db()
+
+    for value in range(5):
+        doc = save_document(form=form)
+        row = save_document(form=row_form)
+        save_answer(question=q_value, document=row, value=value)
+        save_answer(question=q_table, document=doc, value=[str(row.pk)])
+
+    return q_calc
+
+
+@pytest.mark.django_db
+def test_recalculate_calc_question(calc_families, mocker):
+    # Skip the signals, so we can verify the recalculation on its own
+    models.Question.objects.filter(pk=calc_families.pk).update(
+        calc_expression="'q_table'|answer|mapby('q_value')|sum * 2"
+    )
+    calc_families.refresh_from_db()
+
+    progress = mocker.Mock()
+    calc_questions.recalculate_calc_question(
+        calc_families, chunk_size=2, progress=progress
+    )
+
+    assert progress.call_args_list == [
+        mocker.call(2, 5),
+        mocker.call(4, 5),
+        mocker.call(5, 5),
+    ]
+    assert sorted(
+        models.Answer.objects.filter(question=calc_families).values_list(
+            "value", flat=True
+        )
+    ) == [0, 2, 4, 6, 8]
+
+
+@pytest.mark.django_db
+def test_update_or_create_calc_answer(calc_families):
+    models.Question.objects.filter(pk=calc_families.pk).update(
+        calc_expression="'q_table'|answer|mapby('q_value')|sum + 10"
+    )
+    calc_families.refresh_from_db()
+    answer = models.Answer.objects.filter(question=calc_families).last()
+    answer.delete()
+
+    calc_questions.update_or_create_calc_answer(
+        calc_families, answer.document, user="recalc-user"
+    )
+
+    new_answer = models.Answer.objects.get(
+        question=calc_families, document=answer.document
+    )
+    assert new_answer.value == answer.value + 10
+    assert new_answer.history.latest().history_type == "+"
+    # the other families are untouched
+    assert (
+        models.Answer.objects.filter(question=calc_families, value__gte=10).count() == 1
+    )
+
+
+@pytest.mark.django_db
+def test_calc_answer_batch_conflict(calc_families, monkeypatch):
+    # outside of a request
+    monkeypatch.setattr(HistoricalRecords.thread, "request", None, raising=False)
+    existing, removed = models.Answer.objects.filter(question=calc_families)[:2]
+    removed.delete()
+
+    # both answers were missing when the structures were loaded
+    batch = calc_questions.CalcAnswerBatch(user="recalc-user")
+    answers = [
+        batch.add(
+            SimpleNamespace(
+                answer=None,
+                question=calc_families,
+                parent=SimpleNamespace(_document=answer.document),
+            ),
+            99,
+        )
+        for answer in [existing, removed]
+    ]
+    conflicting_pk = answers[0].pk
+    batch.write()
+
+    # the conflicting answer was updated, and keeps its primary key
+    assert answers[0].pk == existing.pk
+    assert not models.Answer.history.filter(id=conflicting_pk).exists()
+    for answer, history_type in zip(answers, ["~", "+"]):
+        answer.refresh_from_db()
+        assert answer.value == 99
+        latest = answer.history.latest()
+        assert latest.history_type == history_type
+        assert latest.history_user_id == "recalc-user"
+
+
+def test_recalculate_calc_question_deferred(
+    transactional_db, calc_families, settings, mocker
+):
+    settings.CALC_RECALCULATION_DEFERRED = True
+    spy = mocker.spy(signals, "recalculate_calc_question_deferred")
+
+    calc_families.calc_expression = "'q_table'|answer|mapby('q_value')|sum + 1"
+    calc_families.save()
+
+    assert spy.call_count == 1
+    assert calc_questions.recalculation_worker.join(timeout=60)
+    assert not models.PendingCalcRecalculation.objects.exists()
+
+    assert sorted(
+        models.Answer.objects.filter(question=calc_families).values_list(
+            "value", flat=True
+        )
+    ) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.django_db
+def test_recalculate_pending_calc_question_queued_again(calc_families, mocker):
+    calc_questions.mark_calc_question_pending(calc_families.slug)
+
+    def queue_again(*args, **kwargs):
+        calc_questions.mark_calc_question_pending(calc_families.slug)
+
+    mocker.patch.object(
+        calc_questions, "recalculate_calc_question", side_effect=queue_again
+    )
+    calc_questions.recalculate_pending_calc_question(calc_families.slug)
+
+    # the recalculation may have missed the latest change
+    assert models.PendingCalcRecalculation.objects.filter(
+        question=calc_families
+    ).exists()
+
+
+def test_recalculation_worker_queue(mocker):
+    started, release = threading.Event(), threading.Event()
+    recalculated = []
+
+    def recalculate(question_slug):
+        started.set()
+        release.wait()
+        recalculated.append(question_slug)
+
+    worker = calc_questions.RecalculationWorker()
+    mocker.patch.object(worker, "_recalculate", side_effect=recalculate)
+
+    worker.enqueue("a")
+    assert started.wait(timeout=10)
+
+    # questions already waiting are queued once, running ones again
+    for question_slug in ["b", "b", "a"]:
+        worker.enqueue(question_slug)
+    assert not worker.join(timeout=0)
+
+    release.set()
+    assert worker.join(timeout=10)
+    assert recalculated == ["a", "b", "a"]
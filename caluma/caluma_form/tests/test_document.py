@@ -1,10 +1,13 @@
 import json
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.dateparse import parse_date
 from graphql.error import GraphQLError
 from graphql_relay import to_global_id
 from rest_framework.exceptions import ValidationError
+from uuid_extensions import uuid7str
 
 from caluma.caluma_data_source.tests.data_sources import MyDataSourceWithOnCopy
 
@@ -12,8 +15,8 @@ from ...caluma_core.relay import extract_global_id
 from ...caluma_core.tests import extract_serializer_input_fields
 from ...caluma_core.visibilities import BaseVisibility, filter_queryset_for
 from ...caluma_form.models import Answer, Document, DynamicOption, Question
-from ...caluma_form.schema import Document as DocumentNodeType
-from .. import api, serializers
+from ...caluma_form.schema import Answer as AnswerNodeType, Document as DocumentNodeType
+from .. import api, serializers, structure
 
 
 @pytest.mark.parametrize(
@@ -289,6 +292,150 @@ def test_complex_document_query_performance(
     assert not result.errors
 
 
+@pytest.mark.parametrize("document_count", [1, 10])
+def test_query_all_documents_batched(
+    db,
+    schema_executor,
+    form,
+    document_factory,
+    form_question_factory,
+    answer_factory,
+    answer_document_factory,
+    file_factory,
+    question_option_factory,
+    django_assert_num_queries,
+    minio_mock,
+    document_count,
+):
+    choice_question = form_question_factory(
+        form=form, question__type=Question.TYPE_CHOICE
+    ).question
+    option = question_option_factory(question=choice_question).option
+    files_question = form_question_factory(
+        form=form, question__type=Question.TYPE_FILES
+    ).question
+    table_question = form_question_factory(
+        form=form, question__type=Question.TYPE_TABLE
+    ).question
+
+    for document in document_factory.create_batch(document_count, form=form):
+        answer_factory(document=document, question=choice_question, value=option.slug)
+        answer_factory(
+            document=document,
+            question=files_question,
+            value=None,
+            files=[file_factory()],
+        )
+        answer_document_factory(
+            answer=answer_factory(
+                document=document, question=table_question, value=None
+            ),
+            document__form=table_question.row_form,
+        )
+
+    query = """
+        query ($form: ID!) {
+          allDocuments(filter: [{form: $form}]) {
+            edges {
+              node {
+                form {
+                  slug
+                }
+                answers {
+                  edges {
+                    node {
+                      question {
+                        slug
+                      }
+                      ... on StringAnswer {
+                        selectedOption {
+                          slug
+                        }
+                      }
+                      ... on FilesAnswer {
+                        fileValue: value {
+                          name
+                        }
+                      }
+                      ... on TableAnswer {
+                        tableValue: value {
+                          form {
+                            slug
+                          }
+                        }
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    # the number of queries must not depend on the number of documents
+    with django_assert_num_queries(7):
+        result = schema_executor(query, variable_values={"form": form.slug})
+    assert not result.errors
+
+    documents = result.data["allDocuments"]["edges"]
+    assert len(documents) == document_count
+    for document in documents:
+        answers = {
+            edge["node"]["question"]["slug"]: edge["node"]
+            for edge in document["node"]["answers"]["edges"]
+        }
+        assert answers[choice_question.slug]["selectedOption"]["slug"] == option.slug
+        assert len(answers[files_question.slug]["fileValue"]) == 1
+        assert answers[table_question.slug]["tableValue"] == [
+            {"form": {"slug": table_question.row_form.slug}}
+        ]
+
+
+@pytest.mark.parametrize(
+    "answer_selection,loaded_fields",
+    [
+        ("id", []),
+        ("...on StringAnswer { value }", ["value"]),
+        ("...AnswerMeta", ["meta"]),
+    ],
+)
+def test_query_all_documents_deferred_fields(
+    db, document, answer, schema_executor, answer_selection, loaded_fields
+):
+    query = f"""
+        query {{
+          allDocuments {{
+            edges {{
+              node {{
+                id
+                answers {{
+                  edges {{
+                    node {{
+                      {answer_selection}
+                    }}
+                  }}
+                }}
+              }}
+            }}
+          }}
+        }}
+    """
+    if "AnswerMeta" in answer_selection:
+        query += "fragment AnswerMeta on Answer { meta }"
+
+    with CaptureQueriesContext(connection) as context:
+        result = schema_executor(query)
+    assert not result.errors
+
+    document_sql, answer_sql = (query["sql"] for query in context.captured_queries)
+    assert '"caluma_form_document"."meta"' not in document_sql
+    for field in ["value", "meta"]:
+        assert (f'"caluma_form_answer"."{field}"' in answer_sql) == (
+            field in loaded_fields
+        )
+
+
 def test_query_all_documents_filter_answers_by_question(
     db, document, answer, question, answer_factory, schema_executor
 ):
@@ -1827,6 +1974,103 @@ def test_flat_answer_map(db, form_and_document):
     ]
 
 
+@pytest.mark.parametrize("count", [1, 5])
+def test_query_flat_answer_map(
+    db,
+    schema_executor,
+    django_assert_num_queries,
+    form_and_document,
+    answer_factory,
+    question_factory,
+    count,
+):
+    date_question = question_factory(type=Question.TYPE_DATE)
+    documents = []
+    for _ in range(count):
+        _form, document, _questions, answers = form_and_document(
+            use_table=True, use_subform=True, table_row_count=2
+        )
+        answer_factory(
+            document=document, question=date_question, value=None, date="2021-03-04"
+        )
+        # give the rows a distinct order
+        for sort, row in enumerate(answers["table"].answerdocument_set.all()):
+            row.sort = sort
+            row.save()
+        documents.append((document, answers))
+
+    query = """
+        query {
+          allDocuments(filter: [{form: "top_form"}]) {
+            edges {
+              node {
+                id
+                flatAnswerMap
+              }
+            }
+          }
+        }
+    """
+
+    # the answers of all documents and of their rows are loaded at once
+    with django_assert_num_queries(4):
+        result = schema_executor(query)
+    assert not result.errors
+
+    flat_answer_maps = {
+        extract_global_id(edge["node"]["id"]): edge["node"]["flatAnswerMap"]
+        for edge in result.data["allDocuments"]["edges"]
+    }
+    for document, answers in documents:
+        rows = answers["table"].documents.order_by("-answerdocument__sort")
+        assert flat_answer_maps[str(document.pk)] == {
+            "top_question": answers["top_question"].value,
+            "sub_question": answers["sub_question"].value,
+            "table": [{"column": row.answers.get().value} for row in rows],
+            date_question.slug: "2021-03-04",
+        }
+
+
+def test_query_flat_answer_map_visibility(
+    db, schema_executor, form_and_document, mocker
+):
+    _form, document, _questions, answers = form_and_document(
+        use_table=True, use_subform=True, table_row_count=2
+    )
+    hidden_row = answers["table"].documents.first()
+
+    class CustomVisibility(BaseVisibility):
+        @filter_queryset_for(AnswerNodeType)
+        def filter_queryset_for_answer(self, node, queryset, info):
+            return queryset.exclude(question_id="sub_question")
+
+        @filter_queryset_for(DocumentNodeType)
+        def filter_queryset_for_document(self, node, queryset, info):
+            return queryset.exclude(pk=hidden_row.pk)
+
+    mocker.patch("caluma.caluma_core.types.Node.visibility_classes", [CustomVisibility])
+
+    query = """
+        query {
+          allDocuments(filter: [{form: "top_form"}]) {
+            edges {
+              node {
+                flatAnswerMap
+              }
+            }
+          }
+        }
+    """
+    result = schema_executor(query)
+    assert not result.errors
+
+    visible_row = answers["table"].documents.exclude(pk=hidden_row.pk).get()
+    assert result.data["allDocuments"]["edges"][0]["node"]["flatAnswerMap"] == {
+        "top_question": answers["top_question"].value,
+        "table": [{"column": visible_row.answers.get().value}],
+    }
+
+
 def test_efficient_init_of_calc_questions(
     db, schema_executor, form, form_question_factory, question_factory, mocker
 ):
@@ -1932,3 +2176,133 @@ def test_validity_query_table(
     assert validity["id"] == str(table_document.id)
     assert validity["isValid"] == is_valid
     assert len(validity["errors"]) == num_errors
+
+
+def test_validity_and_visibility_share_validation_context(
+    db, schema_executor, form_and_document, mocker
+):
+    _form, document, _questions, _answers = form_and_document(
+        use_table=True, use_subform=True
+    )
+    spy = mocker.spy(structure.FastLoader, "for_queryset")
+
+    query = """
+        query($id: ID!) {
+          documentValidity(id: $id) {
+            edges {
+              node {
+                isValid
+              }
+            }
+          }
+          allQuestions(filter: [{visibleInDocument: $id}], order: [{attribute: SLUG}]) {
+            edges {
+              node {
+                slug
+              }
+            }
+          }
+          allDocuments(filter: [{form: "top_form"}]) {
+            edges {
+              node {
+                answers(filter: [{visibleInContext: true}]) {
+                  totalCount
+                }
+              }
+            }
+          }
+        }
+    """
+
+    result = schema_executor(query, variable_values={"id": str(document.pk)})
+    assert not result.errors
+    assert result.data["documentValidity"]["edges"][0]["node"]["isValid"]
+    assert [edge["node"]["slug"] for edge in result.data["allQuestions"]["edges"]] == [
+        "column",
+        "form",
+        "sub_question",
+        "table",
+        "top_question",
+    ]
+    assert result.data["allDocuments"]["edges"][0]["node"]["answers"]["totalCount"] == 3
+
+    # the structure of the family is only loaded once per request
+    assert spy.call_count == 1
+
+    # ... until a mutation changes the answers
+    mutation = """
+        mutation($input: SaveDocumentStringAnswerInput!) {
+          saveDocumentStringAnswer(input: $input) {
+            clientMutationId
+          }
+        }
+    """
+    result = schema_executor(
+        mutation,
+        variable_values={
+            "input": {
+                "document": str(document.pk),
+                "question": "top_question",
+                "value": "changed",
+            }
+        },
+    )
+    assert not result.errors
+
+    spy.reset_mock()
+    result = schema_executor(query, variable_values={"id": str(document.pk)})
+    assert not result.errors
+    assert spy.call_count == 1
+
+
+@pytest.mark.parametrize("count", [1, 5])
+def test_documents_validity(
+    db, schema_executor, form_and_document, django_assert_num_queries, count
+):
+    documents = []
+    for _ in range(count):
+        _form, document, _questions, answers = form_and_document(
+            use_table=True, use_subform=True
+        )
+        documents.append(document)
+    # the last document misses a required answer
+    answers["top_question"].delete()
+
+    query = """
+        query($ids: [ID!]!) {
+          documentsValidity(ids: $ids) {
+            edges {
+              node {
+                id
+                isValid
+                errors {
+                  slug
+                  documentId
+                }
+              }
+            }
+          }
+        }
+    """
+
+    ids = [str(document.pk) for document in reversed(documents)]
+    # the families are loaded at once, no matter how many documents are validated
+    with django_assert_num_queries(8):
+        result = schema_executor(
+            query, variable_values={"ids": [ids[0].upper(), *ids[1:]]}
+        )
+    assert not result.errors
+
+    validities = [edge["node"] for edge in result.data["documentsValidity"]["edges"]]
+    assert [validity["id"] for validity in validities] == ids
+    assert validities[0]["isValid"] is False
+    assert validities[0]["errors"] == [
+        {"slug": "top_question", "documentId": str(documents[-1].pk)}
+    ]
+    assert all(validity["isValid"] for validity in validities[1:])
+
+    unknown = [uuid7str(), "invalid"]
+    result = schema_executor(query, variable_values={"ids": [*ids, *unknown]})
+    assert result.errors[0].message == (
+        f"No Document matches the given IDs: {', '.join(unknown)}"
+    )
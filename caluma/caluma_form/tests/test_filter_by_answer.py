@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from graphql_relay import to_global_id
 
 from ...caluma_core.relay import extract_global_id
@@ -199,6 +201,134 @@ def test_has_answer_in(
     assert len(result.data["allDocuments"]["edges"]) == expect_count
 
 
+@pytest.mark.parametrize(
+    "question__type,lookup,search,expect_count,typed",
+    [
+        (models.Question.TYPE_INTEGER, "GT", 5, 2, True),
+        (models.Question.TYPE_INTEGER, "LTE", 5, 2, True),
+        (models.Question.TYPE_FLOAT, "GTE", 5.5, 2, True),
+        (models.Question.TYPE_FLOAT, "IN", [1, 10.0], 2, True),
+        (models.Question.TYPE_FLOAT, "IN", [1, "10"], 1, False),
+        (models.Question.TYPE_INTEGER, "EXACT", True, 0, False),
+        (models.Question.TYPE_INTEGER, "ISNULL", None, 0, False),
+    ],
+)
+def test_has_answer_number(
+    schema_executor,
+    db,
+    question,
+    answer_factory,
+    lookup,
+    search,
+    expect_count,
+    typed,
+):
+    for value in [1, 5, 10, 100]:
+        answer_factory(question=question, value=value)
+
+    query = """
+        query asdf ($hasAnswer: [HasAnswerFilterType]!) {
+          allDocuments(filter: [{hasAnswer: $hasAnswer}]) {
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+    variables = {
+        "hasAnswer": [{"question": question.slug, "value": search, "lookup": lookup}]
+    }
+
+    with CaptureQueriesContext(connection) as context:
+        result = schema_executor(query, variable_values=variables)
+    assert not result.errors
+
+    assert len(result.data["allDocuments"]["edges"]) == expect_count
+    # numbers are compared on the indexed typed column
+    assert typed == ("value_number" in context.captured_queries[-1]["sql"])
+
+
+@pytest.mark.parametrize(
+    "question__type,value,expected",
+    [
+        (models.Question.TYPE_INTEGER, 12, 12),
+        (models.Question.TYPE_FLOAT, 1.5, 1.5),
+        (models.Question.TYPE_TEXT, "12", None),
+        (models.Question.TYPE_MULTIPLE_CHOICE, [1], None),
+    ],
+)
+def test_answer_value_number(db, question, answer_factory, value, expected):
+    answer = answer_factory(question=question, value=value)
+    answer.refresh_from_db()
+    assert answer.value_number == expected
+
+    # kept up to date when only the value is saved
+    answer.value = 3
+    answer.save(update_fields=["value"])
+    answer.refresh_from_db()
+    assert answer.value_number == 3
+
+
+@pytest.mark.parametrize("question__type", [models.Question.TYPE_INTEGER])
+@pytest.mark.parametrize("direction", ["ASC", "DESC"])
+def test_order_by_answer_number(
+    schema_executor,
+    db,
+    question,
+    question_factory,
+    answer_factory,
+    document_factory,
+    direction,
+):
+    # not answered at all, so the second ordering decides
+    other_question = question_factory(type=models.Question.TYPE_DATE)
+    documents = [
+        answer_factory(question=question, value=value).document
+        for value in [10, 2, 1.5]
+    ]
+    no_answer = document_factory()
+
+    query = """
+        query ($order: [DocumentOrderSetType]) {
+          allDocuments(order: $order) {
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+    with CaptureQueriesContext(connection) as context:
+        result = schema_executor(
+            query,
+            variable_values={
+                "order": [
+                    {"answerValue": other_question.slug},
+                    {"answerValue": question.slug, "direction": direction},
+                ]
+            },
+        )
+    assert not result.errors
+
+    expected = [str(doc.pk) for doc in reversed(documents)]
+    if direction == "DESC":
+        expected = [str(no_answer.pk), *reversed(expected)]
+    else:
+        expected.append(str(no_answer.pk))
+    assert [
+        extract_global_id(edge["node"]["id"])
+        for edge in result.data["allDocuments"]["edges"]
+    ] == expected
+
+    # the answer is joined, and ordered on the indexed typed column
+    sql = context.captured_queries[-1]["sql"]
+    assert 'LEFT OUTER JOIN "caluma_form_answer"' in sql
+    assert f'."value_number" AS "order_{question.slug}"' in sql
+
+
 @pytest.mark.parametrize(
     "question__type,value,search,expect_find",
     [
@@ -322,3 +452,111 @@ def test_visible_question_in_document(
         )
         == expected
     )
+
+
+def test_has_answer_combined(
+    schema_executor,
+    db,
+    document_factory,
+    question_factory,
+    answer_factory,
+):
+    question_a = question_factory(type=models.Question.TYPE_INTEGER)
+    question_b = question_factory(type=models.Question.TYPE_TEXT)
+    family = document_factory()
+    row = document_factory(family=family)
+    other = document_factory()
+
+    answer_factory(document=family, question=question_a, value=10)
+    answer_factory(document=row, question=question_b, value="foo")
+    answer_factory(document=other, question=question_a, value=10)
+    answer_factory(document=other, question=question_b, value="bar")
+
+    query = """
+        query asdf ($hasAnswer: [HasAnswerFilterType]!) {
+          allDocuments(filter: [{hasAnswer: $hasAnswer}]) {
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+
+    def _search(*exprs):
+        # questions are looked up at once, and the conditions are checked
+        # together by one grouped query
+        with CaptureQueriesContext(connection) as context:
+            result = schema_executor(query, variable_values={"hasAnswer": exprs})
+        assert not result.errors
+        assert len(context.captured_queries) == 2
+        return {
+            extract_global_id(edge["node"]["id"])
+            for edge in result.data["allDocuments"]["edges"]
+        }
+
+    assert _search(
+        {"question": question_a.slug, "value": 5, "lookup": "GT"},
+        {"question": question_b.slug, "value": "foo"},
+    ) == {str(family.pk)}
+    assert _search(
+        {"question": question_a.slug, "value": 5, "lookup": "GT"},
+        {"question": question_b.slug, "value": ["foo", "bar"], "lookup": "IN"},
+    ) == {str(family.pk), str(other.pk)}
+    assert (
+        _search(
+            {"question": question_a.slug, "value": 5, "lookup": "GT"},
+            {"question": question_b.slug, "value": "foo", "hierarchy": "DIRECT"},
+        )
+        == set()
+    )
+    assert _search(
+        {"question": question_b.slug, "value": "bar", "hierarchy": "DIRECT"},
+        {"question": question_a.slug, "value": 10, "hierarchy": "DIRECT"},
+    ) == {str(other.pk)}
+
+    result = schema_executor(
+        query,
+        variable_values={
+            "hasAnswer": [
+                {"question": question_a.slug, "value": 10},
+                {"question": "missing", "value": 10},
+            ]
+        },
+    )
+    assert result.errors[0].message == "Question matching query does not exist."
+
+
+def test_has_answer_combined_multi_valued(
+    schema_executor, db, case, work_item_factory, question_factory, answer_factory
+):
+    question = question_factory(type=models.Question.TYPE_TEXT)
+    item_a, item_b = work_item_factory.create_batch(2, case=case)
+    answer_factory(document=item_a.document, question=question, value="foo")
+    answer_factory(document=item_b.document, question=question, value="bar")
+
+    query = """
+        query ($hasAnswer: [HasAnswerFilterType!]) {
+          allCases(filter: [{workItemDocumentHasAnswer: $hasAnswer}]) {
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+
+    # every condition may be met by the document of another work item
+    result = schema_executor(
+        query,
+        variable_values={
+            "hasAnswer": [
+                {"question": question.slug, "value": "foo"},
+                {"question": question.slug, "value": "bar"},
+            ]
+        },
+    )
+    assert not result.errors
+    assert len(result.data["allCases"]["edges"]) == 1
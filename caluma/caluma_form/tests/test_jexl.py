@@ -6,8 +6,10 @@ from typing import Any
 
 import pytest
 
+from caluma.caluma_core.jexl import JEXL, Cache
+from caluma.caluma_core.tests import evaluate_compiled_and_interpreted
 from caluma.caluma_form import models, structure, validators
-from caluma.caluma_form.jexl import QuestionJexl, QuestionMissing
+from caluma.caluma_form.jexl import QuestionJexl, QuestionMissing, warm_up_cache
 from caluma.caluma_form.models import Question
 
 
@@ -46,6 +48,23 @@ def test_intersects_operator(expression, result):
     assert QuestionJexl(field=None).evaluate(expression) == result
 
 
+@pytest.mark.parametrize(
+    "expression,kind",
+    [
+        ("true", QuestionJexl.EXPRESSION_CONSTANT),
+        ("[{ a: 1 }][.a > 0]|length", QuestionJexl.EXPRESSION_CONSTANT),
+        ("info.form == 'foo'", QuestionJexl.EXPRESSION_CONTEXT),
+        ("form in ['foo']", QuestionJexl.EXPRESSION_CONTEXT),
+        ("info.form ? 'foo'|answer : 1", QuestionJexl.EXPRESSION_ANSWER),
+        ("{ key: 'foo'|answer }", QuestionJexl.EXPRESSION_ANSWER),
+        # invalid expressions fail upon evaluation
+        ("'foo' ==", QuestionJexl.EXPRESSION_ANSWER),
+    ],
+)
+def test_question_jexl_classify(expression, kind):
+    assert QuestionJexl(field=None).classify(expression) == kind
+
+
 @pytest.mark.parametrize("form__slug", ["f-main-slug"])
 def test_jexl_form(db, form):
     # TODO: this test is not really meaningful anymore with the new
@@ -618,6 +637,34 @@ def test_optional_answer_transform(info, form_and_document):
         validator.validate(document, info)
 
 
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "'top_question'|answer",
+        "'table'|answer|mapby('column')",
+        "'table'|answer|mapby('column')|sum + 'sub_question'|answer",
+        "'missing'|answer('default')",
+        "'missing'|answer",
+        "'top_question'|answer in ['a', 'b'] || info.form == 'top_form'",
+        "info.root.form == 'top_form' && info.form != 'sub_form'",
+        "info.parent.form",
+        "form",
+        "'sub_question'|answer / 0",
+    ],
+)
+def test_question_jexl_compiled(db, form_and_document, expression):
+    form, document, questions, answers = form_and_document(
+        use_table=True, use_subform=True
+    )
+    field = structure.FieldSet(document).get_field("sub_question")
+
+    compiled, interpreted = evaluate_compiled_and_interpreted(
+        field.get_evaluator(), expression
+    )
+
+    assert compiled == interpreted
+
+
 def _gc_object_counts_by_type():
     # We sort, so the insertion order into the counter is something
     # sorta-kinda useful. Otherwise, we'd get a random-ish insertion order
@@ -973,3 +1020,29 @@ def test_calc_expression_default_value(
     answer_factory(document=document, question=dep, value=dep_value)
 
     assert structure.FieldSet(document).get_field(calc.pk).calculate() == expected_value
+
+
+def test_warm_up_cache(db, mocker, caplog, question_factory, option_factory):
+    cache = Cache()
+    mocker.patch.object(JEXL, "expr_cache", cache)
+
+    question_factory(is_hidden="false", is_required="'foo'|answer == 1")
+    question_factory(
+        type=Question.TYPE_CALCULATED_FLOAT,
+        is_hidden="false",
+        is_required="false",
+        calc_expression="'foo'|answer + 1",
+    )
+    question_factory(is_hidden="'foo'|answer ==", is_required="true")
+    option_factory(is_hidden="info.form == 'foo'")
+
+    assert warm_up_cache() == 5
+    assert set(cache._cache) == {
+        "false",
+        "true",
+        "'foo'|answer == 1",
+        "'foo'|answer + 1",
+        "info.form == 'foo'",
+    }
+    assert all(parsed.compiled for parsed in cache._cache.values())
+    assert "Skipping invalid JEXL expression `'foo'|answer ==`" in caplog.messages
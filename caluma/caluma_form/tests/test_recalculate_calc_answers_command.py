@@ -1,14 +1,17 @@
+import io
 import os
 
 import pytest
 from django.core.management import call_command
+from django.core.management.base import CommandError
 
-from caluma.caluma_form import structure
+from caluma.caluma_form import calc_questions, structure
 from caluma.caluma_form.api import save_answer, save_document
-from caluma.caluma_form.models import Question
+from caluma.caluma_form.models import PendingCalcRecalculation, Question
 
 
-def test_recalculate_calc_answers(
+@pytest.fixture
+def outdated_calc_answer(
     db,
     form_factory,
     question_factory,
@@ -71,11 +74,87 @@ def test_recalculate_calc_answers(
     calc_answer.value = 10
     calc_answer.save()
 
+    return calc_answer
+
+
+def test_recalculate_calc_answers(outdated_calc_answer):
     call_command("recalculate_calc_answers", stderr=open(os.devnull, "w"))
 
     # assert correct calc_value after migration
-    calc_answer.refresh_from_db()
-    assert calc_answer.value == 23
+    outdated_calc_answer.refresh_from_db()
+    assert outdated_calc_answer.value == 23
+
+
+def test_recalculate_calc_answers_dry_run(outdated_calc_answer):
+    stdout = io.StringIO()
+    call_command("recalculate_calc_answers", "--dry-run", stdout=stdout)
+
+    assert stdout.getvalue().splitlines() == [
+        f"{outdated_calc_answer.document_id} calc_question: 10 -> 23",
+        "Would update 1 answers in 1 families",
+    ]
+    outdated_calc_answer.refresh_from_db()
+    assert outdated_calc_answer.value == 10
+
+
+@pytest.mark.django_db(transaction=True)
+def test_recalculate_calc_answers_workers(outdated_calc_answer):
+    # another family, with another outdated calc answer
+    other_doc = outdated_calc_answer.document.copy()
+    other_doc.answers.filter(question_id="dep1_main").update(value=20)
+
+    stdout = io.StringIO()
+    call_command(
+        "recalculate_calc_answers",
+        "--workers=2",
+        "--chunk-size=1",
+        "-v2",
+        stdout=stdout,
+    )
+
+    assert sorted(stdout.getvalue().splitlines()) == sorted(
+        [
+            f"{other_doc.pk} calc_question: 10 -> 33",
+            f"{outdated_calc_answer.document_id} calc_question: 10 -> 23",
+            "Updated 2 answers in 2 families",
+        ]
+    )
+    outdated_calc_answer.refresh_from_db()
+    assert outdated_calc_answer.value == 23
+    assert other_doc.answers.get(question_id="calc_question").value == 33
+
+
+def test_recalculate_calc_answers_pending(
+    outdated_calc_answer, settings, mocker, django_capture_on_commit_callbacks
+):
+    settings.CALC_RECALCULATION_DEFERRED = True
+    # the process exits before the worker is done
+    enqueue = mocker.patch.object(calc_questions.recalculation_worker, "enqueue")
+
+    question = outdated_calc_answer.question
+    question.calc_expression = '"dep1_main"|answer(0) * 2'
+    with django_capture_on_commit_callbacks(execute=True):
+        question.save()
+
+    enqueue.assert_called_once_with("calc_question")
+    assert PendingCalcRecalculation.objects.filter(question=question).exists()
+
+    stdout = io.StringIO()
+    call_command("recalculate_calc_answers", "--pending", stdout=stdout)
+
+    assert stdout.getvalue().splitlines() == [
+        "calc_question: 1/1 families",
+        "Recalculated 1 pending questions",
+    ]
+    outdated_calc_answer.refresh_from_db()
+    assert outdated_calc_answer.value == 20
+    assert not PendingCalcRecalculation.objects.exists()
+
+
+@pytest.mark.parametrize("option", ["--dry-run", "--workers=2"])
+def test_recalculate_calc_answers_pending_options(db, option):
+    with pytest.raises(CommandError):
+        call_command("recalculate_calc_answers", "--pending", option)
 
 
 @pytest.mark.django_db
@@ -1,7 +1,14 @@
+import importlib
+import io
+
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import translation
 
 from ...caluma_core.relay import extract_global_id
 from .. import models
+from ..filters import SearchAnswersFilter, SearchLookupMode
 
 
 def test_search(
@@ -327,3 +334,284 @@ def test_search_question_not_in_form(schema_executor, db, document):
     assert not result.errors
     edges = result.data["allDocuments"]["edges"]
     assert len(edges) == 0
+
+
+SEARCH_QUERY = """
+    query ($search: [SearchAnswersFilterType!]) {
+      allDocuments(filter: [{searchAnswers: $search}]) {
+        edges {
+          node {
+            id
+          }
+        }
+      }
+    }
+"""
+
+
+@pytest.mark.parametrize(
+    "question_type,value,lookup,word,expected",
+    [
+        (models.Question.TYPE_TEXT, "Hello World", "CONTAINS", "wOrld", True),
+        (models.Question.TYPE_TEXT, "Hello World", "STARTSWITH", "Hello", True),
+        (models.Question.TYPE_TEXT, "Hello World", "STARTSWITH", "hello", False),
+        (models.Question.TYPE_TEXT, "Hello World", "STARTSWITH", "World", False),
+        (models.Question.TYPE_TEXTAREA, "Hello\nWorld", "EXACT_WORD", "Hello", False),
+        (models.Question.TYPE_TEXTAREA, "Hello", "EXACT_WORD", "Hello", True),
+        (models.Question.TYPE_TEXTAREA, "Hello", "EXACT_WORD", "hello", False),
+        (models.Question.TYPE_TEXTAREA, "Hello worlds", "TEXT", "Worlds", True),
+        (models.Question.TYPE_TEXTAREA, "Hello worlds", "TEXT", "orlds", False),
+        (models.Question.TYPE_DATE, "2021-03-04", "CONTAINS", "03-04", True),
+        (models.Question.TYPE_DATE, None, "CONTAINS", "03-04", False),
+        (models.Question.TYPE_INTEGER, 1234, "STARTSWITH", "12", True),
+        (models.Question.TYPE_FLOAT, 1.5, "EXACT_WORD", "1.5", True),
+        (models.Question.TYPE_FLOAT, None, "EXACT_WORD", "1.5", False),
+    ],
+)
+def test_search_lookup(
+    schema_executor,
+    db,
+    document,
+    question_factory,
+    answer_factory,
+    question_type,
+    value,
+    lookup,
+    word,
+    expected,
+):
+    question = question_factory(type=question_type)
+    if question_type == models.Question.TYPE_DATE:
+        answer_factory(question=question, document=document, value=None, date=value)
+    else:
+        answer_factory(question=question, document=document, value=value)
+
+    result = schema_executor(
+        SEARCH_QUERY,
+        variable_values={
+            "search": [{"questions": [question.slug], "value": word, "lookup": lookup}]
+        },
+    )
+
+    assert not result.errors
+    assert len(result.data["allDocuments"]["edges"]) == int(expected)
+
+
+def test_search_option_labels(
+    schema_executor,
+    db,
+    document,
+    question_factory,
+    question_option_factory,
+    answer_factory,
+):
+    question = question_factory(type=models.Question.TYPE_MULTIPLE_CHOICE)
+    option_a, option_b = [
+        question_option_factory(question=question).option for _ in range(2)
+    ]
+    option_a.label = {"en": "apple", "de": "Apfel"}
+    option_a.save()
+    answer_factory(question=question, document=document, value=[option_a.slug])
+
+    def _search(word, language="en"):
+        with translation.override(language):
+            result = schema_executor(
+                SEARCH_QUERY,
+                variable_values={
+                    "search": [{"questions": [question.slug], "value": word}]
+                },
+            )
+        assert not result.errors
+        return len(result.data["allDocuments"]["edges"])
+
+    # labels are searched in the current language
+    assert _search("apple") == 1
+    assert _search("apfel") == 0
+    assert _search("apfel", "de") == 1
+
+    # changed labels are searched as soon as they are saved
+    option_a.label = {"en": "pear"}
+    option_a.save()
+    assert _search("apple") == 0
+    assert _search("pear") == 1
+
+    option_b.label = {"en": "pear"}
+    option_b.save()
+    option_a.delete()
+    assert _search("pear") == 0
+
+
+def test_search_option_label_unchanged(
+    db, mocker, question_factory, question_option_factory, answer_factory
+):
+    question, other_question = question_factory.create_batch(
+        2, type=models.Question.TYPE_CHOICE
+    )
+    option = question_option_factory(question=question).option
+    answer = answer_factory(question=question, value=option.slug)
+    answer_factory(question=other_question, value=option.slug)
+    update_answers = mocker.spy(models.AnswerSearchText, "update_answers")
+
+    option.meta = {"changed": True}
+    option.save()
+    assert not update_answers.called
+
+    # only the answers of the questions the option belongs to are updated
+    option.label = {"en": "changed"}
+    option.save()
+    assert list(update_answers.call_args.args[0]) == [answer]
+
+    option.delete()
+    assert list(update_answers.call_args.args[0]) == [answer]
+
+
+def test_backfill_answer_search_texts(
+    db,
+    question_factory,
+    question_option_factory,
+    answer_factory,
+    dynamic_option_factory,
+    document,
+):
+    migration = importlib.import_module(
+        "caluma.caluma_form.migrations.0052_answersearchtext_backfill"
+    )
+    for question_type in [
+        models.Question.TYPE_TEXT,
+        models.Question.TYPE_TEXTAREA,
+        models.Question.TYPE_INTEGER,
+        models.Question.TYPE_FLOAT,
+        models.Question.TYPE_DATE,
+    ]:
+        answer_factory(question__type=question_type, document=document)
+    # numbers are rendered without exponent by PostgreSQL
+    float_question = question_factory(type=models.Question.TYPE_FLOAT)
+    for value in [1e20, 1.5e-7, 10.0, -0.0, 2**70]:
+        answer_factory(question=float_question, value=value)
+
+    choice, multiple_choice = [
+        question_factory(type=question_type)
+        for question_type in [
+            models.Question.TYPE_CHOICE,
+            models.Question.TYPE_MULTIPLE_CHOICE,
+        ]
+    ]
+    options = [
+        question_option_factory(question=multiple_choice).option for _ in range(2)
+    ]
+    options[0].label = {"en": "apple", "de": "Apfel"}
+    options[0].save()
+    answer_factory(question=choice, document=document, value=options[0].slug)
+    answer_factory(
+        question=multiple_choice,
+        document=document,
+        value=[option.slug for option in options],
+    )
+
+    dynamic_choice = question_factory(type=models.Question.TYPE_DYNAMIC_CHOICE)
+    dynamic_option_factory(
+        question=dynamic_choice, document=document, slug="pear", label={"en": "Pear"}
+    )
+    answer_factory(question=dynamic_choice, document=document, value="pear")
+
+    def _texts():
+        return set(
+            models.AnswerSearchText.objects.values_list(
+                "answer_id", "question_id", "language", "text"
+            )
+        )
+
+    expected = _texts()
+    assert {text[0] for text in expected} == set(
+        models.Answer.objects.values_list("pk", flat=True)
+    )
+
+    models.AnswerSearchText.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(migration.BACKFILL_SQL)
+
+    assert _texts() == expected
+
+
+def test_search_dynamic_option_labels(
+    schema_executor,
+    db,
+    document,
+    question_factory,
+    answer_factory,
+    dynamic_option_factory,
+    django_capture_on_commit_callbacks,
+):
+    question = question_factory(type=models.Question.TYPE_DYNAMIC_CHOICE)
+    answer_factory(question=question, document=document, value="apple")
+    dynamic_option = dynamic_option_factory(
+        question=question, document=document, slug="apple", label={"en": "Apple"}
+    )
+
+    def _search():
+        result = schema_executor(
+            SEARCH_QUERY,
+            variable_values={
+                "search": [{"questions": [question.slug], "value": "app"}]
+            },
+        )
+        assert not result.errors
+        return len(result.data["allDocuments"]["edges"])
+
+    assert _search() == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        dynamic_option.delete()
+    assert _search() == 0
+
+    # search texts of deleted answers are dropped along with them
+    with django_capture_on_commit_callbacks(execute=True):
+        dynamic_option_factory(question=question, document=document, slug="apple")
+        document.delete()
+    assert not models.AnswerSearchText.objects.exists()
+
+
+@pytest.mark.parametrize(
+    "lookup,index",
+    [
+        (SearchLookupMode.STARTSWITH, "answersearchtext_trgm"),
+        (SearchLookupMode.CONTAINS, "answersearchtext_trgm"),
+        (SearchLookupMode.EXACT_WORD, "answersearchtext_trgm"),
+        (SearchLookupMode.TEXT, "answersearchtext_vector"),
+    ],
+)
+def test_search_uses_index(db, lookup, index):
+    # make the planner use an index even on an empty table
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+    plan = models.AnswerSearchText.objects.filter(
+        SearchAnswersFilter._word_lookup("word", lookup.value)
+    ).explain()
+    assert f"Bitmap Index Scan on {index}" in plan
+
+
+def test_update_answer_search_texts_command(
+    db, question_factory, answer_factory, document
+):
+    text_question, other_question = question_factory.create_batch(
+        2, type=models.Question.TYPE_TEXT
+    )
+    answer_factory.create_batch(3, question=text_question, value="hello")
+    answer_factory(question=other_question, document=document, value="hello")
+    models.AnswerSearchText.objects.all().delete()
+
+    out = io.StringIO()
+    call_command(
+        "update_answer_search_texts",
+        "--questions",
+        text_question.pk,
+        "--chunk-size",
+        "2",
+        stdout=out,
+    )
+    assert out.getvalue() == "Updated search texts of 3 answers\n"
+    assert models.AnswerSearchText.objects.count() == 3
+
+    call_command("update_answer_search_texts", stdout=out)
+    assert models.AnswerSearchText.objects.count() == 4
@@ -3,10 +3,14 @@
 from datetime import date, datetime
 
 import pytest
+from django.core.cache import cache
+from django.db import transaction
 
 from caluma.caluma_form import structure
 from caluma.caluma_form.api import save_answer
+from caluma.caluma_form.jexl import QuestionJexl
 from caluma.caluma_form.models import Answer, Document, FormQuestion, Question
+from caluma.caluma_form.validators import DocumentValidator
 
 
 @pytest.fixture()
@@ -521,3 +525,399 @@ def test_get_all_fields(form_and_document):
     assert len(table_fields) == 4
     table_slugs = [f.slug() for f in table_fields]
     assert table_slugs.count("column") == 2
+
+
+def test_fastloader_form_structure_cache(
+    transactional_db, simple_form_structure, settings, django_assert_num_queries
+):
+    settings.FORM_STRUCTURE_CACHE = True
+
+    # First load populates the cache
+    with django_assert_num_queries(7):
+        loader = structure.FastLoader.for_document(simple_form_structure)
+
+    expected_structure = structure.FieldSet(
+        simple_form_structure, _fastloader=loader
+    ).list_structure()
+
+    # Second load only needs to fetch the document side
+    with django_assert_num_queries(5):
+        loader = structure.FastLoader.for_document(simple_form_structure)
+
+    struc = structure.FieldSet(simple_form_structure, _fastloader=loader)
+    assert struc.list_structure() == expected_structure
+    assert loader.dependents_of_question("row_field_2") == {
+        "row_calc": ["calc_expression"]
+    }
+
+    # Changing the form definition invalidates the cache
+    question = Question.objects.get(pk="sub_leaf1")
+    question.is_hidden = "'leaf1'|answer == 'Some Value'"
+    question.save()
+
+    with django_assert_num_queries(7):
+        loader = structure.FastLoader.for_document(simple_form_structure)
+
+    assert loader.dependents_of_question("leaf1") == {"sub_leaf1": ["is_hidden"]}
+    struc = structure.FieldSet(simple_form_structure, _fastloader=loader)
+    assert struc.get_field("sub_leaf1").is_hidden()
+
+
+def test_fastloader_form_structure_cache_in_transaction(
+    transactional_db, simple_form_structure, settings, django_assert_num_queries
+):
+    settings.FORM_STRUCTURE_CACHE = True
+
+    structure.FastLoader.for_document(simple_form_structure)
+
+    with transaction.atomic():
+        FormQuestion.objects.filter(question="leaf2").delete()
+
+        # Uncommitted changes must not go into the shared cache
+        with django_assert_num_queries(7):
+            structure.FastLoader.for_document(simple_form_structure)
+        with django_assert_num_queries(7):
+            loader = structure.FastLoader.for_document(simple_form_structure)
+
+        assert "leaf2" not in [q.slug for q in loader.questions_for_form("root")]
+
+        transaction.set_rollback(True)
+
+    with django_assert_num_queries(7):
+        loader = structure.FastLoader.for_document(simple_form_structure)
+    assert "leaf2" in [q.slug for q in loader.questions_for_form("root")]
+
+    with django_assert_num_queries(5):
+        structure.FastLoader.for_document(simple_form_structure)
+
+
+def test_form_structure_cache_discard_stale(db, simple_form_structure):
+    form_cache = structure.FormStructureCache()
+    loader = structure.FastLoader.for_document(simple_form_structure)
+    cached_form = structure.CachedForm(
+        form=loader.form_by_id("root"),
+        questions=loader.questions_for_form("root"),
+        options={},
+        references={},
+    )
+
+    version, cached = form_cache.get_forms(["root"])
+    assert cached == {}
+
+    # Invalidation happening while a loader is busy: The loaded data
+    # may already be outdated, and must not be stored
+    form_cache.invalidate()
+    form_cache.store(version, [cached_form])
+    assert form_cache.get_forms(["root"])[1] == {}
+
+    version, _ = form_cache.get_forms(["root"])
+    form_cache.store(version, [cached_form])
+    assert form_cache.get_forms(["root"])[1] == {"root": cached_form}
+
+
+def test_form_structure_cache_copies(db, simple_form_structure):
+    form_cache = structure.FormStructureCache()
+    loader = structure.FastLoader.for_document(simple_form_structure)
+    version, _ = form_cache.get_forms(["root"])
+    form_cache.store(
+        version,
+        [
+            structure.CachedForm(
+                form=loader.form_by_id("root"),
+                questions=loader.questions_for_form("root"),
+                options={},
+                references={},
+            )
+        ],
+    )
+
+    # Every lookup gets its own instances, so changes made to them while
+    # building a structure don't leak into other requests
+    first = form_cache.get_forms(["root"])[1]["root"]
+    first.questions[0].label = "changed"
+    first.questions[0].row_form = first.form
+    second = form_cache.get_forms(["root"])[1]["root"]
+
+    assert second == first
+    assert second.questions[0] is not first.questions[0]
+    assert second.questions[0].label != "changed"
+    assert not second.questions[0]._state.fields_cache
+    assert first.form is not loader.form_by_id("root")
+    # the references are never changed, and don't need to be copied
+    assert second.references is first.references
+
+
+def test_save_answer_patches_validation_context(
+    simple_form_structure, document_factory, mocker
+):
+    """Verify saving answers into an existing structure.
+
+    The structure must be patched in place, and be consistent with a freshly
+    built one afterwards, even if table rows are added.
+    """
+    validator = DocumentValidator()
+    struc = validator.get_validation_context(simple_form_structure)
+    get_context_spy = mocker.spy(DocumentValidator, "get_validation_context")
+
+    leaf2 = Question.objects.get(pk="leaf2")
+    save_answer(leaf2, simple_form_structure, value=10, validation_context=struc)
+
+    table_field = struc.get_field("subform").get_field("sub_table")
+    new_row = document_factory(form=table_field.form)
+    save_answer(
+        Question.objects.get(pk="row_field_2"),
+        new_row,
+        value=1.5,
+    )
+    save_answer(
+        table_field.question,
+        simple_form_structure,
+        value=[str(row._document.pk) for row in table_field.children()]
+        + [str(new_row.pk)],
+        validation_context=struc,
+    )
+    assert get_context_spy.call_count == 1
+
+    assert len(table_field.children()) == 3
+    assert [
+        row.get_field("row_calc").get_value() for row in table_field.children()
+    ] == [
+        109.5,
+        33.0,
+        11.5,
+    ]
+
+    fresh = validator.get_validation_context(simple_form_structure)
+    assert struc.list_structure() == fresh.list_structure()
+
+
+def test_clear_dependent_memoise(simple_form_structure):
+    struc = structure.FieldSet(simple_form_structure)
+    struc._fastloader._questions["sub_leaf1"].is_hidden = "'leaf1'|answer == 'foo'"
+    struc._fastloader._jexl_dependencies["leaf1"]["sub_leaf1"].append("is_hidden")
+
+    sub_leaf1 = struc.get_field("subform").get_field("sub_leaf1")
+    leaf1 = struc.get_field("leaf1")
+    leaf2 = struc.get_field("leaf2")
+    assert not sub_leaf1.is_hidden()
+    assert leaf2.get_value() == 33
+
+    leaf1.answer.value = "foo"
+    dependents = leaf1.clear_dependent_memoise()
+
+    assert dependents == [sub_leaf1]
+    assert sub_leaf1.is_hidden()
+
+    # Visibility of containers cascades to their children
+    subform = struc.get_field("subform")
+    struc._fastloader._questions["subform"].is_hidden = "'leaf1'|answer == 'bar'"
+    struc._fastloader._jexl_dependencies["leaf1"]["subform"] = ["is_hidden"]
+    assert subform.find_all_fields_by_slug("row_field_2")[0].is_visible()
+
+    leaf1.answer.value = "bar"
+    # The hidden row fields in turn affect the row calculations
+    assert set(map(id, leaf1.clear_dependent_memoise())) == {
+        id(subform),
+        id(sub_leaf1),
+        *map(id, subform.find_all_fields_by_slug("row_calc")),
+    }
+    assert all(
+        not field.is_visible()
+        for field in subform.find_all_fields_by_slug("row_field_2")
+    )
+    # Fields not depending on the changed one keep their memoised results
+    assert leaf2._memoise
+
+
+@pytest.mark.parametrize(
+    "question_type,value,expected",
+    [
+        (Question.TYPE_FILES, [{"name": "some-file.pdf"}], ["some-file.pdf"]),
+        (Question.TYPE_DYNAMIC_CHOICE, "5.5", "5.5"),
+    ],
+)
+def test_save_answer_patches_related_data(
+    simple_form_structure,
+    form_question_factory,
+    admin_user,
+    minio_mock,
+    data_source_settings,
+    question_type,
+    value,
+    expected,
+):
+    question = form_question_factory(
+        form=simple_form_structure.form,
+        question__type=question_type,
+        question__data_source="MyDataSource",
+    ).question
+
+    struc = structure.FieldSet(simple_form_structure)
+    save_answer(
+        question,
+        simple_form_structure,
+        admin_user,
+        value=value,
+        validation_context=struc,
+    )
+
+    field = struc.get_field(question.slug)
+    if question_type == Question.TYPE_FILES:
+        assert field.get_value() == expected
+    else:
+        assert field.get_value() == expected
+        assert expected in field.get_dynamic_options()
+
+
+def test_save_answer_patches_nested_rows(
+    simple_form_structure,
+    form_question_factory,
+    document_factory,
+    answer_factory,
+    dynamic_option_factory,
+):
+    row_form = Question.objects.get(pk="sub_table").row_form
+    nested_table = form_question_factory(
+        form=row_form,
+        question__type=Question.TYPE_TABLE,
+        question__slug="nested_table",
+        sort=3,
+    ).question
+    nested_leaf = form_question_factory(
+        form=nested_table.row_form,
+        question__type=Question.TYPE_TEXT,
+        question__slug="nested_leaf",
+    ).question
+
+    row_files = form_question_factory(
+        form=row_form, question__type=Question.TYPE_FILES, sort=2
+    ).question
+    row_choice = form_question_factory(
+        form=row_form, question__type=Question.TYPE_DYNAMIC_CHOICE, sort=1
+    ).question
+
+    struc = structure.FieldSet(simple_form_structure)
+    table_field = struc.get_field("sub_table")
+
+    new_row = document_factory(form=row_form)
+    nested_row = document_factory(form=nested_table.row_form, family=new_row)
+    answer_factory(document=nested_row, question=nested_leaf, value="nested")
+    nested_answer = answer_factory(document=new_row, question=nested_table)
+    nested_answer.documents.add(nested_row)
+    files_answer = answer_factory(document=new_row, question=row_files)
+    row_option = dynamic_option_factory(document=new_row, question=row_choice)
+
+    save_answer(
+        table_field.question,
+        simple_form_structure,
+        value=[str(row._document.pk) for row in table_field.children()]
+        + [str(new_row.pk)],
+        validation_context=struc,
+    )
+
+    new_row_field = table_field.children()[-1]
+    assert new_row_field.get_field("nested_table").get_value() == [
+        {"nested_leaf": "nested"}
+    ]
+    assert len(struc.find_all_fields_by_slug("nested_leaf")) == 1
+    assert new_row_field.get_field(row_files.slug).get_value() == [
+        file.name for file in files_answer.files.order_by("created_at")
+    ]
+    assert row_option.slug in (
+        new_row_field.get_field(row_choice.slug).get_dynamic_options()
+    )
+    assert (
+        struc.list_structure()
+        == structure.FieldSet(simple_form_structure).list_structure()
+    )
+
+
+def test_form_structure_cache_options(
+    transactional_db,
+    simple_form_structure,
+    settings,
+    form_question_factory,
+    question_option_factory,
+):
+    settings.FORM_STRUCTURE_CACHE = True
+    choice = form_question_factory(
+        form=simple_form_structure.form, question__type=Question.TYPE_CHOICE
+    ).question
+    option = question_option_factory(question=choice).option
+
+    # Without a version token, nothing may be considered cached
+    cache.clear()
+    assert structure.form_structure_cache.get_forms(["root"])[1] == {}
+
+    structure.FastLoader.for_document(simple_form_structure)
+    loader = structure.FastLoader.for_document(simple_form_structure)
+    assert loader.options_for_question(choice.pk) == [option]
+
+
+def test_object_local_memoise():
+    class Memoised:
+        def __init__(self):
+            self.calls = 0
+
+        @structure.object_local_memoise
+        def compute(self, *args, **kwargs):
+            self.calls += 1
+            return self.calls
+
+    obj = Memoised()
+    assert obj.compute(1) == obj.compute(1) == 1
+    assert obj.compute(1, flag=True) == obj.compute(1, flag=True) == 2
+    # Unhashable arguments are memoised as well
+    assert obj.compute([1, 2]) == obj.compute([1, 2]) == 3
+    assert obj.compute([1, 3]) == 4
+
+    assert len(obj._memoise) == 4
+    assert (obj._memoise.hit_count, obj._memoise.miss_count) == (3, 4)
+    assert structure.memoise_stats()["methods"][Memoised.compute.__qualname__] == {
+        "hit_count": 3,
+        "miss_count": 4,
+    }
+
+    structure.clear_memoise(obj)
+    assert obj.compute(1) == 5
+
+
+def test_static_jexl_results(db, mocker, form_and_document):
+    form, document, questions, answers = form_and_document(
+        use_table=True, use_subform=True, table_row_count=5
+    )
+    # constant
+    questions["table"].is_hidden = "1 > 2"
+    questions["table"].save()
+    # depends on the location in the structure only
+    questions["column"].is_hidden = "info.form == 'sub_form'"
+    questions["column"].save()
+    questions["sub_question"].is_hidden = "info.form == 'sub_form'"
+    questions["sub_question"].save()
+    # depends on answers
+    questions["top_question"].is_hidden = "'table'|answer|length > 5"
+    questions["top_question"].save()
+
+    evaluate = mocker.spy(QuestionJexl, "evaluate")
+    fieldset = structure.FieldSet(document)
+    columns = [field for field in fieldset.get_all_fields() if field.slug() == "column"]
+
+    assert len(columns) == 5
+    assert not any(column.is_hidden() for column in columns)
+    assert fieldset.get_field("sub_question").is_hidden()
+    assert not fieldset.get_field("table").is_hidden()
+    assert not fieldset.get_field("top_question").is_hidden()
+
+    assert sorted(call.args[1] for call in evaluate.call_args_list) == [
+        "'table'|answer|length > 5",
+        "1 > 2",
+        "info.form == 'sub_form'",
+        "info.form == 'sub_form'",
+    ]
+
+    # errors are raised as usual and not kept
+    column = columns[0]
+    assert column.evaluate_jexl("info.form / 0", raise_on_error=False) is None
+    with pytest.raises(RuntimeError):
+        column.evaluate_jexl("info.form / 0")
+    assert len(fieldset._static_jexl_results) == 3
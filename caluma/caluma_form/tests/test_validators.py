@@ -810,12 +810,12 @@ def test_validate_integer_0(
     "option_jexl, expect_queries, expect_jexl_evaluations",
     [
         # pre-recognized "visible" jexl, no JEXL and few queries
-        ("", 9, 0),
+        ("", 11, 0),
         # pre-recognized "visible" jexl, no JEXL and few queries
-        ("false", 9, 0),
+        ("false", 11, 0),
         # not pre-recognized - needs to be evaluated in full doc context
         # therefore more queries needed, and JEXL expressions are evaluated
-        ("!true", 16, 5),
+        ("!true", 18, 5),
     ],
 )
 def test_validate_options_without_jexl(
@@ -885,7 +885,7 @@ def test_validate_custom_value_field(
     if question.type == Question.TYPE_DATE:
         date = datetime.date(2026, 5, 7)
     elif question.type == Question.TYPE_TABLE:
-        documents = document_factory.create_batch(2)
+        documents = document_factory.create_batch(2, family=document)
     elif question.type == Question.TYPE_FILES:
         files = file_factory.create_batch(2)
 
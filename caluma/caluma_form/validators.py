@@ -7,6 +7,7 @@ from django_filters.constants import EMPTY_VALUES
 from rest_framework import exceptions
 
 from caluma.caluma_core.exceptions import ConfigurationError
+from caluma.caluma_core.loaders import get_request_cache
 from caluma.caluma_data_source.data_source_handlers import get_data_sources
 from caluma.caluma_form import structure
 from caluma.caluma_workflow.models import Case, WorkItem
@@ -83,7 +84,7 @@ class AnswerValidator:
                 document_id=document.pk,
             )
 
-    def _structure_field(self, document, question, validation_context):
+    def _structure_field(self, document, question, validation_context, request=None):
         """Return the requested structure field, and the root context.
 
         The root context is mostly not used, but needed to ensure it won't go
@@ -111,14 +112,14 @@ class AnswerValidator:
         # If we need to create the context ourselves here, we'll need to fetch
         # the field from the context. As our document could be a table row, we
         # and table questions can refer to "external" questions, we need the full family
-        root_context = DocumentValidator().get_validation_context(document.family)
+        root_context = get_family_validation_context(document, request)
 
         return root_context.find_field_by_document_and_question(
             document, question.slug
         ), root_context
 
     def _evaluate_options_jexl(
-        self, document, question, validation_context=None, qs=None
+        self, document, question, validation_context=None, qs=None, request=None
     ):
         """Return a list of slugs that are, according to their is_hidden JEXL, visible."""
 
@@ -137,7 +138,9 @@ class AnswerValidator:
                 return [o.slug for o in all_options]
 
         # This won't do too much as we already have a validation context
-        field, _root = self._structure_field(document, question, validation_context)
+        field, _root = self._structure_field(
+            document, question, validation_context, request
+        )
         if not field:  # pragma: no cover
             # This only happens if *programmer* made an error, therefore we're
             # not explicitly covering it
@@ -149,14 +152,14 @@ class AnswerValidator:
         options = field.get_options()
         return [o.slug for o in options if not field.evaluate_jexl(o.is_hidden)]
 
-    def visible_options(self, document, question, qs):
-        return self._evaluate_options_jexl(document, question, qs=qs)
+    def visible_options(self, document, question, qs, request=None):
+        return self._evaluate_options_jexl(document, question, qs=qs, request=request)
 
     def _validate_question_choice(
-        self, question, value, validation_context, document, **kwargs
+        self, question, value, validation_context, document, request=None, **kwargs
     ):
         options = self._evaluate_options_jexl(
-            document, question, validation_context=validation_context
+            document, question, validation_context=validation_context, request=request
         )
 
         if not isinstance(value, str) or value not in options:
@@ -168,10 +171,10 @@ class AnswerValidator:
             )
 
     def _validate_question_multiple_choice(
-        self, question, value, validation_context, document, **kwargs
+        self, question, value, validation_context, document, request=None, **kwargs
     ):
         options = self._evaluate_options_jexl(
-            document, question, validation_context=validation_context
+            document, question, validation_context=validation_context, request=request
         )
 
         invalid_options = set(value) - set(options)
@@ -301,6 +304,7 @@ class AnswerValidator:
         instance=None,
         origin=False,
         data_source_context=None,
+        request=None,
         **kwargs,
     ):
         # Get value from kwargs depending on the question type
@@ -345,6 +349,7 @@ class AnswerValidator:
             instance=instance,
             origin=origin,
             data_source_context=data_source_context,
+            request=request,
         )
 
         format_validators = get_format_validators(dic=True)
@@ -392,14 +397,17 @@ class DocumentValidator:
             if field.is_visible() and field.answer:
                 # if answer is not given, the required_but_empty check above would
                 # already have raised an exception
+                # take the related objects from the structure's loader, as
+                # following the answer's relations costs queries per answer
+                fastloader = field._fastloader
                 validator = AnswerValidator()
                 validator.validate(
-                    document=field.answer.document,
+                    document=fastloader.document_by_id(field.answer.document_id),
                     question=field.question,
                     value=field.answer.value,
                     date=field.answer.date,
-                    documents=field.answer.documents.all(),
-                    files=field.answer.files.all(),
+                    documents=fastloader.rows_for_table_answer(field.answer.pk),
+                    files=fastloader.files_for_answer(field.answer.pk),
                     user=user,
                     validation_context=field,
                     data_source_context=data_source_context,
@@ -554,6 +562,43 @@ class QuestionValidator:
             self._validate_data_source(data["dataSource"])
 
 
+def get_family_validation_contexts(documents, request=None):
+    """Return the validation contexts of the documents' families by family id.
+
+    The structure of all families is loaded at once. The contexts are cached on
+    the request, so the structure of a family is only loaded once per request,
+    no matter how many filters and fields need it. Mutations drop the cache
+    (see `caluma_core.loaders.clear_loaders()`).
+    """
+    contexts = {}
+    if request is not None:
+        contexts = get_request_cache(request, "validation_contexts")
+
+    missing = [document for document in documents if document.family_id not in contexts]
+    if missing:
+        fastloader = structure.FastLoader.for_queryset(missing)
+        validator = DocumentValidator()
+        for document in missing:
+            contexts[document.family_id] = validator.get_validation_context(
+                fastloader.document_by_id(document.family_id), _fastloader=fastloader
+            )
+
+    return {document.family_id: contexts[document.family_id] for document in documents}
+
+
+def get_family_validation_context(document, request=None):
+    """Return the validation context of the document's family."""
+    return get_family_validation_contexts([document], request)[document.family_id]
+
+
+def get_cached_family_validation_context(document, request):
+    """Return the validation context of the document's family, if already loaded.
+
+    Return None if the request didn't need the family's structure so far.
+    """
+    return get_request_cache(request, "validation_contexts").get(document.family_id)
+
+
 def run_validation(validation_fn, *args, **kwargs):
     is_valid = True
     errors = []
@@ -582,26 +627,13 @@ def get_validity():  # pragma: no cover
 
 
 @get_validity.register(models.Document)
-def _(document, user, **kwargs):
-    validator = DocumentValidator()
-    validation_context = validator.get_validation_context(document.family)
-
-    is_valid, errors = run_validation(
-        validator.validate,
-        document=document,
-        user=user,
-        validation_context=validation_context,
-        **kwargs,
-    )
-
-    return {"id": document.id, "is_valid": is_valid, "errors": errors}
+def _(document, user, request=None, **kwargs):
+    return get_validities([document], user, request, **kwargs)[0]
 
 
 @get_validity.register(models.Answer)
-def _(answer, user, **kwargs):
-    validation_context = DocumentValidator().get_validation_context(
-        answer.document.family
-    )
+def _(answer, user, request=None, **kwargs):
+    validation_context = get_family_validation_context(answer.document, request)
 
     is_valid, errors = run_validation(
         AnswerValidator().validate,
@@ -615,3 +647,27 @@ def _(answer, user, **kwargs):
     )
 
     return {"id": answer.id, "is_valid": is_valid, "errors": errors}
+
+
+def get_validities(documents, user, request=None, **kwargs):
+    """Validate the given documents in one pass.
+
+    The structure of all their families is loaded at once, the results have
+    the same shape as the ones of `get_validity()`.
+    """
+    documents = list(documents)
+    validation_contexts = get_family_validation_contexts(documents, request)
+    validator = DocumentValidator()
+
+    results = []
+    for document in documents:
+        is_valid, errors = run_validation(
+            validator.validate,
+            document=document,
+            user=user,
+            validation_context=validation_contexts[document.family_id],
+            **kwargs,
+        )
+        results.append({"id": document.id, "is_valid": is_valid, "errors": errors})
+
+    return results
@@ -44,7 +44,9 @@ if settings.QUERY_DEPTH_LIMIT:  # pragma: no cover
     )
 
 
-class AuthenticationGraphQLView(GraphQLView):
+class AuthenticationMixin:
+    """Authenticate the user of a request by its OIDC bearer token."""
+
     @classmethod
     def _requests_session(cls):
         """
@@ -58,9 +60,6 @@ class AuthenticationGraphQLView(GraphQLView):
             setattr(cls, "_http_client", requests.Session())
         return cls._http_client
 
-    if custom_validation_rules:  # pragma: no cover
-        validation_rules = tuple(custom_validation_rules)
-
     def get_bearer_token(self, request):
         auth = get_authorization_header(request).split()
         header_prefix = "Bearer"
@@ -125,6 +124,11 @@ class AuthenticationGraphQLView(GraphQLView):
 
         return self._oidc_user(token=token, claims=claims)
 
+
+class AuthenticationGraphQLView(AuthenticationMixin, GraphQLView):
+    if custom_validation_rules:  # pragma: no cover
+        validation_rules = tuple(custom_validation_rules)
+
     def dispatch(self, request, *args, **kwargs):
         try:
             request.user = self.get_user(request)
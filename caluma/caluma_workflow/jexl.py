@@ -1,5 +1,6 @@
 from functools import partial
 from itertools import chain
+from logging import getLogger
 
 from django.core.exceptions import ValidationError
 from pyjexl.analysis import ValidatingAnalyzer
@@ -7,7 +8,9 @@ from pyjexl.evaluator import Context
 from pyjexl.parser import Literal
 
 from ..caluma_core.jexl import JEXL, ExtractTransformSubjectAnalyzer
-from .models import Task
+from .models import Flow, Task, TaskFlow
+
+log = getLogger(__name__)
 
 
 def task_exists(slug):
@@ -214,3 +217,34 @@ class FlowJexl(JEXL):
                 return value
 
         return [name]
+
+
+def warm_up_cache():
+    """Parse and compile the JEXL expressions of all flows and tasks.
+
+    Intended to be called at startup, so the expressions don't need to be
+    parsed upon the first requests.
+    """
+    flow_expressions = set(
+        chain(
+            Flow.objects.values_list("next", flat=True).distinct(),
+            TaskFlow.objects.exclude(redoable=None)
+            .values_list("redoable", flat=True)
+            .distinct(),
+        )
+    )
+    group_expressions = set(
+        chain(
+            Task.objects.exclude(address_groups=None)
+            .values_list("address_groups", flat=True)
+            .distinct(),
+            Task.objects.exclude(control_groups=None)
+            .values_list("control_groups", flat=True)
+            .distinct(),
+        )
+    )
+    prepared = FlowJexl().prepare(flow_expressions) + GroupJexl().prepare(
+        group_expressions
+    )
+    log.info("Prepared %d workflow JEXL expressions", prepared)
+    return prepared
@@ -215,6 +215,12 @@ class WorkItem(DjangoObjectType):
     resolve_document = suppressable_visibility_resolver()
     resolve_previous_work_item = suppressable_visibility_resolver()
 
+    deferrable_fields = {
+        "name": ["name"],
+        "description": ["description"],
+        "meta": ["meta"],
+    }
+
     def resolve_is_redoable(self, *args, **kwargs):
         return (
             self.status != models.WorkItem.STATUS_READY
@@ -254,6 +260,8 @@ class Case(DjangoObjectType):
 
     resolve_workflow = suppressable_visibility_resolver()
 
+    deferrable_fields = {"meta": ["meta"]}
+
     def resolve_family_work_items(self, info, **args):
         return models.WorkItem.objects.filter(case__family=self.family)
 
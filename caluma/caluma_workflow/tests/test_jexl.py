@@ -1,7 +1,9 @@
 import pytest
 
+from ...caluma_core.jexl import JEXL, Cache
+from ...caluma_core.tests import evaluate_compiled_and_interpreted
 from ..dynamic_tasks import BaseDynamicTasks, register_dynamic_task
-from ..jexl import FlowJexl, GroupJexl
+from ..jexl import FlowJexl, GroupJexl, warm_up_cache
 
 
 class CustomDynamicTasks(BaseDynamicTasks):
@@ -81,3 +83,64 @@ def test_flow_jexl_validate(expression, expected_errors, task_config):
 def test_group_jexl_validate(expression, num_errors):
     jexl = GroupJexl()
     assert len(list(jexl.validate(expression))) == num_errors
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "'task-slug'|task",
+        "['task-slug2', 'task-slug1', 'task-slug1']|tasks",
+        "'dynamic-task'|task",
+        "['task-slug', 'dynamic-task']|tasks",
+        "63 > 62 ? 'task-slug'|task : ['task-slug1']|tasks",
+        "'task-slug'|tasks",
+    ],
+)
+def test_flow_jexl_compiled(expression, task_config):
+    compiled, interpreted = evaluate_compiled_and_interpreted(FlowJexl(), expression)
+
+    assert compiled == interpreted
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "['group2', 'group1']|groups",
+        "info.case.created_by_group",
+        "info.prev_work_item.addressed_groups|groups",
+        "info.context.controlling_groups",
+        "info.missing",
+        "'group1'",
+    ],
+)
+def test_group_jexl_compiled(expression):
+    jexl = GroupJexl(
+        validation_context={
+            "case": {"created_by_group": "group1"},
+            "prev_work_item": {"addressed_groups": ["group3", "group1"]},
+            "context": {"controlling_groups": ["group2"]},
+        }
+    )
+    compiled, interpreted = evaluate_compiled_and_interpreted(jexl, expression)
+
+    assert compiled == interpreted
+
+
+def test_warm_up_cache(db, mocker, flow_factory, task_flow_factory, task_factory):
+    cache = Cache()
+    mocker.patch.object(JEXL, "expr_cache", cache)
+
+    task_flow_factory(
+        flow=flow_factory(next="'task-slug'|task"), redoable="['a', 'b']|tasks"
+    )
+    task_flow_factory(flow=flow_factory(next="'task-slug'|task"), redoable=None)
+    task_factory(address_groups="['group1']|groups", control_groups=None)
+    task_factory(address_groups=None, control_groups="info.case.created_by_group")
+
+    assert warm_up_cache() == 4
+    assert set(cache._cache) == {
+        "'task-slug'|task",
+        "['a', 'b']|tasks",
+        "['group1']|groups",
+        "info.case.created_by_group",
+    }
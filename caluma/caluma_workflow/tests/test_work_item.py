@@ -38,6 +38,56 @@ def test_query_all_work_items_filter_status(db, work_item_factory, schema_execut
     )
 
 
+@pytest.mark.parametrize("work_item_count", [1, 10])
+def test_query_all_work_items_batched(
+    db, work_item_factory, schema_executor, django_assert_num_queries, work_item_count
+):
+    work_item_factory.create_batch(work_item_count, child_case=None)
+
+    query = """
+        query WorkItems {
+          allWorkItems {
+            edges {
+              node {
+                task {
+                  slug
+                }
+                childCase {
+                  id
+                }
+                case {
+                  document {
+                    form {
+                      slug
+                    }
+                  }
+                  workflow {
+                    slug
+                  }
+                  workItems {
+                    edges {
+                      node {
+                        id
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    # the number of queries must not depend on the number of work items
+    with django_assert_num_queries(6):
+        result = schema_executor(query)
+
+    assert not result.errors
+    assert len(result.data["allWorkItems"]["edges"]) == work_item_count
+    for edge in result.data["allWorkItems"]["edges"]:
+        assert len(edge["node"]["case"]["workItems"]["edges"]) == 1
+
+
 @pytest.mark.parametrize("key", ["addressed_groups", "controlling_groups"])
 def test_query_all_work_items_filter_groups(
     db, key, work_item_factory, schema_executor
@@ -53,6 +53,19 @@ GRAPHENE = {
     "RELAY_CONNECTION_MAX_LIMIT": None,
 }
 
+# Paginate connections by seeking to the ordering values encoded in the cursors
+# instead of using OFFSET, and only count the total when it's requested.
+# Legacy offset cursors and the `offset` argument keep working.
+KEYSET_PAGINATION = env.bool("KEYSET_PAGINATION", default=False)
+
+# How `totalCount` of connections is computed: "exact", "estimate" (use the
+# query planner's estimate for results with more than
+# TOTAL_COUNT_ESTIMATE_THRESHOLD rows) or "cached" (cache exact counts per
+# filtered query for TOTAL_COUNT_CACHE_TIMEOUT seconds)
+TOTAL_COUNT_STRATEGY = env.str("TOTAL_COUNT_STRATEGY", default="exact")
+TOTAL_COUNT_ESTIMATE_THRESHOLD = env.int("TOTAL_COUNT_ESTIMATE_THRESHOLD", default=1000)
+TOTAL_COUNT_CACHE_TIMEOUT = env.int("TOTAL_COUNT_CACHE_TIMEOUT", default=60)
+
 # If you set DISABLE_INTROSPECTION to True, any GQL client will not be able to
 # query the types and connections, making crafting queries much harder (but not
 # impossible, and this is an Open Source product, so they can still go check
@@ -103,12 +116,42 @@ DYNAMIC_GROUPS_CLASSES = env.list("DYNAMIC_GROUPS_CLASSES", default=[])
 
 DYNAMIC_TASKS_CLASSES = env.list("DYNAMIC_TASKS_CLASSES", default=[])
 
+# Keep the form structure (questions, options and the JEXL dependency graph)
+# cached across requests. Requires a shared CACHE_BACKEND (e.g. memcached) if
+# Caluma runs in more than one process, as invalidation is coordinated through
+# the cache.
+FORM_STRUCTURE_CACHE = env.bool("FORM_STRUCTURE_CACHE", default=False)
+
+# Recalculate all answers of a calculated question in a background thread
+# after its expression (or the containing forms) changed, instead of within
+# the request. The answers are outdated until the recalculation is finished,
+# recalculations pending when the process exits need to be caught up on with
+# the `recalculate_calc_answers` command.
+CALC_RECALCULATION_DEFERRED = env.bool("CALC_RECALCULATION_DEFERRED", default=False)
+
+# Number of parsed JEXL expressions kept in memory per process. Should be
+# larger than the number of distinct expressions in use, which can be checked
+# with the `check_jexl_cache` health check.
+JEXL_CACHE_SIZE = env.int("JEXL_CACHE_SIZE", default=2000)
+
+# Parse all JEXL expressions of questions, options, flows and tasks when the
+# WSGI application is loaded, before the first requests are served
+JEXL_CACHE_WARM_UP = env.bool("JEXL_CACHE_WARM_UP", default=False)
+
 # simple history
 SIMPLE_HISTORY_HISTORY_ID_USE_UUID = True
 
 # Historical API
 ENABLE_HISTORICAL_API = env.bool("ENABLE_HISTORICAL_API", default=False)
 
+# Keep the result rows and the available fields of analytics tables cached for
+# the given number of seconds (0 disables the cache). Like FORM_STRUCTURE_CACHE,
+# these require a shared CACHE_BACKEND if Caluma runs in more than one process.
+ANALYTICS_RESULT_CACHE_TIMEOUT = env.int("ANALYTICS_RESULT_CACHE_TIMEOUT", default=0)
+ANALYTICS_FIELD_CATALOG_CACHE_TIMEOUT = env.int(
+    "ANALYTICS_FIELD_CATALOG_CACHE_TIMEOUT", default=0
+)
+
 # Configure the fields you intend to use in the "meta" fields. This will
 # provide corresponding constants in the ordreBy filter, as well as allow
 # you to use those fields in the analytics module.
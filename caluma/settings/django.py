@@ -194,6 +194,9 @@ if ENABLE_ACCESS_LOG:
 
 
 # health checks
+# Add "caluma.caluma_core.health_checks.check_jexl_cache" or
+# "caluma.caluma_core.health_checks.check_analytics_result_cache" to report the
+# usage of the JEXL expression cache or the analytics result cache
 WATCHMAN_CHECKS = env.list(
     "WATCHMAN_CHECKS",
     default=(
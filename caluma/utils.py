@@ -2,7 +2,9 @@ from functools import wraps
 from logging import getLogger
 
 from django.db.models import Model
+from graphene_django.registry import get_global_registry
 
+from caluma.caluma_core.loaders import load_related_object
 from caluma.caluma_core.types import Node
 
 log = getLogger(__name__)
@@ -148,20 +150,30 @@ def suppressable_visibility_resolver():
     # Avoid circular imports
     from caluma.caluma_core.visibilities import BaseVisibility
 
-    # TODO: This is currently untested (as in unit test), because
-    # the checks are done at startup (where the schema is initialized)
-    # and we can't swap out the visibility class during test runs
-    # to validate the behavour as we'd usually do.
     class SuppressableResolver:
-        def __call__(self, inner_self, *args, **kwargs):
-            return getattr(inner_self, self.prop, None)
-
-        @property
-        def _bypass_get_queryset(self):  # pragma: no cover
-            """Tell Graphene to bypass get_queryset()."""
-            # If any visibility class tells us to bypass the
-            # queryset of this property, we return True
-            return any(
+        # Related objects are loaded in batches and the visibility layer is
+        # applied in `__call__`, so Graphene must not fetch them on its own.
+        _bypass_get_queryset = True
+
+        def __call__(self, inner_self, info, *args, **kwargs):
+            # Related objects are loaded together with the ones of all the
+            # other nodes on the same page, see `caluma_core.loaders`
+            field = inner_self._meta.get_field(self.prop)
+            node_type = None
+            if self.applies_visibility():
+                node_type = get_global_registry().get_type_for_model(
+                    field.related_model
+                )
+            return load_related_object(info, inner_self, field, node_type)
+
+        def applies_visibility(self):
+            """Tell whether the related objects go through the visibility layer.
+
+            Only fields converted from the model by graphene-django do,
+            explicitly declared fields never did. Any visibility class may
+            suppress it for this property.
+            """
+            return self.converted and not any(
                 self.qualname in vis_class().suppress_visibilities
                 for vis_class in Node.visibility_classes
             )
@@ -176,6 +188,7 @@ def suppressable_visibility_resolver():
             self.name = owner.__name__
             self.prop = name.replace("resolve_", "")
             self.qualname = f"{self.name}.{self.prop}"
+            self.converted = self.prop not in vars(owner)
             BaseVisibility._suppressable_visibilities.add(self.qualname)
 
     return SuppressableResolver()
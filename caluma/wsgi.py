@@ -9,8 +9,20 @@ https://docs.djangoproject.com/en/1.11/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
+from django.db import connection
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "caluma.settings.django")
 
 application = get_wsgi_application()
+
+if settings.JEXL_CACHE_WARM_UP:
+    from caluma.caluma_form.jexl import warm_up_cache as warm_up_form_jexl
+    from caluma.caluma_workflow.jexl import warm_up_cache as warm_up_workflow_jexl
+
+    warm_up_form_jexl()
+    warm_up_workflow_jexl()
+
+    # Don't hand the warm-up's database connection down to forked workers
+    connection.close()